@@ -12,7 +12,7 @@ from enum import StrEnum, auto
 from pathlib import Path
 from typing import Type
 
-from gen_utils import random_bool, timestamp_gen
+from gen_utils import random_bool, take_timestamp_format_option, timestamp_gen
 
 logging.basicConfig(level=logging.INFO)
 
@@ -218,8 +218,8 @@ def collect_event_generators_for(platform: Platform) -> list[Event]:
 RATE_OF_KEEPING_LAST_TIMESTAMP = 0.01
 
 
-def generate_all_timestamps(count: int):
-    timestamp_of = timestamp_gen()
+def generate_all_timestamps(count: int, timestamp_format: str = "text"):
+    timestamp_of = timestamp_gen(timestamp_format=timestamp_format)
     time_delta = timedelta(seconds=0)
     for _ in range(count):
         is_simultaneous = random.random() <= RATE_OF_KEEPING_LAST_TIMESTAMP
@@ -234,6 +234,7 @@ def generate_all_timestamps(count: int):
 
 if __name__ == "__main__":
     output_file = sys.stdout
+    timestamp_format = take_timestamp_format_option(sys.argv)
     if len(sys.argv) < 2 or not sys.argv[1].isdigit():
         logging.error(
             "Only accept one integer argument that specifies the required number of entries."
@@ -251,6 +252,6 @@ if __name__ == "__main__":
     selected_platform = random.choice([Platform.MOB, Platform.WEB])
     logging.info("Generate data for the %s platform.", selected_platform)
     event_generators = collect_event_generators_for(selected_platform)
-    for ts in generate_all_timestamps(required_count):
-        event = {"timestamp": f"{ts}"} | random.choice(event_generators).generate()
+    for ts in generate_all_timestamps(required_count, timestamp_format):
+        event = {"timestamp": ts} | random.choice(event_generators).generate()
         print(json.dumps(event), file=output_file)
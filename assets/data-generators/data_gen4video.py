@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
+import json
 import logging
 import random
 import sys
 from pathlib import Path
 
-from gen_utils import generate_timestamps, random_bool
+from gen_utils import generate_timestamps, random_bool, take_timestamp_format_option
 
 logging.basicConfig(level=logging.INFO)
 
@@ -42,6 +43,7 @@ def random_event_data():
 
 if __name__ == "__main__":
     output_file = sys.stdout
+    timestamp_format = take_timestamp_format_option(sys.argv)
     if len(sys.argv) < 2 or not sys.argv[1].isdigit():
         logging.error(
             "Only accept one integer argument that specifies the required number of entries."
@@ -55,12 +57,12 @@ if __name__ == "__main__":
         if output_path != "-":
             output_file = open(output_path, "w", encoding="utf-8")
 
-    TEMPLATE = """{{"timestamp": "{}", "sessionId": "{}", {}}}"""
+    TEMPLATE = """{{"timestamp": {}, "sessionId": "{}", {}}}"""
 
     session_id = 0
-    for i, t in enumerate(generate_timestamps(required_count)):
+    for i, t in enumerate(generate_timestamps(required_count, timestamp_format)):
         should_switch_session = i % random.randint(1, 20) == 0 and random_bool()
         if should_switch_session:
             session_id += 1
-        recbuf = TEMPLATE.format(t, f"SSID_{session_id}", random_event_data())
+        recbuf = TEMPLATE.format(json.dumps(t), f"SSID_{session_id}", random_event_data())
         print(recbuf, file=output_file)
@@ -1,17 +1,53 @@
 import logging
 import random
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime, timedelta, timezone
 from typing import Callable
 
 logging.basicConfig(level=logging.INFO)
 
+# "text" is the format LSDL accepts without any `_timestamp_format` in the input schema, the others
+# match the `_timestamp_format` of the same name.
+TIMESTAMP_FORMATS = ("text", "epoch_ms", "epoch_ns", "rfc3339")
+TIMESTAMP_FORMAT_OPTION = "--timestamp-format="
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def take_timestamp_format_option(argv: list[str]) -> str:
+    """Remove the optional `--timestamp-format=<format>` from `argv`, and return the format."""
+    timestamp_format = "text"
+    for arg in [a for a in argv if a.startswith(TIMESTAMP_FORMAT_OPTION)]:
+        argv.remove(arg)
+        timestamp_format = arg.removeprefix(TIMESTAMP_FORMAT_OPTION)
+    if timestamp_format not in TIMESTAMP_FORMATS:
+        logging.error(
+            "Unknown timestamp format %s, expecting one of %s.",
+            timestamp_format,
+            ", ".join(TIMESTAMP_FORMATS),
+        )
+        sys.exit(1)
+    return timestamp_format
+
 
 def timestamp_gen(
     initial_timestamp: datetime = datetime.now(),
-) -> Callable[[timedelta], str]:
-    return (
-        lambda delta: f"{(initial_timestamp + delta).isoformat(sep=' ', timespec='milliseconds')} UTC"
-    )
+    timestamp_format: str = "text",
+) -> Callable[[timedelta], str | int]:
+    # The generated timestamps are always treated as UTC time.
+    match timestamp_format:
+        case "epoch_ms":
+            return lambda delta: (initial_timestamp + delta - _EPOCH) // timedelta(milliseconds=1)
+        case "epoch_ns":
+            # `datetime` only has microsecond precision.
+            return lambda delta: (initial_timestamp + delta - _EPOCH) // timedelta(microseconds=1) * 1000
+        case "rfc3339":
+            utc_initial_timestamp = initial_timestamp.replace(tzinfo=timezone.utc)
+            return lambda delta: (utc_initial_timestamp + delta).isoformat(timespec="milliseconds")
+        case _:
+            return (
+                lambda delta: f"{(initial_timestamp + delta).isoformat(sep=' ', timespec='milliseconds')} UTC"
+            )
 
 
 def random_bool():
@@ -21,8 +57,8 @@ def random_bool():
 RATE_OF_KEEPING_LAST_TIMESTAMP = 0.01
 
 
-def generate_timestamps(count: int):
-    timestamp_of = timestamp_gen()
+def generate_timestamps(count: int, timestamp_format: str = "text"):
+    timestamp_of = timestamp_gen(timestamp_format=timestamp_format)
     time_delta = timedelta(seconds=0)
     for _ in range(count):
         is_simultaneous = random.random() <= RATE_OF_KEEPING_LAST_TIMESTAMP
@@ -1,13 +1,13 @@
-from lsdl.lsp_model import InputSchemaBase, String, volatile
+from lsdl.lsp_model import InputSchemaBase, Interned, String, volatile
 
 
 class InputSignal(InputSchemaBase):
     _timestamp_key = "timestamp"
 
-    event_name = String()  # noqa: E221
+    event_name = Interned(String())  # noqa: E221
     event_category = String()  # noqa: E221
 
-    platform = String()  # noqa: E221
+    platform = Interned(String())  # noqa: E221
 
     page_id = String()  # noqa: E221
     screen_id = String()  # noqa: E221
@@ -15,7 +15,7 @@ class InputSignal(InputSchemaBase):
     load_start = String()  # noqa: E221
     load_end = String()  # noqa: E221
 
-    conviva_video_events_name = String()  # noqa: E221
+    conviva_video_events_name = Interned(String())  # noqa: E221
 
     response_code = String()  # noqa: E221
     network_request_duration = String()  # noqa: E221
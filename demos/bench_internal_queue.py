@@ -0,0 +1,193 @@
+"""Compare the internal event queue kinds on the demo binaries.
+
+Usage: `python demos/bench_internal_queue.py [options] [demo...]`, from any directory.
+
+Every demo is built in release mode twice, once with
+`processing_config().set_internal_queue("heap")` and once with
+`processing_config().set_internal_queue("timer_wheel", ...)` added to its metrics definition,
+which is restored afterwards. The demo input is replicated to make a run long enough to time:
+every copy is shifted after the previous one, and the session keys are suffixed, so each copy
+plays the same sessions again as new ones. Both binaries run on the same input, the fastest of
+the runs is reported, in elapsed and in CPU seconds, and their output records must be the same.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import zip_longest
+from pathlib import Path
+from typing import Optional
+
+_REPO = Path(__file__).resolve().parent.parent
+_BUFFER_BYTES = 1 << 20
+
+# The demo input and the input keys identifying a session, which are suffixed in every copy.
+_DEMOS = {
+    "app-analytics": ("assets/data/app-analytics-metrics-demo-input.jsonl", []),
+    "video-metrics": ("assets/data/video-metrics-demo-input.jsonl", ["sessionId"]),
+}
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.removesuffix("UTC").strip())
+
+
+def replicate_input(
+    source: Path, session_keys: list[str], repeat: int, out: Path
+) -> int:
+    """Write `repeat` copies of the input, returns the number of events written."""
+    lines = source.read_text().splitlines()
+    events = [json.loads(line) for line in lines if line.strip()]
+    timestamps = [_parse_timestamp(e["timestamp"]) for e in events]
+    # One extra minute between the copies, so the sessions of a copy are over.
+    span = max(timestamps) - min(timestamps) + timedelta(minutes=1)
+    with open(out, "w", buffering=_BUFFER_BYTES) as fout:
+        for i in range(repeat):
+            for event, timestamp in zip(events, timestamps):
+                event = dict(event)
+                event["timestamp"] = f"{timestamp + i * span:%Y-%m-%d %H:%M:%S.%f} UTC"
+                for key in session_keys:
+                    if key in event:
+                        event[key] = f"{event[key]}_{i}"
+                fout.write(json.dumps(event) + "\n")
+    return repeat * len(events)
+
+
+def build_demo(demo: str, queue_config: str, binary: Path) -> None:
+    """Build the demo with the queue configuration, and copy the binary to `binary`."""
+    metrics_def = _REPO / "demos" / demo / "metrics" / "metrics-def.py"
+    original = metrics_def.read_text()
+    lines = original.splitlines(keepends=True)
+    idx = next(
+        i for i, line in enumerate(lines) if line.startswith("print_ir_to_stdout(")
+    )
+    lines[idx:idx] = [
+        "from lsdl import processing_config\n",
+        f"processing_config().set_internal_queue({queue_config})\n",
+    ]
+    try:
+        metrics_def.write_text("".join(lines))
+        subprocess.run(
+            ["cargo", "build", "--release", "-p", demo], cwd=_REPO, check=True
+        )
+    finally:
+        metrics_def.write_text(original)
+    target_dir = Path(os.environ.get("CARGO_TARGET_DIR", _REPO / "target"))
+    shutil.copy(target_dir / "release" / demo, binary)
+
+
+def _children_cpu_secs() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_demo(
+    binary: Path, input_path: Path, output: Path, checkpoint_home: Path
+) -> tuple[float, float]:
+    """Run the demo, returns the elapsed and the CPU seconds."""
+    # A checkpoint left by the previous run would skip the input it has processed.
+    shutil.rmtree(checkpoint_home, ignore_errors=True)
+    checkpoint_home.mkdir(parents=True)
+    start_cpu = _children_cpu_secs()
+    start = time.perf_counter()
+    with open(output, "wb") as out:
+        subprocess.run(
+            [str(binary), str(input_path), str(checkpoint_home)],
+            stdout=out,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    return time.perf_counter() - start, _children_cpu_secs() - start_cpu
+
+
+def same_records(output: Path, other: Path) -> bool:
+    # The order of the metrics in a record may change from one build to another.
+    with open(output, "rb") as fout, open(other, "rb") as fother:
+        for line, other_line in zip_longest(fout, fother):
+            if line is None or other_line is None:
+                return False
+            if json.loads(line) != json.loads(other_line):
+                return False
+    return True
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python demos/bench_internal_queue.py",
+        description="Compare the internal event queue kinds on the demo binaries.",
+    )
+    parser.add_argument(
+        "demos", nargs="*", help=f"the demos, all of {', '.join(_DEMOS)} by default"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=300, help="the number of copies of the demo input"
+    )
+    parser.add_argument("--runs", type=int, default=3, help="the runs of each binary")
+    parser.add_argument(
+        "--resolution", default="1ms", help="the slot duration of the timer wheel"
+    )
+    parser.add_argument(
+        "--slots", type=int, default=1024, help="the number of slots of the timer wheel"
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=_REPO / "target" / "bench-internal-queue",
+        help="the directory of the binaries, inputs and outputs, it's cleared",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.runs < 1:
+        parser.error("--repeat and --runs must be positive")
+    for demo in args.demos:
+        if demo not in _DEMOS:
+            parser.error(f"Unknown demo: {demo}")
+
+    queue_configs = {
+        "heap": '"heap"',
+        "timer_wheel": (
+            f'"timer_wheel", resolution={args.resolution!r}, slots={args.slots}'
+        ),
+    }
+    shutil.rmtree(args.work_dir, ignore_errors=True)
+    args.work_dir.mkdir(parents=True)
+    print("demo           events     queue        seconds  cpu      events/s")
+    for demo in args.demos or list(_DEMOS):
+        source, session_keys = _DEMOS[demo]
+        input_path = args.work_dir / f"{demo}-input.jsonl"
+        num_events = replicate_input(
+            _REPO / source, session_keys, args.repeat, input_path
+        )
+        outputs = []
+        for kind, queue_config in queue_configs.items():
+            binary = args.work_dir / f"{demo}-{kind}"
+            build_demo(demo, queue_config, binary)
+            output = args.work_dir / f"{demo}-{kind}-output.jsonl"
+            checkpoint_home = args.work_dir / f"{demo}-{kind}-checkpoint"
+            runs = [
+                run_demo(binary, input_path, output, checkpoint_home)
+                for _ in range(args.runs)
+            ]
+            secs = min(elapsed for elapsed, _ in runs)
+            cpu_secs = min(cpu for _, cpu in runs)
+            outputs.append(output)
+            print(
+                f"{demo:<14} {num_events:<10} {kind:<12} {secs:<8.2f} "
+                f"{cpu_secs:<8.2f} {num_events / secs:.0f}",
+                flush=True,
+            )
+        if not same_records(*outputs):
+            print(
+                f"# the outputs of {demo} differ, see {args.work_dir}", file=sys.stderr
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ from lsdl.lsp_model import Integer, SessionizedInputSchemaBase, named
 
 class InputSignal(SessionizedInputSchemaBase):
     _timestamp_key = "timestamp"
+    _session_key = "session_id"
 
     session_id = named("sessionId")  # noqa: E221
     player_state = named("PlayerState")  # noqa: E221
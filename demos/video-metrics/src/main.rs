@@ -1,8 +1,4 @@
-use std::{
-    fs::File,
-    io::{BufReader, Write},
-    path::Path,
-};
+use std::path::PathBuf;
 
 use anyhow::Error;
 use lsp_runtime::instrument::NoInstrument;
@@ -11,23 +7,19 @@ lsp_codegen::include_lsp_ir!(lsp_main @ "src/metrics-def.json");
 
 fn main() -> Result<(), Error> {
     let path = std::env::args().nth(1).expect("Missing path argument");
-    let fp = BufReader::new(File::open(path)?);
-    let input_stream = serde_json::Deserializer::from_reader(fp)
-        .into_iter()
-        .filter_map(Result::ok);
     let mut instr_ctx = NoInstrument;
-    let mut output = std::io::BufWriter::new(std::io::stdout());
-    let checkpoint_home = Path::new("./demos/video-metrics");
-    lsp_main(
-        input_stream,
-        move |metric| {
-            output.write_all(serde_json::to_string(&metric)?.as_bytes())?;
-            output.write_all(b"\n")?;
-            Ok(())
-        },
+    let mut output = lsp_main_output(std::io::stdout());
+    // The checkpoint directory can be overridden, e.g., for each shard of a backfill.
+    let checkpoint_home = std::env::args()
+        .nth(2)
+        .map_or_else(|| PathBuf::from("./demos/video-metrics"), PathBuf::from);
+    lsp_main_from_file(
+        path,
+        |metric| Ok(output.write_record(metric)?),
         &mut instr_ctx,
-        checkpoint_home,
+        &checkpoint_home,
     )?;
+    output.finish()?;
     eprintln!("{}", instr_ctx);
     Ok(())
 }
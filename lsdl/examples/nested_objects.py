@@ -0,0 +1,23 @@
+from lsdl import print_ir_to_stdout
+from lsdl.lsp_model import InputSchemaBase, Integer, Object, Struct, named
+
+
+class Device(Struct):
+    os = named("osName")  # noqa: E221
+    build = Integer()  # noqa: E221
+
+
+class InputSignal(InputSchemaBase):
+    # The same `Struct` is mapped twice, each of its members is bound to both objects.
+    client = Object(Device)  # noqa: E221
+    server = named("serverDevice", Object(Device))  # noqa: E221
+
+
+input_signal = InputSignal()
+
+input_signal.client.os.add_metric("clientOs")
+input_signal.client.build.add_metric("clientBuild")
+input_signal.server.os.add_metric("serverOs")
+input_signal.server.build.add_metric("serverBuild")
+
+print_ir_to_stdout()
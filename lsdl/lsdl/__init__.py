@@ -1,8 +1,12 @@
-from . import lsp_model, measurements, processors
-from .config import measurement_config, processing_config
-from .ir import print_ir_to_stdout
+from typing import TYPE_CHECKING, Any
+
 from .rust_code import RustCode
 
+if TYPE_CHECKING:
+    from . import lsp_model, measurements, processors
+    from .config import measurement_config, processing_config
+    from .ir import print_ir_to_stdout
+
 __all__ = [
     "RustCode",
     "lsp_model",
@@ -12,3 +16,28 @@ __all__ = [
     "processing_config",
     "processors",
 ]
+
+# The submodules are only imported on the first access (PEP 562), a metrics definition usually
+# needs a few of them, and the build runs a fresh interpreter for every definition.
+_SUBMODULES = {"lsp_model", "measurements", "processors"}
+_ATTRIBUTES = {
+    "measurement_config": ".config",
+    "processing_config": ".config",
+    "print_ir_to_stdout": ".ir",
+}
+
+
+def __getattr__(name: str) -> Any:
+    import importlib
+
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,280 @@
+"""Backfill a large input with several instances of a data logic binary in parallel.
+
+Usage: `python -m lsdl.backfill [options] --binary <path> --key <input key> input.jsonl...`
+
+The input is split into shards by an entity key, e.g., the session ID, so all the events of an
+entity are processed by the same instance, in their original order. The result is only the
+same as processing the whole input at once if the metrics of an entity don't depend on the
+events of the other entities. The split is streamed, so the memory doesn't depend on the size of
+the input. Every shard is processed by an instance of the binary, which is called as
+`<binary> <shard input> <checkpoint home>` like the demos, and the outputs are merged by
+timestamp into one JSON lines output.
+
+The output records only carry a timestamp if the data logic outputs one as a metric, e.g.,
+`input_signal.peek_timestamp().add_metric("ts")`, which is named with `--timestamp-key`.
+Without it, the shard outputs are concatenated in the shard order.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional, final
+
+_BUFFER_BYTES = 1 << 20
+# The file marking a work directory created by the backfill, which can be cleared.
+_WORK_DIR_MARKER = ".lsdl-backfill"
+
+
+@final
+@dataclass
+class Shard:
+    index: int
+    directory: Path
+    num_events: int = 0
+    num_records: int = 0
+    elapsed_secs: float = 0.0
+    return_code: Optional[int] = None
+
+    @property
+    def input_path(self) -> Path:
+        return self.directory / "input.jsonl"
+
+    @property
+    def output_path(self) -> Path:
+        return self.directory / "output.jsonl"
+
+    @property
+    def log_path(self) -> Path:
+        return self.directory / "stderr.log"
+
+    @property
+    def checkpoint_home(self) -> Path:
+        return self.directory / "checkpoint"
+
+
+def _lookup(event: dict[str, Any], key_path: list[str]) -> Any:
+    value: Any = event
+    for k in key_path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(k)
+    return value
+
+
+def shard_of(key: Any, num_shards: int) -> int:
+    # A stable hash, unlike `hash()`, so a shard always gets the same entities.
+    return zlib.crc32(json.dumps(key).encode()) % num_shards
+
+
+def split_input(inputs: list[Path], key: str, shards: list[Shard]) -> tuple[int, int]:
+    """Split the input lines into the shard inputs.
+
+    Returns the number of lines without the key, which all go to the same shard, and the number
+    of malformed lines, which are skipped like the data logic binaries do.
+    """
+    key_path = key.split(".")
+    num_without_key = 0
+    num_malformed = 0
+    writers = [open(s.input_path, "wb", buffering=_BUFFER_BYTES) for s in shards]
+    try:
+        for input_path in inputs:
+            with open(input_path, "rb", buffering=_BUFFER_BYTES) as fin:
+                for line in fin:
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        num_malformed += 1
+                        continue
+                    entity = _lookup(event, key_path)
+                    if entity is None:
+                        num_without_key += 1
+                    shard = shards[shard_of(entity, len(shards))]
+                    shard.num_events += 1
+                    if not line.endswith(b"\n"):
+                        line += b"\n"
+                    writers[shard.index].write(line)
+    finally:
+        for w in writers:
+            w.close()
+    return num_without_key, num_malformed
+
+
+def prepare_work_dir(work_dir: Path) -> None:
+    """Create the work directory, or clear the one left by a previous backfill.
+
+    A non-empty directory without the marker wasn't created by the backfill, so it's kept.
+    """
+    if work_dir.exists():
+        if not work_dir.is_dir():
+            raise ValueError(f"{work_dir} isn't a directory")
+        if any(work_dir.iterdir()) and not (work_dir / _WORK_DIR_MARKER).is_file():
+            raise ValueError(
+                f"{work_dir} isn't empty and wasn't created by the backfill, "
+                "please choose another --work-dir"
+            )
+        shutil.rmtree(work_dir)
+    work_dir.mkdir(parents=True)
+    (work_dir / _WORK_DIR_MARKER).touch()
+
+
+def run_shard(binary: Path, shard: Shard) -> Shard:
+    shard.checkpoint_home.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(shard.output_path, "wb") as out, open(shard.log_path, "wb") as log:
+        shard.return_code = subprocess.run(
+            [str(binary), str(shard.input_path), str(shard.checkpoint_home)],
+            stdout=out,
+            stderr=log,
+        ).returncode
+    shard.elapsed_secs = time.perf_counter() - start
+    return shard
+
+
+def _records(
+    shard: Shard, timestamp_key: Optional[str]
+) -> Iterator[tuple[Any, bytes]]:
+    with open(shard.output_path, "rb", buffering=_BUFFER_BYTES) as fin:
+        for line in fin:
+            shard.num_records += 1
+            if timestamp_key is None:
+                yield None, line
+                continue
+            timestamp = json.loads(line).get(timestamp_key)
+            if timestamp is None:
+                raise ValueError(
+                    f"An output record of shard {shard.index} has no `{timestamp_key}`"
+                )
+            yield timestamp, line
+
+
+def merge_outputs(
+    shards: list[Shard], timestamp_key: Optional[str], out: IO[bytes]
+) -> None:
+    """Merge the shard outputs by the timestamp, each of them is in order already."""
+    streams = [_records(s, timestamp_key) for s in shards]
+    if timestamp_key is None:
+        merged: Iterator[tuple[Any, bytes]] = (r for s in streams for r in s)
+    else:
+        merged = heapq.merge(*streams, key=lambda r: r[0])
+    for _, line in merged:
+        out.write(line)
+
+
+def print_report(shards: list[Shard], out: IO[str]) -> None:
+    print("shard  events     records    seconds  events/s", file=out)
+    for s in shards:
+        rate = s.num_events / s.elapsed_secs if s.elapsed_secs else 0.0
+        print(
+            f"{s.index:<6} {s.num_events:<10} {s.num_records:<10} "
+            f"{s.elapsed_secs:<8.2f} {rate:.0f}",
+            file=out,
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m lsdl.backfill",
+        description="Split an input by entity and process the shards in parallel.",
+    )
+    parser.add_argument(
+        "inputs", type=Path, nargs="+", help="the JSON lines input files"
+    )
+    parser.add_argument(
+        "--binary", type=Path, required=True, help="the data logic binary, e.g., a demo"
+    )
+    parser.add_argument(
+        "--key",
+        required=True,
+        help="the input key of the entity, e.g., `sessionId`, `.` separates the levels",
+    )
+    parser.add_argument("--shards", type=int, default=4, help="the number of shards")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="the number of instances running at the same time, all shards by default",
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=Path("backfill"),
+        help="the directory of the shard inputs, outputs and checkpoints, "
+        "it's cleared if a previous backfill created it",
+    )
+    parser.add_argument(
+        "--timestamp-key",
+        help="the output metric holding the measurement time, to merge the outputs by",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="the merged output file, stdout by default"
+    )
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error("--shards must be positive")
+    # `Path("./bin")` is normalized to `bin`, which would be looked up in the `PATH`.
+    binary = args.binary.resolve()
+    if not binary.is_file() or not os.access(binary, os.X_OK):
+        parser.error(f"{args.binary} isn't an executable file")
+
+    try:
+        prepare_work_dir(args.work_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    shards = [
+        Shard(index=i, directory=args.work_dir / f"shard-{i:03}")
+        for i in range(args.shards)
+    ]
+    for s in shards:
+        s.directory.mkdir(parents=True)
+
+    start = time.perf_counter()
+    num_without_key, num_malformed = split_input(args.inputs, args.key, shards)
+    num_events = sum(s.num_events for s in shards)
+    print(
+        f"# split {num_events} events into {len(shards)} shards in "
+        f"{time.perf_counter() - start:.2f}s, "
+        f"{num_without_key} events without `{args.key}`, "
+        f"{num_malformed} malformed lines skipped",
+        file=sys.stderr,
+    )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs or len(shards)) as executor:
+        list(executor.map(lambda s: run_shard(binary, s), shards))
+    run_secs = time.perf_counter() - start
+    failed = [s for s in shards if s.return_code != 0]
+    for s in failed:
+        print(
+            f"# shard {s.index} failed with {s.return_code}, see {s.log_path}",
+            file=sys.stderr,
+        )
+    if failed:
+        return 1
+
+    if args.output is None:
+        merge_outputs(shards, args.timestamp_key, sys.stdout.buffer)
+        sys.stdout.flush()
+    else:
+        with open(args.output, "wb", buffering=_BUFFER_BYTES) as out:
+            merge_outputs(shards, args.timestamp_key, out)
+    print_report(shards, sys.stderr)
+    print(
+        f"# processed {num_events} events in {run_secs:.2f}s, "
+        f"{num_events / run_secs if run_secs else 0:.0f} events/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
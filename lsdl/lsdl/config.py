@@ -1,30 +1,190 @@
-import logging
 import re
 from dataclasses import dataclass
-from typing import Any, Callable, Optional, Self, final
+from functools import cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, Self, final
 
 from .lsp_model.component_base import LspComponentBase
 from .lsp_model.core import MeasurementBase, SignalBase
+from .lsp_model.internal import normalize_duration
 from .rust_code import COMPILER_INFERABLE_TYPE, RUST_DEFAULT_VALUE, RustCode
 
-logging.basicConfig(encoding="utf-8", level=logging.INFO)
+if TYPE_CHECKING:
+    from logging import Logger
+
+
+@cache
+def _logger() -> "Logger":
+    # `logging` is only imported and configured once there is something to report, it's a
+    # noticeable part of the import time otherwise.
+    import logging
+
+    logging.basicConfig(encoding="utf-8", level=logging.INFO)
+    return logging.getLogger()
 
 
 @final
 class _ProcessingConfiguration:
     """The configuration for processing policy."""
 
+    _CHECKPOINT_ENCODINGS = ("json", "compact")
+    _CHECKPOINT_COMPRESSIONS = ("none", "zstd")
+
     def __init__(self):
         self._merge_simultaneous_moments = True
+        self._checkpoint_format: Optional[dict[str, Any]] = None
+        self._checkpoint_policy: Optional[dict[str, Any]] = None
+        self._max_lookahead: Optional[dict[str, Any]] = None
+        self._input_decoding: Optional[dict[str, Any]] = None
+        self._reorder_tolerance: Optional[dict[str, Any]] = None
+        self._internal_queue: Optional[dict[str, Any]] = None
 
     def set_merge_simultaneous_moments(self, should_merge: bool) -> Self:
         """Set the rule for handling simultaneous moments."""
         self._merge_simultaneous_moments = should_merge
         return self
 
+    def set_checkpoint_format(
+        self, encoding: str = "json", compression: str = "none", delta: bool = False
+    ) -> Self:
+        """Set how the checkpoints are written.
+
+        The "json" encoding stores every state as a JSON string inside a JSON document, while the
+        "compact" one embeds the states as they are, so nothing is encoded twice. With `delta`, a
+        compact checkpoint only writes the node states changed since the previous checkpoint.
+        """
+        if encoding not in self._CHECKPOINT_ENCODINGS:
+            raise ValueError(f"Unknown checkpoint encoding: {encoding}")
+        if compression not in self._CHECKPOINT_COMPRESSIONS:
+            raise ValueError(f"Unknown checkpoint compression: {compression}")
+        if delta and encoding != "compact":
+            raise ValueError("Delta checkpoints require the compact encoding.")
+        self._checkpoint_format = {
+            "encoding": encoding,
+            "compression": compression,
+            "delta": delta,
+        }
+        return self
+
+    def set_checkpoint_policy(
+        self,
+        every_events: Optional[int] = 200,
+        every_event_time: Optional[int | str] = None,
+        on_exit: bool = False,
+    ) -> Self:
+        """Set when the checkpoints are written.
+
+        A checkpoint is written every `every_events` input events, and every `every_event_time` of
+        event time, for example "10m". Either of them can be `None` to disable it. With `on_exit`,
+        a checkpoint is also written when the input is exhausted.
+        """
+        if every_events is not None and every_events <= 0:
+            raise ValueError("The checkpoint event interval must be positive.")
+        if every_event_time is not None:
+            every_event_time = normalize_duration(every_event_time)
+            if every_event_time <= 0:
+                raise ValueError("The checkpoint event time interval must be positive.")
+        self._checkpoint_policy = {
+            "every_events": every_events,
+            "every_event_time": every_event_time,
+            "on_exit": on_exit,
+        }
+        return self
+
+    def set_max_lookahead(
+        self, events: Optional[int] = None, duration: Optional[int | str] = None
+    ) -> Self:
+        """Bound how far the components, e.g., `LivenessChecker`, can look ahead in the input.
+
+        The lookahead buffers the upcoming events in memory, `events` caps the number of them, and
+        `duration` caps the event time beyond the current moment, for example "30m". A lookahead
+        stopped by these limits behaves as if the input ends there.
+        """
+        if events is not None and events <= 0:
+            raise ValueError("The maximum lookahead events must be positive.")
+        if duration is not None:
+            duration = normalize_duration(duration)
+            if duration < 0:
+                raise ValueError("The maximum lookahead duration can't be negative.")
+        self._max_lookahead = {"events": events, "duration": duration}
+        return self
+
+    def set_input_decoding(
+        self, threads: int = 0, batch_lines: int = 1024, queue_batches: int = 16
+    ) -> Self:
+        """Configure how the generated `<main>_from_reader` driver decodes the input JSON lines.
+
+        With `threads` > 0, a reader thread splits the input into batches of `batch_lines` lines,
+        the decoder threads parse the batches, and at most `queue_batches` batches wait between
+        the stages. Otherwise, the lines are decoded on the data logic thread.
+        """
+        if threads < 0 or batch_lines <= 0 or queue_batches <= 0:
+            raise ValueError("Invalid input decoding configuration.")
+        self._input_decoding = {
+            "threads": threads,
+            "batch_lines": batch_lines,
+            "queue_batches": queue_batches,
+        }
+        return self
+
+    def set_reorder_tolerance(
+        self, tolerance: int | str, max_buffered_events: int = 1_000_000
+    ) -> Self:
+        """Accept input events out of timestamp order by up to `tolerance`, for example "5s".
+
+        The events are held in a buffer and released in timestamp order once the latest timestamp
+        seen is `tolerance` past them. An event arriving even later is dropped and counted. At most
+        `max_buffered_events` events are held, the earliest one is released when it's full.
+        """
+        tolerance = normalize_duration(tolerance)
+        if tolerance < 0:
+            raise ValueError("The reorder tolerance can't be negative.")
+        if max_buffered_events <= 0:
+            raise ValueError("The reorder buffer must hold at least one event.")
+        self._reorder_tolerance = {
+            "tolerance": tolerance,
+            "max_buffered_events": max_buffered_events,
+        }
+        return self
+
+    def set_internal_queue(
+        self, kind: str = "heap", resolution: int | str = "1ms", slots: int = 1024
+    ) -> Self:
+        """Select the data structure of the internal event queue.
+
+        The "heap" queue merges the events at the same time when they are due. The "timer_wheel"
+        queue merges them when they are scheduled, and buckets the events in the next
+        `resolution` * `slots` of time into slots, which suits the periodic generators, the
+        sliding time windows and the latches with a `forget_duration`.
+        """
+        if kind == "heap":
+            self._internal_queue = {"kind": kind}
+            return self
+        if kind != "timer_wheel":
+            raise ValueError(f"Unknown internal queue kind: {kind}")
+        resolution = normalize_duration(resolution)
+        if resolution <= 0 or slots <= 0:
+            raise ValueError("Invalid timer wheel configuration.")
+        self._internal_queue = {"kind": kind, "resolution": resolution, "slots": slots}
+        return self
+
     def to_dict(self) -> dict[str, Any]:
         """Dump the processing policy into a dictionary."""
-        return {"merge_simultaneous_moments": self._merge_simultaneous_moments}
+        ret: dict[str, Any] = {
+            "merge_simultaneous_moments": self._merge_simultaneous_moments
+        }
+        if self._checkpoint_format is not None:
+            ret["checkpoint_format"] = self._checkpoint_format
+        if self._checkpoint_policy is not None:
+            ret["checkpoint_policy"] = self._checkpoint_policy
+        if self._max_lookahead is not None:
+            ret["max_lookahead"] = self._max_lookahead
+        if self._input_decoding is not None:
+            ret["input_decoding"] = self._input_decoding
+        if self._reorder_tolerance is not None:
+            ret["reorder_tolerance"] = self._reorder_tolerance
+        if self._internal_queue is not None:
+            ret["internal_queue"] = self._internal_queue
+        return ret
 
 
 def _make_processing_configuration():
@@ -63,6 +223,7 @@ class _MeasurementConfiguration:
         self._complementary_output_schema = {}
         # (metric name, initial value)
         self._complementary_output_reset_switch: Optional[ResetSwitch] = None
+        self._output_batching: Optional[dict[str, Any]] = None
 
     def set_measure_at_measurement_true(
         self, *lsp_components: LspComponentBase
@@ -125,6 +286,24 @@ class _MeasurementConfiguration:
         self._metrics_drain = fmt
         return self
 
+    def set_output_batching(
+        self, buffer_bytes: int = 64 * 1024, writer_thread: bool = False, queue_buffers: int = 4
+    ) -> Self:
+        """Configure how the generated `<main>_output` writer batches the output records.
+
+        The records are serialized into a buffer, which is written once it reaches `buffer_bytes`.
+        With `writer_thread`, the full buffers are written on a dedicated thread, and at most
+        `queue_buffers` of them wait for it. The defaults are the same as without calling this.
+        """
+        if buffer_bytes <= 0 or queue_buffers <= 0:
+            raise ValueError("Invalid output batching configuration.")
+        self._output_batching = {
+            "buffer_bytes": buffer_bytes,
+            "writer_thread": writer_thread,
+            "queue_buffers": queue_buffers,
+        }
+        return self
+
     def add_metric(
         self,
         key: str,
@@ -137,8 +316,8 @@ class _MeasurementConfiguration:
         if typename == COMPILER_INFERABLE_TYPE:  # if this type is unknown and inferable
             typename = measurement.get_rust_type_name()
         if typename == COMPILER_INFERABLE_TYPE:  # if this type can't be inferred
-            logging.error("Please provide the type name for this metric.")
-            logging.info(
+            _logger().error("Please provide the type name for this metric.")
+            _logger().info(
                 "Consider call `.annotate_type(<type-name>)` to manually annotate signal's type."
             )
             raise Exception(f"Missing type name for the metric {key}.")
@@ -186,6 +365,9 @@ class _MeasurementConfiguration:
         if self._output_control_measurement_ids:
             ret["output_control_measurement_ids"] = self._output_control_measurement_ids
 
+        if self._output_batching is not None:
+            ret["output_batching"] = self._output_batching
+
         if self._measure_on_edge is not None:
             ret["measure_trigger_signal"] = self._measure_on_edge.get_description()
 
@@ -215,7 +397,7 @@ class _MeasurementConfiguration:
                     "but `self._complementary_output_reset_switch` is set.",
                 ]
             )
-            logging.warning(message)
+            _logger().warning(message)
         return ret
 
 
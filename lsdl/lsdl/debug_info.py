@@ -1,28 +1,26 @@
-from inspect import getframeinfo, stack
+import sys
 from pathlib import Path
-from typing import Any, final
+from types import FrameType
+from typing import Any, Optional, final
+
+_PACKAGE_ROOT = next(p for p in Path(__file__).parents if p.name == __package__)
 
 
 @final
 class DebugInfo:
     def __init__(self):
-        package_root = Path(__file__)
-        while package_root.name != __package__:
-            package_root = package_root.parent
-        stack_info = stack()
         self._file = "<unknown>"
         self._line = -1
-        for f in stack_info:
-            traceback = getframeinfo(f.frame)
-            file_path = Path(traceback.filename)
-            is_in_package = False
-            while not is_in_package and file_path.parent != file_path:
-                is_in_package = file_path.parent == package_root
-                file_path = file_path.parent
-            if not is_in_package:
-                self._file = traceback.filename
-                self._line = traceback.lineno
+        # Walk the frames directly, `inspect.stack()` reads the source context of every frame,
+        # which is slow, and a debug info is created for every component.
+        frame: Optional[FrameType] = sys._getframe(1)
+        while frame is not None:
+            file_name = frame.f_code.co_filename
+            if _PACKAGE_ROOT not in Path(file_name).parents:
+                self._file = file_name
+                self._line = frame.f_lineno
                 break
+            frame = frame.f_back
 
     def to_dict(self) -> dict[str, Any]:
         return {
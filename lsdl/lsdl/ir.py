@@ -1,8 +1,124 @@
 import json
+import re
+from typing import Any, Iterable, Optional
 
 from .config import measurement_config, processing_config
 
 
+def _referenced_input_signals(ir_obj: Any) -> set[str]:
+    """Collect the ids of the input signals referenced anywhere in an IR object."""
+    match ir_obj:
+        case {"type": "InputSignal", "id": str(signal_id)}:
+            return {signal_id}
+        case dict():
+            return set().union(*map(_referenced_input_signals, ir_obj.values()))
+        case list():
+            return set().union(*map(_referenced_input_signals, ir_obj))
+        case _:
+            return set()
+
+
+def _mark_unused_input_members(schema: dict, nodes: list, measurement_policy: dict) -> None:
+    """Mark the schema members that nothing reads, so that the generated code skips their keys.
+
+    A member is used if a node or a metric refers to the member or its clock companion, if the
+    event measurement filter, which is Rust source code, may read it, or if the input signal bag
+    keeps a sessionized copy of it.
+    """
+    referenced = _referenced_input_signals(nodes) | _referenced_input_signals(
+        measurement_policy
+    )
+    if (sessionization := schema.get("sessionization")) is not None:
+        referenced.add(sessionization["session_key"])
+        referenced.update(f["source"] for f in sessionization["fields"].values())
+    event_filter = measurement_policy["measure_at_event_filter"]
+    for name, member in schema["members"].items():
+        if (
+            name not in referenced
+            and member["clock_companion"] not in referenced
+            and not re.search(rf"\b{name}\b", event_filter)
+        ):
+            member["unused"] = True
+
+
+# The runtime tracks the changed update groups in a 64-bit set, and the group 0 is always updated.
+_MAX_UPDATE_GROUP_ID = 63
+
+
+def _assign_update_groups(schema: dict, nodes: list, components: list) -> list[dict]:
+    """Partition the nodes into update groups by the input members they transitively depend on.
+
+    The group 0 holds the nodes which must be updated at every moment: the measurements, the time
+    dependent nodes and everything downstream of them. Any other group holds the nodes depending
+    on the same set of input members, so they are skipped at a moment none of these inputs changes.
+    """
+    clock_owners = {m["clock_companion"]: name for name, m in schema["members"].items()}
+    # A sessionized input changes with its source, or when the session key resets it.
+    sessionized: dict[str, frozenset[str]] = {}
+    if (sessionization := schema.get("sessionization")) is not None:
+        for name, field in sessionization["fields"].items():
+            field_deps = frozenset([field["source"], sessionization["session_key"]])
+            sessionized[name] = sessionized[field["clock_companion"]] = field_deps
+    # `None` means the node depends on time, and it's in the group 0.
+    dependencies: dict[int, Optional[frozenset[str]]] = {}
+
+    def input_dependencies(upstream: dict) -> Optional[frozenset[str]]:
+        match upstream:
+            case {"type": "InputSignal", "id": signal_id} if signal_id in schema["members"]:
+                return frozenset([signal_id])
+            case {"type": "InputSignal", "id": signal_id} if signal_id in clock_owners:
+                return frozenset([clock_owners[signal_id]])
+            case {"type": "InputSignal", "id": signal_id} if signal_id in sessionized:
+                return sessionized[signal_id]
+            case {"type": "Component", "id": node_id}:
+                return dependencies[node_id]
+            case {"type": "Constant"}:
+                return frozenset()
+            case {"type": "Tuple", "values": values}:
+                return _union_dependencies(map(input_dependencies, values))
+            case _:
+                # The input bag itself (its clock ticks at every input event), or anything unknown.
+                return None
+
+    for node, component in zip(nodes, components):
+        if node["is_measurement"] or component.is_time_dependent:
+            dependencies[node["id"]] = None
+        else:
+            deps = _union_dependencies(map(input_dependencies, node["upstreams"]))
+            # A node without any input dependency is updated at every moment like a time dependent
+            # one, otherwise it would never be updated after the first moment.
+            dependencies[node["id"]] = deps or None
+
+    group_ids: dict[frozenset[str], int] = {}
+    for deps in sorted(
+        {d for d in dependencies.values() if d is not None}, key=lambda d: sorted(d)
+    ):
+        # Excessive groups share the last id, they are updated when any of their inputs changes.
+        group_ids[deps] = min(len(group_ids) + 1, _MAX_UPDATE_GROUP_ID)
+    group_members: dict[int, set[str]] = {}
+    for deps, group_id in group_ids.items():
+        group_members.setdefault(group_id, set()).update(deps)
+    for node in nodes:
+        deps = dependencies[node["id"]]
+        if deps is not None:
+            node["update_group"] = group_ids[deps]
+    return [
+        {"id": group_id, "input_members": sorted(members)}
+        for group_id, members in group_members.items()
+    ]
+
+
+def _union_dependencies(
+    all_deps: Iterable[Optional[frozenset[str]]],
+) -> Optional[frozenset[str]]:
+    ret: frozenset[str] = frozenset()
+    for deps in all_deps:
+        if deps is None:
+            return None
+        ret |= deps
+    return ret
+
+
 def _get_json_ir(pretty_print=False) -> str:
     from .lsp_model.component_base import get_components
     from .lsp_model.schema import get_schema
@@ -13,6 +129,12 @@ def _get_json_ir(pretty_print=False) -> str:
         "measurement_policy": measurement_config().to_dict(),
         "processing_policy": processing_config().to_dict(),
     }
+    _mark_unused_input_members(
+        ret_obj["schema"], ret_obj["nodes"], ret_obj["measurement_policy"]
+    )
+    ret_obj["update_groups"] = _assign_update_groups(
+        ret_obj["schema"], ret_obj["nodes"], get_components()
+    )
     return json.dumps(ret_obj, indent=4 if pretty_print else None)
 
 
@@ -6,9 +6,12 @@ from .schema import (
     Float,
     InputSchemaBase,
     Integer,
+    Interned,
     LspEnumBase,
+    Object,
     SessionizedInputSchemaBase,
     String,
+    Struct,
     Vector,
     named,
     volatile,
@@ -21,12 +24,15 @@ __all__ = [
     "Float",
     "InputSchemaBase",
     "Integer",
+    "Interned",
     "LeveledSignalProcessingModelComponentBase",
     "LspEnumBase",
     "MeasurementBase",
+    "Object",
     "SessionizedInputSchemaBase",
     "SignalBase",
     "String",
+    "Struct",
     "Vector",
     "named",
     "volatile",
@@ -22,6 +22,11 @@ _components = []
 
 
 class LspComponentBase(LeveledSignalProcessingModelComponentBase, ABC):
+    # Whether the node reads the time or schedules internal events. A node that doesn't is a pure
+    # function of its inputs (or of the changes of its inputs), therefore it's safe to skip its
+    # update when none of its inputs changes.
+    is_time_dependent: bool = True
+
     def __init__(
         self, package: str, namespace: RustCode, node_decl: RustCode, upstreams: list
     ):
@@ -1,10 +1,17 @@
-import configparser
 import os
+import re
 from abc import ABC
+from functools import cache
 from typing import Any, Optional, Self, final, no_type_check
 
 from ..debug_info import DebugInfo
-from ..rust_code import COMPILER_INFERABLE_TYPE, RUST_DEFAULT_VALUE, RustCode, RustPrimitiveType
+from ..rust_code import (
+    COMPILER_INFERABLE_TYPE,
+    INTERNED_STRING,
+    RUST_DEFAULT_VALUE,
+    RustCode,
+    RustPrimitiveType,
+)
 
 
 class LeveledSignalProcessingModelComponentCore(ABC):
@@ -62,15 +69,31 @@ class LeveledSignalProcessingModelComponentBase(
         raise NotImplementedError()
 
 
-__config = configparser.ConfigParser()
-__current_file_path = os.path.dirname(os.path.abspath(__file__))
-__config.read(f"{__current_file_path}/rust_keywords.ini")
-__strict_and_reserved_rust_keywords = {
-    *__config["strict"].values(),
-    *__config["reserved"].values(),
+_SIMPLE_RUST_IDENTIFIER = re.compile("^[A-Za-z_][A-Za-z0-9_]*$")
+_CHEAP_TO_COMPARE_TYPES = {
+    *(t.value for t in RustPrimitiveType if t != RustPrimitiveType.STRING),
+    INTERNED_STRING,
 }
 
 
+@cache
+def _strict_and_reserved_rust_keywords() -> frozenset[str]:
+    # Only parsed once the first metric is declared.
+    import configparser
+
+    config = configparser.ConfigParser()
+    config.read(os.path.join(os.path.dirname(__file__), "rust_keywords.ini"))
+    return frozenset((*config["strict"].values(), *config["reserved"].values()))
+
+
+@cache
+def _is_simple_rust_identifier(identifier: str) -> bool:
+    return (
+        _SIMPLE_RUST_IDENTIFIER.match(identifier) is not None
+        and identifier not in _strict_and_reserved_rust_keywords()
+    )
+
+
 def _validate_rust_identifier(identifier: str) -> None:
     """Check if an identifier is a restricted legal Rust identifier.
 
@@ -81,18 +104,13 @@ def _validate_rust_identifier(identifier: str) -> None:
     We don't need to support all possible legal Rust identifiers. These identifiers are
     used as metric names, and C-style identifiers are enough for this use.
     """
-    import re
-
-    regex = "^[A-Za-z_][A-Za-z0-9_]*$"
-    if (
-        not re.match(regex, identifier)
-        or identifier in __strict_and_reserved_rust_keywords
-    ):
+    if not _is_simple_rust_identifier(identifier):
         raise Exception(f"{identifier} is not a simple and legal Rust identifier!")
 
 
 class SignalBase(LeveledSignalProcessingModelComponentBase, ABC):
     __CMP_OP = ["==", "<", ">", "<=", ">="]
+    _scope_epoch: Optional["SignalBase"] = None
 
     @final
     def map(self, bind_var: str, lambda_src: str) -> "SignalBase":
@@ -143,6 +161,27 @@ class SignalBase(LeveledSignalProcessingModelComponentBase, ABC):
 
         return Accumulator(self, Const(1))
 
+    @final
+    def scope_epoch(self) -> "SignalBase":
+        """Creates a signal that counts the level changes of current signal, to key scopes by.
+
+        All the scoped measurements and state machines of a scope signal share its epoch signal,
+        so a scope change is detected once, and they only compare integers instead of the scope
+        levels. An integer-like signal is its own epoch, as it's as cheap to compare already.
+        """
+        from ..processors import Accumulator, Const
+        from .schema import Integer
+
+        if self.get_rust_type_name() in _CHEAP_TO_COMPARE_TYPES:
+            return self
+        if self._scope_epoch is None:
+            self._scope_epoch = Accumulator(
+                self,
+                Const(1, val_type=Integer(signed=False, width=64)),
+                type_name=RustPrimitiveType.U64.value,
+            )
+        return self._scope_epoch
+
     @final
     def has_been_true(self, duration=-1) -> "SignalBase":
         """Checks if the boolean signal has ever becomes true.
@@ -205,7 +244,7 @@ class SignalBase(LeveledSignalProcessingModelComponentBase, ABC):
     def prior_value(
         self, clock: Optional["SignalBase"] = None, scope: Optional["SignalBase"] = None
     ) -> "SignalBase":
-        from ..processors import StateMachineBuilder
+        from ..processors import PriorValue
         from .schema import MappedInputMember
 
         if clock is None:
@@ -218,18 +257,7 @@ class SignalBase(LeveledSignalProcessingModelComponentBase, ABC):
                        2. or make sure the `self` is a `MappedInputMember` instance,
                           which has the `clock()` method"""
                 )
-        ty = self.get_rust_type_name()
-        builder = StateMachineBuilder(data=self, clock=clock).transition_fn(
-            f"|(_, current): &({ty}, {ty}), data : &{ty}| (current.clone(), data.clone())"
-        )
-        if scope is not None:
-            builder.scoped(scope)
-        return (
-            builder.build()
-            .annotate_type(f"({ty}, {ty})")
-            .map(bind_var="(ret, _)", lambda_src="ret.clone()")
-            .annotate_type(self.get_rust_type_name())
-        )
+        return PriorValue(data=self, clock=clock, scope=scope)
 
     @final
     def _bin_op(self, other, op, typename=None) -> "SignalBase":
@@ -249,9 +277,15 @@ class SignalBase(LeveledSignalProcessingModelComponentBase, ABC):
             bind_var_in_use = (
                 f"{bind_var}.as_str()" if is_cmp_string else f"*{bind_var}"
             )
+            if self.get_rust_type_name() == INTERNED_STRING and isinstance(other, str):
+                from .schema import Interned
+
+                const = Const(other, val_type=Interned())
+            else:
+                const = Const(other, need_owned=False)
             ret = SignalMapper(
                 bind_var,
-                lambda_src=f"{bind_var_in_use} {op} {Const(other, need_owned=False).rust_constant_value}",
+                lambda_src=f"{bind_var_in_use} {op} {const.rust_constant_value}",
                 upstream=self,
             )
         if typename is not None:
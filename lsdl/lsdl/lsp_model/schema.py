@@ -1,10 +1,11 @@
+import copy
 import json
 import re
 from abc import ABC, abstractmethod
 from enum import StrEnum
 from typing import Optional, Type, final, override
 
-from ..rust_code import INPUT_SIGNAL_BAG, RUST_DEFAULT_VALUE, RustCode
+from ..rust_code import INPUT_SIGNAL_BAG, INTERNED_STRING, RUST_DEFAULT_VALUE, RustCode
 from .core import SignalBase
 
 
@@ -54,6 +55,26 @@ class String(TypeWithLiteralValue):
         return f"{s}.to_string()" if need_owned else s
 
 
+@final
+class Interned(TypeWithLiteralValue):
+    """A dictionary encoded string.
+
+    The input string is mapped to a small integer id when the event is patched into the input
+    signal bag, with an open-ended dictionary. Comparisons, latches and mappers downstream then
+    work on integers, and the string is only looked up when the value is output as a metric.
+    Use it for low-cardinality string inputs, e.g. event names, platforms.
+    """
+
+    def __init__(self, inner: Optional[SignalDataTypeBase] = None):
+        if inner is not None and not isinstance(inner, String):
+            raise TypeError("Only `String` can be interned")
+        super().__init__(INTERNED_STRING)
+
+    @override
+    def render_rust_const(self, val, _need_owned: bool = True) -> RustCode:
+        return f"lsp_runtime::symbol!({json.dumps(val)})"
+
+
 @final
 class Bool(TypeWithLiteralValue):
     def __init__(self):
@@ -144,7 +165,6 @@ class Vector(TypeWithLiteralValue):
 class _InputMember(SignalBase, ABC):
     def __init__(self, tpe: SignalDataTypeBase, name=""):
         super().__init__(tpe.get_rust_type_name())
-        tpe._schema_entry = self
         self._signal_data_type = tpe
         self._name = name
         self._reset_expr: Optional[RustCode] = None
@@ -183,8 +203,11 @@ class MappedInputMember(_InputMember):
         volatile_default_value: Optional[RustCode] = None,
     ):
         super().__init__(tpe)
+        tpe._schema_entry = self
         self._input_key = input_key
         self._reset_expr = volatile_default_value or self.signal_data_type.reset_expr
+        # The keys from the root of an input event, which is completed when binding it to a schema.
+        self.input_path: list[str] = [input_key]
 
     @property
     def reset_expr(self):
@@ -193,13 +216,61 @@ class MappedInputMember(_InputMember):
     def get_input_key(self) -> str:
         return self._input_key
 
+    def _bound_copy(self) -> "MappedInputMember":
+        """A copy of the member, with its own data type, to be bound to a place in a schema.
+
+        The members of a `Struct` are class attributes, so a `Struct` mapped more than once has
+        each of its members bound to several places.
+        """
+        ret = copy.copy(self)
+        ret._signal_data_type = copy.copy(self._signal_data_type)
+        ret._signal_data_type._schema_entry = ret
+        return ret
+
     def clock(self) -> _ClockCompanion:
         # This `self.name` will be given when initializing the `InputSchemaBase` through reflection.
         return _ClockCompanion(f"{self.name}_clock")
 
 
+@final
+class _SessionizedMember(_InputMember):
+    """A copy of an input member kept by the input signal bag, which is reset with the session."""
+
+    def __init__(self, source: MappedInputMember, default_expr: RustCode):
+        super().__init__(
+            source.signal_data_type,
+            f"{SessionizedInputSchemaBase.SESSIONIZED_PREFIX}{source.name}",
+        )
+        self.source = source
+        self.default_expr = default_expr
+
+    def clock(self) -> _ClockCompanion:
+        return _ClockCompanion(f"{self.name}_clock")
+
+
+class Struct:
+    """The base class of a nested object of the input events.
+
+    Its members are declared in the same way as the ones of an `InputSchemaBase`, and it's used as
+    a member of an input schema (or another `Struct`) via `Object`. The nested members are
+    extracted straight from the input events, and they are accessible as attributes of the
+    `Struct` member, e.g., `input_signal.device.os`.
+    """
+
+
+@final
+class Object:
+    def __init__(self, struct_type: Type[Struct], input_key: Optional[str] = None):
+        if not issubclass(struct_type, Struct):
+            raise TypeError("Only a `Struct` can be mapped as an input object")
+        self.struct_type = struct_type
+        self.input_key = input_key
+
+
 _defined_schema: Optional["InputSchemaBase"] = None
 
+_NAMED_TIMESTAMP_FORMATS = ("epoch_s", "epoch_ms", "epoch_us", "epoch_ns", "rfc3339")
+
 
 class InputSchemaBase(SignalBase):
     def __init__(self, type_name: RustCode = INPUT_SIGNAL_BAG):
@@ -210,20 +281,50 @@ class InputSchemaBase(SignalBase):
         # to the codegen result struct of this class, and the generated struct name should
         # be the value of `self.type_name`.
         super().__init__("u64")
-        self._member_names = []
+        self._members: dict[str, MappedInputMember] = {}
         if "_timestamp_key" not in self.__dir__():
             self._timestamp_key = "timestamp"
-        for item_name in self.__dir__():
-            item = self.__getattribute__(item_name)
+        # `None` accepts any string chrono can parse as a `DateTime<Utc>`, but an explicit format
+        # lets the generated code use a cheaper decoder, e.g., no string parsing for "epoch_ms".
+        if "_timestamp_format" not in self.__dir__():
+            self._timestamp_format = None
+        if not (
+            self._timestamp_format is None
+            or self._timestamp_format in _NAMED_TIMESTAMP_FORMATS
+            or "%" in self._timestamp_format
+        ):
+            raise ValueError(
+                f"Unsupported timestamp format {self._timestamp_format!r}, expecting one of "
+                f"{', '.join(_NAMED_TIMESTAMP_FORMATS)} or a strftime format"
+            )
+        self._bind_members(self, name_prefix="", path_prefix=[])
+        _defined_schema = self
+
+    def _bind_members(self, container, name_prefix: str, path_prefix: list[str]) -> None:
+        for item_name in container.__dir__():
+            item = container.__getattribute__(item_name)
             # There won't be members as `ClockCompanion`s in the source code of
             # an `InputSchemaBase` instance, therefore we don't try to handle it here.
             if isinstance(item, SignalDataTypeBase):
-                item = MappedInputMember(input_key=item_name, tpe=item)
+                item = MappedInputMember(input_key=item_name, tpe=copy.copy(item))
+            elif isinstance(item, MappedInputMember):
+                item = item._bound_copy()
             if isinstance(item, MappedInputMember):
-                item.name = item_name
-                self.__setattr__(item_name, item)
-                self._member_names.append(item_name)
-        _defined_schema = self
+                # Nested members are flattened in the generated input signal bag.
+                item.name = f"{name_prefix}{item_name}"
+                item.input_path = path_prefix + [item.get_input_key()]
+                if item.name in self._members:
+                    raise ValueError(f"Duplicated input member name {item.name}")
+                container.__setattr__(item_name, item)
+                self._members[item.name] = item
+            elif isinstance(item, Object):
+                struct = item.struct_type()
+                container.__setattr__(item_name, struct)
+                self._bind_members(
+                    struct,
+                    name_prefix=f"{name_prefix}{item_name}_",
+                    path_prefix=path_prefix + [item.input_key or item_name],
+                )
 
     def to_dict(self) -> dict:
         ret: dict = {
@@ -231,14 +332,17 @@ class InputSchemaBase(SignalBase):
             "patch_timestamp_key": self._timestamp_key,
             "members": {},
         }
-        for name in self._member_names:
-            member: MappedInputMember = getattr(self, name)
+        if self._timestamp_format is not None:
+            ret["patch_timestamp_format"] = self._timestamp_format
+        for name, member in self._members.items():
             ret["members"][name] = {
                 "type": member.get_rust_type_name(),
                 "clock_companion": member.clock().name,
-                "input_key": member.get_input_key(),
+                "input_key": ".".join(member.input_path),
                 "debug_info": member.debug_info,
             }
+            if len(member.input_path) > 1:
+                ret["members"][name]["input_path"] = member.input_path
             if isinstance(enum := member.signal_data_type, CStyleEnum):
                 ret["members"][name][
                     "enum_variants"
@@ -257,9 +361,18 @@ class InputSchemaBase(SignalBase):
 
 @final
 class _ScopeContext:
-    def __init__(self, scope_level: SignalBase, epoch: SignalBase):
+    def __init__(
+        self,
+        scope_level: SignalBase,
+        epoch: SignalBase,
+        liveness: Optional[tuple[SignalBase, SignalBase]] = None,
+    ):
+        """`liveness` is an optional pair of a signal telling whether the scope is active, and a
+        clock ticking at every event, which reactivates the scope."""
         self._scope = scope_level
         self._epoch = epoch
+        self._liveness = liveness
+        self._activation_starts: Optional[SignalBase] = None
 
     def scoped(
         self, data: SignalBase, clock: SignalBase, default: RustCode
@@ -268,10 +381,36 @@ class _ScopeContext:
 
         scope_starts = EdgeTriggeredLatch(control=self._scope, data=self._epoch)
         event_starts = EdgeTriggeredLatch(control=clock, data=self._epoch)
+        if self._liveness is None:
+            return SignalMapper(
+                bind_var="(sep, eep, signal)",
+                lambda_src=f"if *sep <= *eep {{ signal.clone() }} else {{ {default} }}",
+                upstream=[scope_starts, event_starts, data],
+            ).annotate_type(data.get_rust_type_name())
+        # After the scope is reactivated, only the data coming since then is in scope.
+        is_active, event_clock = self._liveness
+        if self._activation_starts is None:
+            self._activation_starts = EdgeTriggeredLatch(
+                control=is_active, data=event_clock
+            )
+        data_starts = EdgeTriggeredLatch(control=clock, data=event_clock)
         return SignalMapper(
-            bind_var="(sep, eep, signal)",
-            lambda_src=f"if *sep <= *eep {{ signal.clone() }} else {{ {default} }}",
-            upstream=[scope_starts, event_starts, data],
+            bind_var="(sep, eep, is_active, asp, dsp, signal)",
+            lambda_src=f"""
+                if *sep <= *eep && *is_active && *asp <= *dsp {{
+                    signal.clone()
+                }} else {{
+                    {default}
+                }}
+            """,
+            upstream=[
+                scope_starts,
+                event_starts,
+                is_active,
+                self._activation_starts,
+                data_starts,
+                data,
+            ],
         ).annotate_type(data.get_rust_type_name())
 
 
@@ -284,9 +423,48 @@ class SessionizedInputSchemaBase(InputSchemaBase, ABC):
         self.session_signal: SignalBase = self.create_session_signal()
         self.epoch_signal: SignalBase = self.create_epoch_signal()
         self._sessionized_signals: dict[str, SignalBase] = dict()
+        # A session without any input event for `_session_ttl` is considered ended, after which its
+        # sessionized inputs fall back to their defaults, as if a new session had started. Only
+        # these inputs are reset: the runtime doesn't evict any other state of an idle session,
+        # e.g., a state machine keeps its state unless it's built with `scoped(..., ttl=...)`.
+        if "_session_ttl" not in self.__dir__():
+            self._session_ttl = None
+        # The name of the member identifying the session, e.g., "session_id". When it's given, the
+        # input signal bag keeps the sessionized inputs, and resets all of them at once when a new
+        # value of this member comes, rather than a few nodes comparing the epochs for each input.
+        # The session signal should change with this member then, e.g., be its `count_changes()`.
+        # The reset happens at the event, so with `set_merge_simultaneous_moments`, an input coming
+        # before the session changes at the same moment is reset, unlike with the epochs.
+        if "_session_key" not in self.__dir__():
+            self._session_key = None
+        if self._session_key is not None:
+            if self._session_key not in self._members:
+                raise ValueError(
+                    f"The session key {self._session_key} isn't an input member"
+                )
+            if self._session_ttl is not None:
+                raise ValueError(
+                    "A `_session_key` doesn't support the `_session_ttl` yet"
+                )
         self._scope_ctx = _ScopeContext(
-            scope_level=self.session_signal, epoch=self.epoch_signal
+            scope_level=self.session_signal,
+            epoch=self.epoch_signal,
+            liveness=self._create_session_liveness(),
+        )
+
+    def _create_session_liveness(self) -> Optional[tuple[SignalBase, SignalBase]]:
+        if self._session_ttl is None:
+            return None
+        from ..processors import Const, EdgeTriggeredLatch
+        from .internal import normalize_duration
+
+        # The schema itself is the clock ticking at every input event.
+        is_active = EdgeTriggeredLatch(
+            control=self,
+            data=Const(True),
+            forget_duration=normalize_duration(self._session_ttl),
         )
+        return is_active, self
 
     @abstractmethod
     def create_session_signal(self) -> SignalBase:
@@ -298,8 +476,8 @@ class SessionizedInputSchemaBase(InputSchemaBase, ABC):
 
     def _make_sessionized_input(self, input_member_name: str) -> SignalBase:
         if input_member_name not in self._sessionized_signals:
-            raw_signal = super().__getattribute__(input_member_name)
-            if not isinstance(raw_signal, MappedInputMember):
+            raw_signal = self._members.get(input_member_name)
+            if raw_signal is None:
                 raise TypeError(f"{input_member_name} must be from input signal bag")
 
             attr = f"{input_member_name}_default"
@@ -322,10 +500,28 @@ class SessionizedInputSchemaBase(InputSchemaBase, ABC):
     def _sessionized(
         self, signal: MappedInputMember, default_value: RustCode
     ) -> SignalBase:
+        if self._session_key is not None:
+            return _SessionizedMember(signal, default_value)
         return self._scope_ctx.scoped(
             data=signal, clock=signal.clock(), default=default_value
         )
 
+    def to_dict(self) -> dict:
+        ret = super().to_dict()
+        if self._session_key is not None:
+            ret["sessionization"] = {
+                "session_key": self._session_key,
+                "fields": {
+                    s.name: {
+                        "source": s.source.name,
+                        "clock_companion": s.clock().name,
+                        "default_expr": s.default_expr,
+                    }
+                    for s in self._sessionized_signals.values()
+                },
+            }
+        return ret
+
     def __getattr__(self, name: str) -> SignalBase:
         if name.startswith(self.SESSIONIZED_PREFIX):
             actual_key = name[self.SESSIONIZED_PREFIX_SIZE :]
@@ -336,10 +532,17 @@ class SessionizedInputSchemaBase(InputSchemaBase, ABC):
 
 def named(
     name: str,
-    inner: SignalDataTypeBase = String(),
+    inner: SignalDataTypeBase | Object = String(),
     *,
     volatile_default_value: Optional[RustCode] = None,
-) -> MappedInputMember:
+) -> MappedInputMember | Object:
+    """Map an input key to a schema member.
+
+    A dot is a part of the key, e.g., a flattened key like "event.name". A nested field is mapped
+    by a member of a `Struct` instead, which is mapped as an `Object`.
+    """
+    if isinstance(inner, Object):
+        return Object(inner.struct_type, name)
     return MappedInputMember(name, inner, volatile_default_value)
 
 
@@ -359,6 +562,8 @@ def create_type_model_from_rust_type_name(
 ) -> Optional[SignalDataTypeBase]:
     if rust_type == "String":
         return String()
+    elif rust_type == INTERNED_STRING:
+        return Interned()
     elif rust_type[0] in ["i", "u"]:
         width = int(rust_type[1:])
         signed = rust_type[0] == "i"
@@ -10,7 +10,7 @@ class ScopedMeasurement(IndirectBuiltinMeasurementComponentBase):
         rust_component_name = self.__class__.__name__
         super().__init__(
             name=rust_component_name,
-            upstreams=[scope_signal, inner],
+            upstreams=[scope_signal.scope_epoch(), inner],
             node_decl=f"""
                 {rust_component_name}::new(
                     {self.get_id_or_literal_value(inner)}.clone()
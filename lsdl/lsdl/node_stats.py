@@ -0,0 +1,125 @@
+"""Report the nodes doing the most work per output change.
+
+Usage: `python -m lsdl.node_stats [options] ir.json node-stats.json`
+
+The node statistics are collected by the `InstrumentNodeChanges` instrument of the runtime and
+serialized as JSON, the IR is the one the data logic is generated from. The report lists the nodes
+with the highest ratio of evaluations to output changes: a node which is evaluated often but rarely
+changes is a candidate for caching, or for an update group of its own.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional, TextIO, final
+
+
+@final
+@dataclass(frozen=True)
+class NodeReport:
+    id: int
+    kind: str
+    location: str
+    update_group: int
+    evaluations: int
+    changes: int
+    avg_output_bytes: float
+    skip_rate: float
+
+    @property
+    def work_per_change(self) -> float:
+        # A node whose output never changes does all its work for nothing.
+        return self.evaluations / max(self.changes, 1)
+
+
+def join_node_stats(ir: dict[str, Any], stats: dict[str, Any]) -> list[NodeReport]:
+    """Join the node statistics with the node kinds and the debug info in the IR."""
+    moments = stats["moments"]
+    node_stats = {n["id"]: n for n in stats["nodes"]}
+    reports = []
+    for node in ir["nodes"]:
+        counts = node_stats.get(node["id"], {})
+        evaluations = counts.get("evaluations", 0)
+        debug_info = node.get("debug_info") or {}
+        reports.append(
+            NodeReport(
+                id=node["id"],
+                kind=node["namespace"].split("::")[-1],
+                location=f"{debug_info.get('file', '<unknown>')}:{debug_info.get('line', -1)}",
+                update_group=node.get("update_group", 0),
+                evaluations=evaluations,
+                changes=counts.get("changes", 0),
+                avg_output_bytes=counts.get("output_bytes", 0) / evaluations if evaluations else 0.0,
+                skip_rate=1 - evaluations / moments if moments else 0.0,
+            )
+        )
+    return reports
+
+
+def print_report(reports: list[NodeReport], moments: int, out: TextIO) -> None:
+    print(f"# moments: {moments}, nodes: {len(reports)}", file=out)
+    header = (
+        "id",
+        "kind",
+        "group",
+        "evaluations",
+        "changes",
+        "work/change",
+        "skipped",
+        "avg bytes",
+        "location",
+    )
+    rows: list[tuple[str, ...]] = [header]
+    for r in reports:
+        rows.append(
+            (
+                str(r.id),
+                r.kind,
+                str(r.update_group),
+                str(r.evaluations),
+                str(r.changes),
+                f"{r.work_per_change:.1f}",
+                f"{r.skip_rate:.1%}",
+                f"{r.avg_output_bytes:.1f}",
+                r.location,
+            )
+        )
+    widths = [max(len(cells[i]) for cells in rows) for i in range(len(header))]
+    for cells in rows:
+        print("  ".join(c.ljust(w) for c, w in zip(cells, widths)).rstrip(), file=out)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m lsdl.node_stats",
+        description="List the nodes with the worst work-to-change ratio.",
+    )
+    parser.add_argument("ir", help="path to the JSON IR of the data logic")
+    parser.add_argument("stats", help="path to the node statistics, `-` for stdin")
+    parser.add_argument("--top", type=int, default=20, help="max number of nodes to list")
+    parser.add_argument(
+        "--min-evaluations",
+        type=int,
+        default=1,
+        help="ignore the nodes evaluated fewer times than this",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.ir, encoding="utf-8") as fin:
+        ir = json.load(fin)
+    if args.stats == "-":
+        stats = json.load(sys.stdin)
+    else:
+        with open(args.stats, encoding="utf-8") as fin:
+            stats = json.load(fin)
+    reports = [
+        r for r in join_node_stats(ir, stats) if r.evaluations >= args.min_evaluations
+    ]
+    reports.sort(key=lambda r: (-r.work_per_change, -r.evaluations, r.id))
+    print_report(reports[: args.top], stats["moments"], sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ from .generators import Const, MonotonicSteps, SignalGenerator, SquareWave
 from .latch import EdgeTriggeredLatch, LevelTriggeredLatch
 from .liveness import LivenessChecker
 from .mapper import Cond, If, SignalMapper
+from .prior_value import PriorValue
 from .sliding_window import SlidingTimeWindow, SlidingWindow
 from .state_machine import StateMachine, StateMachineBuilder
 
@@ -18,6 +19,7 @@ __all__ = [
     "LevelTriggeredLatch",
     "LivenessChecker",
     "MonotonicSteps",
+    "PriorValue",
     "SignalGenerator",
     "SignalFilterBuilder",
     "SignalMapper",
@@ -7,6 +7,8 @@ from ..rust_code import RUST_DEFAULT_VALUE, RustCode, RustPrimitiveType
 
 @final
 class Accumulator(BuiltinProcessorComponentBase):
+    is_time_dependent = False
+
     def __init__(
         self,
         control: SignalBase,
@@ -1,8 +1,9 @@
 from enum import StrEnum, auto
-from typing import Callable, Optional
+from typing import Callable, Optional, final
 
 from ..lsp_model.core import SignalBase
 from ..rust_code import RustCode
+from .mapper import SignalMapper
 
 
 def make_tuple(*args: SignalBase) -> SignalBase:
@@ -22,12 +23,109 @@ class FoldableOperation(StrEnum):
     OR  = auto()
 
 
+def _fold_expression(
+    fold_op: FoldableOperation, state: RustCode, data: RustCode
+) -> RustCode:
+    match fold_op:
+        case FoldableOperation.SUM:
+            return f"{state}.clone() + {data}.clone()"
+        case FoldableOperation.MIN:
+            return f"{state}.clone().min({data}.clone())"
+        case FoldableOperation.MAX:
+            return f"{state}.clone().max({data}.clone())"
+        case FoldableOperation.AND:
+            return f"{state} && *{data}"
+        case FoldableOperation.OR:
+            return f"{state} || *{data}"
+
+
+def _default_fold_init_state(fold_op: FoldableOperation, data_type: str) -> RustCode:
+    match fold_op:
+        case FoldableOperation.SUM:
+            return f"{data_type}::default()"
+        case FoldableOperation.MIN:
+            return f"{data_type}::MAX"
+        case FoldableOperation.MAX:
+            return f"{data_type}::MIN"
+        case FoldableOperation.AND:
+            return "true"
+        case FoldableOperation.OR:
+            return "false"
+
+
+@final
+class _FusedFold:
+    """The folds of the same data over the same clock and scope, computed by one state machine.
+
+    The state is a tuple with a field for each fold, and each fold is a projection of it. So
+    the change detection, the scope reset and the clock comparison are paid once per event for
+    the whole family, rather than once per fold.
+    """
+
+    def __init__(
+        self, data: SignalBase, clock: SignalBase, scope: Optional[SignalBase]
+    ):
+        from . import StateMachineBuilder
+
+        self._data_type = data.get_rust_type_name()
+        self._builder = StateMachineBuilder(clock=clock, data=data)
+        if scope is not None:
+            self._builder.scoped(scope)
+        self._folds: list[tuple[FoldableOperation, RustCode]] = []
+        self._projections: list[SignalMapper] = []
+        self._state: Optional[SignalBase] = None
+
+    def fold(self, fold_op: FoldableOperation, init_state: RustCode) -> SignalBase:
+        key = (fold_op, init_state)
+        if key in self._folds:
+            return self._projections[self._folds.index(key)]
+        self._folds.append(key)
+        self._builder.transition_fn(self._transition_fn()).init_state(
+            f"({''.join(f'{init}, ' for _, init in self._folds)})"
+        )
+        if self._state is None:
+            self._state = self._builder.build()
+        else:
+            self._builder.rebuild()
+        self._state.annotate_type(self._state_type())
+        for p in self._projections:
+            p.update_bind_type()
+        projection = SignalMapper(
+            bind_var="s",
+            lambda_src=f"s.{len(self._projections)}.clone()",
+            upstream=self._state,
+        ).annotate_type(self._data_type)
+        self._projections.append(projection)
+        return projection
+
+    def _state_type(self) -> str:
+        return f"({''.join(f'{self._data_type}, ' for _ in self._folds)})"
+
+    def _transition_fn(self) -> RustCode:
+        fields = "".join(
+            f"{_fold_expression(op, f's.{i}', 'd')}, "
+            for i, (op, _) in enumerate(self._folds)
+        )
+        return f"|s: &{self._state_type()}, d: &{self._data_type}| ({fields})"
+
+
+# The fused folds by the ids of their data, clock and scope signals. The signals are referenced by
+# the components, so an id isn't reused while the pipeline is being defined.
+_fused_folds: dict[tuple[int, int, Optional[int]], _FusedFold] = {}
+
+
 def time_domain_fold(
     fold_op: FoldableOperation,
 ) -> Callable[
     [SignalBase, Optional[SignalBase], Optional[SignalBase], Optional[RustCode]],
     SignalBase,
 ]:
+    """Fold the data in time domain, i.e., at each change of the clock.
+
+    The folds of the same data, clock and scope share one state machine, e.g., the sum and the
+    maximum of a duration in a session only check the clock and the scope once per event.
+    """
+
     def inner(
         data: SignalBase,
         clock: Optional[SignalBase] = None,
@@ -36,38 +134,12 @@ def time_domain_fold(
     ) -> SignalBase:
         if clock is None:
             clock = data
-        from . import StateMachineBuilder
-
-        data_type = data.get_rust_type_name()
-        lambda_param = f"s: &{data_type}, d: &{data_type}"
-
-        match fold_op:
-            case FoldableOperation.SUM:
-                fold_method = f"|{lambda_param}| s.clone() + d.clone()"
-                init_state = init_state or f"{data_type}::default()"
-            case FoldableOperation.MIN:
-                fold_method = f"|{lambda_param}| s.clone().min(d.clone())"
-                init_state = init_state or f"{data_type}::MAX"
-            case FoldableOperation.MAX:
-                fold_method = f"|{lambda_param}| s.clone().max(d.clone())"
-                init_state = init_state or f"{data_type}::MIN"
-            case FoldableOperation.AND:
-                fold_method = f"|{lambda_param}| *s && *d"
-                init_state = init_state or "true"
-            case FoldableOperation.OR:
-                fold_method = f"|{lambda_param}| *s || *d"
-                init_state = init_state or "false"
-
-        builder = StateMachineBuilder(clock=clock, data=data)
-
-        if init_state is not None:
-            builder.init_state(init_state)
-
-        builder.transition_fn(fold_method)
-
-        if scope is not None:
-            builder.scoped(scope)
-
-        return builder.build().annotate_type(data.get_rust_type_name())
+        init_state = init_state or _default_fold_init_state(
+            fold_op, data.get_rust_type_name()
+        )
+        key = (id(data), id(clock), None if scope is None else id(scope))
+        if key not in _fused_folds:
+            _fused_folds[key] = _FusedFold(data, clock, scope)
+        return _fused_folds[key].fold(fold_op, init_state)
 
     return inner
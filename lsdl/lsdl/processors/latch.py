@@ -30,6 +30,8 @@ class LevelTriggeredLatch(BuiltinProcessorComponentBase):
         super().__init__(
             name=rust_processor_name, node_decl=node_decl, upstreams=[control, data]
         )
+        # Only a latch forgetting its data schedules internal events.
+        self.is_time_dependent = forget_duration >= 0
         key4type = "output_type"
         if key4type in kwargs:
             self.annotate_type(kwargs[key4type])
@@ -64,6 +66,8 @@ class EdgeTriggeredLatch(BuiltinProcessorComponentBase):
         super().__init__(
             name=rust_processor_name, node_decl=node_decl, upstreams=[control, data]
         )
+        # Only a latch forgetting its data schedules internal events.
+        self.is_time_dependent = forget_duration >= 0
         key4type = "output_type"
         if key4type in kwargs:
             self.annotate_type(kwargs[key4type])
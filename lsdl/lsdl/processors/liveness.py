@@ -1,3 +1,4 @@
+import re
 from typing import final
 
 from lsdl.rust_code import RustPrimitiveType
@@ -5,6 +6,14 @@ from lsdl.rust_code import RustPrimitiveType
 from ..lsp_model.component_base import BuiltinProcessorComponentBase
 from ..lsp_model.core import SignalBase
 
+# The checkers with the same liveness event filter share the search for the next liveness event.
+_lookahead_index_ids: dict[tuple[str, str], int] = {}
+
+
+def _get_lookahead_index_id(ef_bind_var: str, ef_src: str) -> int:
+    key = (ef_bind_var.strip(), re.sub(r"\s+", " ", ef_src.strip()))
+    return _lookahead_index_ids.setdefault(key, len(_lookahead_index_ids))
+
 
 @final
 class LivenessChecker(BuiltinProcessorComponentBase):
@@ -16,11 +25,12 @@ class LivenessChecker(BuiltinProcessorComponentBase):
         timeout=90_000_000_000,
     ):
         rust_processor_name = self.__class__.__name__
+        index_id = _get_lookahead_index_id(ef_bind_var, ef_src)
         super().__init__(
             name=rust_processor_name,
             node_decl=f"""
-                {rust_processor_name}::new(
-                    |{ef_bind_var}: &InputSignalBagPatch| {ef_src}, {timeout}
+                {rust_processor_name}::with_shared_index(
+                    |{ef_bind_var}: &InputSignalBagPatch| {ef_src}, {timeout}, {index_id}
                 )
             """,
             upstreams=[liveness_clock],
@@ -2,26 +2,36 @@ from typing import final
 
 from ..lsp_model.component_base import BuiltinProcessorComponentBase
 from ..lsp_model.core import SignalBase
-from ..rust_code import COMPILER_INFERABLE_TYPE
+from ..rust_code import COMPILER_INFERABLE_TYPE, RustCode
 
 
 @final
 class SignalMapper(BuiltinProcessorComponentBase):
+    is_time_dependent = False
+
     def __init__(
         self, bind_var: str, lambda_src: str, upstream: SignalBase | list[SignalBase]
     ):
+        self._bind_var = bind_var
+        self._lambda_src = lambda_src
+        super().__init__(
+            name=self.__class__.__name__,
+            node_decl=self._make_node_decl(upstream),
+            upstreams=[upstream],
+        )
+
+    def update_bind_type(self) -> None:
+        """Render the lambda again with the current type of the upstream, after it changes."""
+        self._node_decl = self._make_node_decl(self._upstreams[0])
+
+    def _make_node_decl(self, upstream: SignalBase | list[SignalBase]) -> RustCode:
         bind_type = (
             upstream.get_rust_type_name()
             if not isinstance(upstream, list)
             else "(" + ", ".join([e.get_rust_type_name() for e in upstream]) + ")"
         )
-        lambda_decl = f"|{bind_var}: &{bind_type}| {lambda_src}"
-        rust_processor_name = self.__class__.__name__
-        super().__init__(
-            name=rust_processor_name,
-            node_decl=f"{rust_processor_name}::new({lambda_decl})",
-            upstreams=[upstream],
-        )
+        lambda_decl = f"|{self._bind_var}: &{bind_type}| {self._lambda_src}"
+        return f"{self.__class__.__name__}::new({lambda_decl})"
 
 
 def _build_signal_mapper(
@@ -0,0 +1,27 @@
+from typing import Optional, final
+
+from ..lsp_model.component_base import BuiltinProcessorComponentBase
+from ..lsp_model.core import SignalBase
+
+
+@final
+class PriorValue(BuiltinProcessorComponentBase):
+    """The value of the data before the last change of the clock, reset when the scope changes."""
+
+    is_time_dependent = False
+
+    def __init__(
+        self, data: SignalBase, clock: SignalBase, scope: Optional[SignalBase] = None
+    ):
+        from .generators import Const
+
+        rust_processor_name = self.__class__.__name__
+        data_type = data.get_rust_type_name()
+        # A constant scope never changes, so the values are never reset.
+        scope_epoch = Const(True) if scope is None else scope.scope_epoch()
+        super().__init__(
+            name=rust_processor_name,
+            node_decl=f"{rust_processor_name}::<_, _, {data_type}>::default()",
+            upstreams=[scope_epoch, clock, data],
+        )
+        self.annotate_type(data_type)
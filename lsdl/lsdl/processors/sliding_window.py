@@ -27,6 +27,8 @@ class SlidingTimeWindow(BuiltinProcessorComponentBase):
 
 @final
 class SlidingWindow(BuiltinProcessorComponentBase):
+    is_time_dependent = False
+
     def __init__(
         self,
         clock: SignalBase | list[SignalBase],
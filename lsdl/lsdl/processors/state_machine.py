@@ -14,7 +14,9 @@ class StateMachineBuilder:
         self._data = data
         self._transition_fn = "|_, _| ()"
         self._scope_signal: Optional[SignalBase] = None
+        self._scope_ttl: Optional[int] = None
         self._init_state = RUST_DEFAULT_VALUE
+        self._state_machine: Optional[StateMachine] = None
 
     def init_state(self, init_state: RustCode) -> Self:
         self._init_state = init_state
@@ -24,24 +26,90 @@ class StateMachineBuilder:
         self._transition_fn = fn
         return self
 
-    def scoped(self, scope_signal: SignalBase) -> Self:
+    def scoped(
+        self, scope_signal: SignalBase, ttl: Optional[int | str] = None
+    ) -> Self:
+        """Reset the state when the scope changes.
+
+        When `ttl` is given, the state is also reset, which drops whatever it holds, once the clock
+        hasn't changed for `ttl`, i.e., the scope is considered ended when it's idle that long.
+        It only applies to this state machine, the runtime doesn't evict the state of the other
+        nodes of an idle scope.
+        `ttl` can be either an integer as number of nanoseconds or a string of "<value><unit>".
+        """
+        from ..lsp_model.internal import normalize_duration
+
         self._scope_signal = scope_signal
+        self._scope_ttl = None if ttl is None else normalize_duration(ttl)
         return self
 
     def build(self) -> SignalBase:
+        transition_fn, init_state = self._render()
         if self._scope_signal is None:
-            return StateMachine(
-                clock=self._clock, data=self._data, transition_fn=self._transition_fn
+            self._state_machine = StateMachine(
+                clock=self._clock,
+                data=self._data,
+                transition_fn=transition_fn,
+                init_state=init_state,
             )
-        else:
-            # When a type in `self._transition_fn` can't be inferred, it seems
-            # sometime the compiler doesn't know the exact reason, and it panics
-            # with the error code [E0521] "borrowed data escapes outside of
-            # closure", combined with a message "`inner_fn` declared here,
-            # outside the closure body`. When this happens, don't try to move
-            # the `inner_fn` here, and we should add more type annotations to
-            # this `self._transition_fn`.
-            actual_transition_fn = f"""{{
+            return self._state_machine
+        from .combinators import make_tuple
+
+        # The upstreams are nested in the tuples of the scoped state machine, which only takes
+        # signals, so a list of clocks or data is made into a tuple first.
+        clock = (
+            make_tuple(*self._clock) if isinstance(self._clock, list) else self._clock
+        )
+        data = make_tuple(*self._data) if isinstance(self._data, list) else self._data
+        scope_epoch = self._scope_signal.scope_epoch()
+        if self._scope_ttl is None:
+            self._state_machine = StateMachine(
+                clock=[scope_epoch, clock],
+                data=[scope_epoch, clock, data],
+                transition_fn=transition_fn,
+                init_state=init_state,
+            )
+            return self._state_machine.map(bind_var="&(_, _, s)", lambda_src="s")
+
+        from .generators import Const
+        from .latch import EdgeTriggeredLatch
+
+        # It's true until the clock hasn't changed for `ttl`, and the latch schedules the update
+        # at which it turns false, so the eviction happens even if no event comes afterwards.
+        is_active = EdgeTriggeredLatch(
+            control=clock, data=Const(True), forget_duration=self._scope_ttl
+        )
+        self._state_machine = StateMachine(
+            clock=[scope_epoch, clock, is_active],
+            data=[scope_epoch, clock, is_active, data],
+            transition_fn=transition_fn,
+            init_state=init_state,
+        )
+        return self._state_machine.map(bind_var="&(_, _, _, s)", lambda_src="s")
+
+    def rebuild(self) -> None:
+        """Apply the current transition function and initial state to the built state machine.
+
+        The signals built before stay valid, so a state machine can grow its state, e.g., when more
+        folds are fused into it, as long as its output keeps the fields they read.
+        """
+        if self._state_machine is None:
+            raise ValueError("The state machine hasn't been built yet")
+        self._state_machine.set_transition_fn(*self._render())
+
+    def _render(self) -> tuple[RustCode, RustCode]:
+        """Render the transition function and the initial state of the actual state machine."""
+        if self._scope_signal is None:
+            return self._transition_fn, self._init_state
+        # When a type in `self._transition_fn` can't be inferred, it seems
+        # sometime the compiler doesn't know the exact reason, and it panics
+        # with the error code [E0521] "borrowed data escapes outside of
+        # closure", combined with a message "`inner_fn` declared here,
+        # outside the closure body`. When this happens, don't try to move
+        # the `inner_fn` here, and we should add more type annotations to
+        # this `self._transition_fn`.
+        if self._scope_ttl is None:
+            transition_fn = f"""{{
                 let inner_fn = {self._transition_fn};
                 move |&(last_scope, last_clock, mut last_state),
                       &(this_scope, this_clock, ref this_input)|{{
@@ -56,17 +124,34 @@ class StateMachineBuilder:
                     }}
                 }}
             }}"""
-            state_machine = StateMachine(
-                clock=[self._scope_signal, self._clock],
-                data=[self._scope_signal, self._clock, self._data],
-                transition_fn=actual_transition_fn,
-                init_state=f"({RUST_DEFAULT_VALUE}, {RUST_DEFAULT_VALUE}, {self._init_state})",
-            )
-            return state_machine.map(bind_var="&(_, _, s)", lambda_src="s")
+            init_state = f"({RUST_DEFAULT_VALUE}, {RUST_DEFAULT_VALUE}, {self._init_state})"
+            return transition_fn, init_state
+        transition_fn = f"""{{
+            let inner_fn = {self._transition_fn};
+            move |&(last_scope, last_clock, _, mut last_state),
+                  &(this_scope, this_clock, this_is_active, ref this_input)|{{
+                let this_is_active: bool = this_is_active;
+                if last_scope != this_scope || !this_is_active {{
+                    last_state = {self._init_state};
+                }}
+                if last_clock == this_clock || !this_is_active {{
+                    (this_scope, this_clock, this_is_active, last_state)
+                }}
+                else {{
+                    (this_scope, this_clock, this_is_active, (inner_fn)(&last_state, this_input))
+                }}
+            }}
+        }}"""
+        init_state = (
+            f"({RUST_DEFAULT_VALUE}, {RUST_DEFAULT_VALUE}, false, {self._init_state})"
+        )
+        return transition_fn, init_state
 
 
 @final
 class StateMachine(BuiltinProcessorComponentBase):
+    is_time_dependent = False
+
     def __init__(
         self,
         clock: SignalBase | list[SignalBase] | list[SignalBase | list[SignalBase]],
@@ -77,10 +162,20 @@ class StateMachine(BuiltinProcessorComponentBase):
             transition_fn = kwargs["transition_fn"]
         else:
             raise ValueError("Currently only support transition_fn")
-        rust_processor_name = self.__class__.__name__
         init_state = kwargs.get("init_state", RUST_DEFAULT_VALUE)
         super().__init__(
-            name=rust_processor_name,
-            node_decl=f"{rust_processor_name}::new({init_state}, {transition_fn})",
+            name=self.__class__.__name__,
+            node_decl=self._make_node_decl(transition_fn, init_state),
             upstreams=[clock, data],
         )
+
+    def set_transition_fn(
+        self, transition_fn: RustCode, init_state: RustCode
+    ) -> None:
+        """Replace the transition function and the initial state, e.g., to grow the state."""
+        self._node_decl = self._make_node_decl(transition_fn, init_state)
+
+    def _make_node_decl(
+        self, transition_fn: RustCode, init_state: RustCode
+    ) -> RustCode:
+        return f"{self.__class__.__name__}::new({init_state}, {transition_fn})"
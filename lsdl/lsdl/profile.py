@@ -0,0 +1,363 @@
+"""Profile a JSONL input sample and suggest an `InputSchemaBase` for it.
+
+Usage: `python -m lsdl.profile [options] input.jsonl`
+
+The report (per key: inferred type, absent/null ratio, update frequency and distinct-value
+cardinality) is written to stderr, and the suggested schema source code is written to stdout.
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, TextIO, final
+
+from . import lsp_model
+from .lsp_model.schema import LspEnumBase
+
+_I32_RANGE = range(-(2**31), 2**31)
+_U64_MAX = 2**64 - 1
+_DEFAULT_VARIANT = "Unknown"
+
+
+@final
+@dataclass
+class KeyProfile:
+    """The running statistics of one input key."""
+
+    key: str
+    present: int = 0
+    nulls: int = 0
+    changes: int = 0
+    json_types: set[str] = field(default_factory=set)
+    distinct: set[Any] = field(default_factory=set)
+    distinct_overflow: bool = False
+    min_int: Optional[int] = None
+    max_int: Optional[int] = None
+    _last_value: Any = None
+
+    def observe(self, value: Any, max_distinct: int) -> None:
+        if value is None:
+            self.nulls += 1
+            return
+        self.present += 1
+        match value:
+            case bool():
+                self.json_types.add("bool")
+            case int():
+                self.json_types.add("int")
+                self.min_int = value if self.min_int is None else min(self.min_int, value)
+                self.max_int = value if self.max_int is None else max(self.max_int, value)
+            case float():
+                self.json_types.add("float")
+            case str():
+                self.json_types.add("str")
+            case list():
+                self.json_types.add("list")
+            case _:
+                self.json_types.add("object")
+        if isinstance(value, (list, dict)):
+            # Containers are not hashable, and their cardinality is not interesting either.
+            value = json.dumps(value, sort_keys=True)
+        if value != self._last_value:
+            self.changes += 1
+            self._last_value = value
+        if not self.distinct_overflow:
+            self.distinct.add(value)
+            if len(self.distinct) > max_distinct:
+                # Keep the memory bounded: once the cardinality is known to be high, the exact
+                # number doesn't change any suggestion.
+                self.distinct.clear()
+                self.distinct_overflow = True
+
+    def cardinality(self) -> Optional[int]:
+        """Number of distinct non-null values, `None` if it exceeds the tracking limit."""
+        return None if self.distinct_overflow else len(self.distinct)
+
+    def inferred_type(self) -> str:
+        match sorted(self.json_types):
+            case []:
+                return "unknown"
+            case [single]:
+                return single
+            case ["float", "int"]:
+                return "float"
+            case _:
+                return "mixed"
+
+
+@final
+@dataclass
+class InputProfile:
+    records: int = 0
+    malformed: int = 0
+    keys: dict[str, KeyProfile] = field(default_factory=dict)
+
+
+def profile_records(
+    lines: Iterable[str], sample_size: int, max_distinct: int, timestamp_key: str
+) -> InputProfile:
+    """Stream at most `sample_size` JSONL records and collect per-key statistics."""
+    profile = InputProfile()
+    for line in lines:
+        if profile.records >= sample_size:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            profile.malformed += 1
+            continue
+        if not isinstance(record, dict):
+            profile.malformed += 1
+            continue
+        profile.records += 1
+        for key, value in record.items():
+            if key == timestamp_key:
+                continue
+            if key not in profile.keys:
+                profile.keys[key] = KeyProfile(key)
+            profile.keys[key].observe(value, max_distinct)
+    return profile
+
+
+def _snake_case(key: str) -> str:
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", key)
+    name = re.sub(r"[^0-9A-Za-z_]+", "_", name).strip("_").lower()
+    if not name or name[0].isdigit():
+        name = f"f_{name}"
+    return name
+
+
+def _enum_variant_name(value: str) -> str:
+    name = LspEnumBase.upper_camel_case(re.sub(r"[^0-9A-Za-z]+", "_", value).strip("_"))
+    if not name or name[0].isdigit():
+        name = f"V{name}"
+    return name
+
+
+@final
+@dataclass(frozen=True)
+class MemberSuggestion:
+    member_name: str
+    input_key: str
+    type_expr: str
+    is_volatile: bool
+    enum_name: Optional[str] = None
+    enum_variants: tuple[tuple[str, str], ...] = ()
+    note: Optional[str] = None
+
+
+def suggest_member(
+    key_profile: KeyProfile,
+    records: int,
+    max_enum_variants: int,
+    volatile_threshold: float,
+) -> MemberSuggestion:
+    """Pick the cheapest LSDL type that can represent every observed value of a key."""
+    member_name = _snake_case(key_profile.key)
+    note = None
+    enum_name = None
+    enum_variants: tuple[tuple[str, str], ...] = ()
+    match key_profile.inferred_type():
+        case "bool":
+            type_expr = "Bool()"
+        case "int":
+            lo, hi = key_profile.min_int or 0, key_profile.max_int or 0
+            if lo in _I32_RANGE and hi in _I32_RANGE:
+                type_expr = "Integer()"
+            elif lo >= 0 and hi <= _U64_MAX:
+                type_expr = "Integer(signed=False, width=64)"
+            else:
+                type_expr = "Integer(width=64)"
+        case "float":
+            type_expr = "Float()"
+        case "str":
+            cardinality = key_profile.cardinality()
+            values: list[str] = sorted(key_profile.distinct)
+            if cardinality is not None and all(re.fullmatch(r"-?\d+(\.\d+)?", v) for v in values):
+                type_expr = "String()"
+                note = "numeric strings, consider `.parse(...)` or a numeric input"
+            elif (
+                cardinality is not None
+                and 0 < cardinality <= max_enum_variants
+                # Only values that repeat are worth an enum, or it's just a too small sample.
+                and 2 * cardinality <= key_profile.present
+            ):
+                # The first variant is the default one, which is also the value before the key
+                # shows up for the first time.
+                variants = [(_DEFAULT_VARIANT, "")] + [
+                    (_enum_variant_name(v), v) for v in values if v != ""
+                ]
+                rust_names = {LspEnumBase.upper_camel_case(n) for n, _ in variants}
+                if len(rust_names) == len(variants):
+                    enum_name = LspEnumBase.upper_camel_case(member_name)
+                    enum_variants = tuple(variants)
+                    type_expr = f"CStyleEnum({enum_name})"
+                else:
+                    type_expr = "String()"
+                    note = "enum variant names of the values are ambiguous"
+            else:
+                type_expr = "String()"
+        case "unknown":
+            type_expr = "String()"
+            note = "only null values observed"
+        case other:
+            type_expr = "String()"
+            note = f"unsupported or mixed JSON types ({other}: {sorted(key_profile.json_types)})"
+
+    # A sparse key whose value differs almost every time it shows up is an event attribute
+    # rather than a state, therefore it should be reset when it's absent.
+    presence = key_profile.present / records if records else 0.0
+    is_volatile = (
+        presence < volatile_threshold
+        and key_profile.present > 0
+        and key_profile.changes / key_profile.present >= 0.9
+    )
+    return MemberSuggestion(
+        member_name, key_profile.key, type_expr, is_volatile, enum_name, enum_variants, note
+    )
+
+
+def _unique_enum_names(
+    suggestions: list[MemberSuggestion], class_name: str
+) -> list[Optional[str]]:
+    """The enum class names of the suggestions, which mustn't shadow any other name."""
+    taken = {*lsp_model.__all__, "final", class_name}
+    ret: list[Optional[str]] = []
+    for s in suggestions:
+        if s.enum_name is None:
+            ret.append(None)
+            continue
+        name = s.enum_name if s.enum_name not in taken else f"{s.enum_name}Kind"
+        idx = 2
+        while name in taken:
+            name = f"{s.enum_name}Kind{idx}"
+            idx += 1
+        taken.add(name)
+        ret.append(name)
+    return ret
+
+
+def render_schema(
+    suggestions: list[MemberSuggestion], timestamp_key: str, class_name: str = "InputSignal"
+) -> str:
+    """Render the suggested schema as LSDL source code."""
+    imports = {"InputSchemaBase"}
+    lines: list[str] = []
+    enum_names = _unique_enum_names(suggestions, class_name)
+    for s, enum_name in zip(suggestions, enum_names):
+        if enum_name is not None:
+            imports.update(["CStyleEnum", "LspEnumBase"])
+            lines.append("@final")
+            lines.append(f"class {enum_name}(LspEnumBase):")
+            lines.extend(f"    {name} = {json.dumps(value)}" for name, value in s.enum_variants)
+            lines.append("\n")
+    lines.append(f"class {class_name}(InputSchemaBase):")
+    lines.append(f"    _timestamp_key = {json.dumps(timestamp_key)}")
+    lines.append("")
+    for s, enum_name in zip(suggestions, enum_names):
+        imports.add(re.sub(r"\(.*", "", s.type_expr))
+        type_expr = s.type_expr
+        if enum_name is not None:
+            type_expr = f"CStyleEnum({enum_name})"
+        if s.is_volatile:
+            imports.add("volatile")
+            type_expr = f"volatile({type_expr})"
+        if s.member_name != s.input_key:
+            imports.add("named")
+            type_expr = f"named({json.dumps(s.input_key)}, {type_expr})"
+        comment = f"  # {s.note}" if s.note else ""
+        lines.append(f"    {s.member_name} = {type_expr}{comment}")
+    lines.append("\n")
+    lines.append(f"input_signal = {class_name}()")
+
+    header = []
+    if any(n is not None for n in enum_names):
+        header.append("from typing import final\n")
+    header.append(f"from lsdl.lsp_model import {', '.join(sorted(imports))}\n\n")
+    return "\n".join(header + lines) + "\n"
+
+
+def print_report(profile: InputProfile, suggestions: list[MemberSuggestion], out: TextIO) -> None:
+    print(
+        f"# records: {profile.records}, malformed lines: {profile.malformed}, "
+        f"keys: {len(profile.keys)}",
+        file=out,
+    )
+    header = ("key", "type", "absent", "null", "updates", "changes", "distinct", "suggestion")
+    rows = [header]
+    for s in suggestions:
+        kp = profile.keys[s.input_key]
+        absent = profile.records - kp.present - kp.nulls
+        cardinality = kp.cardinality()
+        rows.append(
+            (
+                kp.key,
+                kp.inferred_type(),
+                f"{absent / profile.records:.1%}",
+                f"{kp.nulls / profile.records:.1%}",
+                f"{kp.present / profile.records:.1%}",
+                str(kp.changes),
+                str(cardinality) if cardinality is not None else f">{len(kp.distinct) or '?'}",
+                ("volatile " if s.is_volatile else "") + s.type_expr,
+            )
+        )
+    widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+    for r in rows:
+        print("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip(), file=out)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m lsdl.profile",
+        description="Infer an LSDL input schema from a sample of JSONL input data.",
+    )
+    parser.add_argument("input", help="path to the JSONL input, `-` for stdin")
+    parser.add_argument("--timestamp-key", default="timestamp")
+    parser.add_argument("--class-name", default="InputSignal")
+    parser.add_argument(
+        "--sample", type=int, default=100_000, help="max number of records to read"
+    )
+    parser.add_argument(
+        "--max-distinct",
+        type=int,
+        default=1024,
+        help="max number of distinct values tracked per key",
+    )
+    parser.add_argument(
+        "--max-enum-variants",
+        type=int,
+        default=16,
+        help="strings with at most this many distinct values become enums",
+    )
+    parser.add_argument(
+        "--volatile-threshold",
+        type=float,
+        default=0.1,
+        help="keys present in fewer records than this ratio may become volatile",
+    )
+    args = parser.parse_args(argv)
+
+    fin = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    with fin:
+        profile = profile_records(
+            fin, args.sample, max(args.max_distinct, args.max_enum_variants), args.timestamp_key
+        )
+    if profile.records == 0:
+        print("No valid record found in the input.", file=sys.stderr)
+        return 1
+    suggestions = [
+        suggest_member(kp, profile.records, args.max_enum_variants, args.volatile_threshold)
+        for kp in profile.keys.values()
+    ]
+    print_report(profile, suggestions, sys.stderr)
+    sys.stdout.write(render_schema(suggestions, args.timestamp_key, args.class_name))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
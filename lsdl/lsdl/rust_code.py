@@ -6,6 +6,7 @@ type RustCode = str
 
 RUST_DEFAULT_VALUE: RustCode = "Default::default()"
 INPUT_SIGNAL_BAG: RustCode = "InputSignalBag"
+INTERNED_STRING: RustCode = "lsp_runtime::Symbol"
 
 COMPILER_INFERABLE_TYPE: RustCode = "_"
 NAMESPACE_OP: RustCode = "::"
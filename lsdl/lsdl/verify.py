@@ -0,0 +1,416 @@
+"""Check the JSON IR for the patterns which make the data logic slow or memory hungry.
+
+Usage: `python -m lsdl.verify [options] ir.json`
+
+The IR is the output of `print_ir_to_stdout()`, and `verify_ir` can also be called on the result
+of `_get_json_ir()` in a metrics definition. The checks only look at the IR, so a finding is a
+hint for the reviewer rather than a proof: each one cites the source location of the nodes
+involved. The exit status is 1 if anything is found.
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional, TextIO, final
+
+# The node decl refers to the other nodes as `$<id>`, e.g., in the scoped measurements.
+_NODE_REF = re.compile(r"\$(\d+)")
+_WHITESPACE = re.compile(r"\s+")
+_INTEGER_LITERAL = re.compile(r"^(\d[\d_]*)(?:usize|u64|u32|i32|i64)?$")
+_HEAP_TYPES = (
+    "String",
+    "Vec",
+    "VecDeque",
+    "HashMap",
+    "HashSet",
+    "BTreeMap",
+    "BTreeSet",
+)
+_HEAP_TYPE_NAMES = re.compile(rf"\b(?:{'|'.join(_HEAP_TYPES)})\b")
+_OR_LAMBDA = "*lhs || *rhs"
+
+
+@final
+@dataclass(frozen=True)
+class VerifyOptions:
+    max_window_size: int = 10_000
+    max_filter_values: int = 16
+    # The input members known to have many distinct values, e.g., from `lsdl.profile`.
+    high_cardinality_members: frozenset[str] = frozenset()
+    ignore: frozenset[str] = frozenset()
+
+
+@final
+@dataclass(frozen=True)
+class Finding:
+    code: str
+    message: str
+    node_ids: tuple[int, ...]
+    locations: tuple[str, ...] = field(default=())
+
+    def format(self) -> str:
+        nodes = ", ".join(f"#{i}" for i in self.node_ids)
+        ret = f"{self.code}: {self.message} (nodes {nodes})"
+        for location in self.locations:
+            ret += f"\n    at {location}"
+        return ret
+
+
+def _location(node: dict[str, Any]) -> str:
+    debug_info = node.get("debug_info") or {}
+    return f"{debug_info.get('file', '<unknown>')}:{debug_info.get('line', -1)}"
+
+
+def _kind(node: dict[str, Any]) -> str:
+    return node["namespace"].split("::")[-1]
+
+
+def _normalized_decl(node: dict[str, Any]) -> str:
+    return _WHITESPACE.sub(" ", node["node_decl"].strip())
+
+
+def _walk_inputs(node_input: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    if node_input["type"] == "Tuple":
+        for value in node_input["values"]:
+            yield from _walk_inputs(value)
+    else:
+        yield node_input
+
+
+def _upstream_ids(node: dict[str, Any]) -> set[int]:
+    ret = {int(i) for i in _NODE_REF.findall(node["node_decl"])}
+    for upstream in node["upstreams"]:
+        for i in _walk_inputs(upstream):
+            if i["type"] == "Component":
+                ret.add(i["id"])
+    return ret
+
+
+def _top_level_args(node_decl: str) -> list[str]:
+    """Split the arguments of the outermost call in a node decl.
+
+    The closure parameters are split as well, which doesn't matter for finding the
+    literals.
+    """
+    start = node_decl.find("(")
+    if start < 0:
+        return []
+    args: list[str] = []
+    depth = 0
+    current: list[str] = []
+    for c in node_decl[start + 1 :]:
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            if depth == 0:
+                break
+            depth -= 1
+        elif c == "," and depth == 0:
+            args.append("".join(current).strip())
+            current = []
+            continue
+        current.append(c)
+    args.append("".join(current).strip())
+    return args
+
+
+def _generic_args(node_decl: str, processor: str) -> list[str]:
+    match = re.match(rf"\s*{processor}::<(.*?)>::", node_decl, re.S)
+    if match is None:
+        return []
+    return [a.strip() for a in match.group(1).split(",")]
+
+
+def _check_unreachable(ir: dict[str, Any], nodes: dict[int, dict]) -> Iterator[Finding]:
+    policy = ir["measurement_policy"]
+    sources = [m["source"] for m in policy.get("output_schema", {}).values()]
+    complementary = policy.get("complementary_output_config") or {}
+    sources += [m["source"] for m in complementary.get("schema", {}).values()]
+    if complementary.get("reset_switch"):
+        sources.append(complementary["reset_switch"]["source"])
+    pending = [
+        i["id"] for s in sources for i in _walk_inputs(s) if i["type"] == "Component"
+    ]
+    reachable: set[int] = set()
+    while pending:
+        node_id = pending.pop()
+        if node_id in reachable or node_id not in nodes:
+            continue
+        reachable.add(node_id)
+        pending.extend(_upstream_ids(nodes[node_id]))
+    unreachable = [n for i, n in nodes.items() if i not in reachable]
+    if unreachable:
+        yield Finding(
+            code="unreachable-node",
+            message=(
+                f"{len(unreachable)} nodes don't contribute to any metric, "
+                "but they are still evaluated"
+            ),
+            node_ids=tuple(n["id"] for n in unreachable),
+            locations=tuple(sorted({_location(n) for n in unreachable})),
+        )
+
+
+def _check_duplicates(nodes: dict[int, dict]) -> Iterator[Finding]:
+    # The nodes are hash-consed bottom up, so the nodes built on duplicates are
+    # duplicates too.
+    canonical: dict[int, int] = {}
+    by_key: dict[tuple, int] = {}
+    groups: dict[int, list[int]] = defaultdict(list)
+
+    def describe(node_input: dict[str, Any]) -> Any:
+        if node_input["type"] == "Tuple":
+            return ("Tuple", tuple(describe(v) for v in node_input["values"]))
+        if node_input["type"] == "Component":
+            return ("Component", canonical.get(node_input["id"], node_input["id"]))
+        return tuple(sorted(node_input.items()))
+
+    for node_id in sorted(nodes):
+        node = nodes[node_id]
+        decl = _NODE_REF.sub(
+            lambda m: f"${canonical.get(int(m.group(1)), int(m.group(1)))}",
+            _normalized_decl(node),
+        )
+        key = (
+            node["namespace"],
+            node["is_measurement"],
+            decl,
+            tuple(describe(u) for u in node["upstreams"]),
+        )
+        first = by_key.setdefault(key, node_id)
+        canonical[node_id] = first
+        groups[first].append(node_id)
+
+    def is_derived(node_id: int) -> bool:
+        upstreams = _upstream_ids(nodes[node_id])
+        return any(canonical[i] != i for i in upstreams if i in canonical)
+
+    for first, members in groups.items():
+        # Only report where the duplication starts, not the nodes built on it.
+        if len(members) > 1 and not all(is_derived(i) for i in members[1:]):
+            yield Finding(
+                code="duplicate-node",
+                message=(
+                    f"{len(members)} structurally equal {_kind(nodes[first])} nodes, "
+                    "which could be computed once and shared"
+                ),
+                node_ids=tuple(members),
+                locations=tuple(sorted({_location(nodes[i]) for i in members})),
+            )
+
+
+def _check_sliding_windows(
+    nodes: dict[int, dict], options: VerifyOptions
+) -> Iterator[Finding]:
+    for node in nodes.values():
+        if _kind(node) != "SlidingWindow":
+            continue
+        # The window size is the first integer literal after the emit function.
+        sizes = [
+            int(m.group(1).replace("_", ""))
+            for a in _top_level_args(node["node_decl"])[1:]
+            if (m := _INTEGER_LITERAL.match(a))
+        ]
+        if sizes and sizes[0] > options.max_window_size:
+            yield Finding(
+                code="large-sliding-window",
+                message=(
+                    f"SlidingWindow keeps the last {sizes[0]} values and passes all "
+                    "of them to the emit function on every update"
+                ),
+                node_ids=(node["id"],),
+                locations=(_location(node),),
+            )
+
+
+def _input_members(node: dict[str, Any], nodes: dict[int, dict]) -> set[str]:
+    """The input members a node derives from, through any number of nodes."""
+    ret, visited, pending = set(), set(), [node["id"]]
+    while pending:
+        node_id = pending.pop()
+        if node_id in visited or node_id not in nodes:
+            continue
+        visited.add(node_id)
+        for upstream in nodes[node_id]["upstreams"]:
+            for i in _walk_inputs(upstream):
+                if i["type"] == "InputSignal":
+                    ret.add(i["id"])
+        pending.extend(_upstream_ids(nodes[node_id]))
+    return ret
+
+
+def _check_unbounded_latches(
+    ir: dict[str, Any], nodes: dict[int, dict], options: VerifyOptions
+) -> Iterator[Finding]:
+    members = ir["schema"]["members"]
+    high_cardinality = set(options.high_cardinality_members)
+    high_cardinality.update(k for k, m in members.items() if m["type"] == "String")
+    for node in nodes.values():
+        kind = _kind(node)
+        if kind not in ("LevelTriggeredLatch", "EdgeTriggeredLatch"):
+            continue
+        # A latch forgetting its value is built with `with_forget_behavior`.
+        generic_args = _generic_args(node["node_decl"], kind)
+        if not generic_args or len(node["upstreams"]) < 2:
+            continue
+        data_type = generic_args[-1]
+        data = {"id": -1, "upstreams": [node["upstreams"][1]], "node_decl": ""}
+        sources = sorted(_input_members(data, nodes) & high_cardinality)
+        if sources or data_type.startswith(_HEAP_TYPES):
+            what = f"values of {', '.join(sources)}" if sources else f"a {data_type}"
+            yield Finding(
+                code="unbounded-latch",
+                message=(
+                    f"{kind} holds {what} without a forget_duration, "
+                    "so a stale value is never dropped"
+                ),
+                node_ids=(node["id"],),
+                locations=(_location(node),),
+            )
+
+
+def _check_filter_values(
+    nodes: dict[int, dict], options: VerifyOptions
+) -> Iterator[Finding]:
+    def is_or(node: dict[str, Any]) -> bool:
+        return _kind(node) == "SignalMapper" and _OR_LAMBDA in node["node_decl"]
+
+    consumed_by_or = {
+        i for n in nodes.values() if is_or(n) for i in _upstream_ids(n)
+    }
+    for root in nodes.values():
+        if not is_or(root) or root["id"] in consumed_by_or:
+            continue
+        # Collect the comparisons the chain of `||` is built from, grouped by the
+        # compared signal.
+        compared: dict[str, list[int]] = defaultdict(list)
+        pending = [root["id"]]
+        while pending:
+            node = nodes.get(pending.pop())
+            if node is None:
+                continue
+            if is_or(node):
+                pending.extend(_upstream_ids(node))
+            elif "==" in node["node_decl"] and len(node["upstreams"]) == 1:
+                signal = json.dumps(node["upstreams"][0], sort_keys=True)
+                compared[signal].append(node["id"])
+        for leaves in compared.values():
+            if len(leaves) > options.max_filter_values:
+                yield Finding(
+                    code="long-filter-values",
+                    message=(
+                        f"filter_values compares a signal with {len(leaves)} values, "
+                        "one node per value, a single `filter_fn` with `matches!` "
+                        "is cheaper"
+                    ),
+                    node_ids=(root["id"],),
+                    locations=(_location(root),),
+                )
+
+
+def _check_state_clones(nodes: dict[int, dict]) -> Iterator[Finding]:
+    for node in nodes.values():
+        if _kind(node) != "StateMachine":
+            continue
+        decl = node["node_decl"]
+        heap_types = sorted(set(_HEAP_TYPE_NAMES.findall(decl)))
+        if ".clone()" in decl and heap_types:
+            yield Finding(
+                code="state-clone",
+                message=(
+                    "StateMachine transition clones a value of "
+                    f"{', '.join(heap_types)} on every transition, consider updating "
+                    "the state in place"
+                ),
+                node_ids=(node["id"],),
+                locations=(_location(node),),
+            )
+
+
+def verify_ir(
+    ir: dict[str, Any] | str, options: Optional[VerifyOptions] = None
+) -> list[Finding]:
+    """Run all the checks on an IR, either parsed or as the JSON text."""
+    if isinstance(ir, str):
+        ir = json.loads(ir)
+    assert isinstance(ir, dict)
+    options = options or VerifyOptions()
+    nodes = {n["id"]: n for n in ir["nodes"]}
+    checks: Iterable[Finding] = (
+        f
+        for check in (
+            _check_unreachable(ir, nodes),
+            _check_duplicates(nodes),
+            _check_sliding_windows(nodes, options),
+            _check_unbounded_latches(ir, nodes, options),
+            _check_filter_values(nodes, options),
+            _check_state_clones(nodes),
+        )
+        for f in check
+    )
+    return [f for f in checks if f.code not in options.ignore]
+
+
+def print_findings(findings: list[Finding], out: TextIO) -> None:
+    for f in findings:
+        print(f.format(), file=out)
+    print(f"# {len(findings)} findings", file=out)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m lsdl.verify",
+        description="Check the JSON IR for the performance hazards.",
+    )
+    parser.add_argument(
+        "ir", help="path to the JSON IR of the data logic, `-` for stdin"
+    )
+    parser.add_argument(
+        "--max-window-size",
+        type=int,
+        default=VerifyOptions.max_window_size,
+        help="the largest SlidingWindow size which isn't reported",
+    )
+    parser.add_argument(
+        "--max-filter-values",
+        type=int,
+        default=VerifyOptions.max_filter_values,
+        help="the most values a filter_values can compare with before it's reported",
+    )
+    parser.add_argument(
+        "--high-cardinality",
+        action="append",
+        default=[],
+        metavar="MEMBER",
+        help="an input member with many distinct values, can be repeated",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        metavar="CODE",
+        help="don't report the findings of this code, can be repeated",
+    )
+    args = parser.parse_args(argv)
+
+    if args.ir == "-":
+        ir = json.load(sys.stdin)
+    else:
+        with open(args.ir, encoding="utf-8") as fin:
+            ir = json.load(fin)
+    options = VerifyOptions(
+        max_window_size=args.max_window_size,
+        max_filter_values=args.max_filter_values,
+        high_cardinality_members=frozenset(args.high_cardinality),
+        ignore=frozenset(args.ignore),
+    )
+    findings = verify_ir(ir, options)
+    print_findings(findings, sys.stdout)
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
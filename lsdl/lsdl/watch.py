@@ -0,0 +1,261 @@
+"""Regenerate the JSON IR of the LSDL definitions in a directory whenever their sources change.
+
+Usage: `python -m lsdl.watch [options] dir`
+
+The definitions are the Python files in the directory which aren't listed as an `extra-src` of
+another file in it, e.g., `metrics-def.py` in a demo. A definition depends on itself and on its
+`# extra-src:` files, the same as for `lsdl-build`, and it's lowered again once any of them
+changes. The `lsdl` package stays imported across the runs, and every definition runs in a
+process forked from the watcher, so it starts from a fresh pipeline context. An IR file is
+replaced atomically, and only if its content changes, so the cargo builds depending on it are
+skipped otherwise. A change in the `lsdl` package itself restarts the watcher.
+"""
+
+import argparse
+import contextlib
+import importlib
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+from typing import Optional, final
+
+_EXTRA_SRC = "extra-src:"
+_LSDL_ROOT = Path(__file__).parent
+
+type _FileSignature = Optional[tuple[int, int]]
+
+
+@final
+class LoweringError(Exception):
+    pass
+
+
+def extra_sources(definition: Path) -> list[Path]:
+    """The files listed in the `# extra-src:` comments of a definition."""
+    ret: list[Path] = []
+    with open(definition, encoding="utf-8") as fin:
+        for line in fin:
+            if not line.startswith(("# ", "#\t")):
+                continue
+            body = line[2:]
+            if body.startswith(_EXTRA_SRC):
+                items = body[len(_EXTRA_SRC) :].split()
+                ret.extend(definition.parent / i for i in items)
+    return ret
+
+
+def find_definitions(source_dir: Path) -> dict[Path, set[Path]]:
+    """Map each definition in a directory to the files it depends on."""
+    sources = sorted(p.resolve() for p in source_dir.glob("*.py") if p.is_file())
+    dependencies = {s: {s, *(e.resolve() for e in extra_sources(s))} for s in sources}
+    extra = {d for s, deps in dependencies.items() for d in deps if d != s}
+    return {s: deps for s, deps in dependencies.items() if s not in extra}
+
+
+def _run_definition(definition: Path, out) -> None:
+    sys.path.insert(0, str(definition.parent))
+    sys.argv = [str(definition)]
+    with contextlib.redirect_stdout(out):
+        runpy.run_path(str(definition), run_name="__main__")
+
+
+def _lower_in_fork(definition: Path) -> str:
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = 1
+        try:
+            with os.fdopen(write_fd, "w", encoding="utf-8") as out:
+                _run_definition(definition, out)
+            status = 0
+        except SystemExit as e:
+            status = 0 if e.code in (None, 0) else 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stderr.flush()
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd, encoding="utf-8") as fin:
+        ir = fin.read()
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise LoweringError(f"Unable to lower {definition}")
+    return ir
+
+
+def _lower_in_subprocess(definition: Path) -> str:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (env.get("PYTHONPATH"), str(_LSDL_ROOT.parent)) if p
+    )
+    result = subprocess.run(
+        [sys.executable, str(definition)],
+        stdout=subprocess.PIPE,
+        encoding="utf-8",
+        env=env,
+    )
+    if result.returncode != 0:
+        raise LoweringError(f"Unable to lower {definition}")
+    return result.stdout
+
+
+def lower(definition: Path) -> str:
+    """Run a definition and return the IR it prints."""
+    if hasattr(os, "fork"):
+        return _lower_in_fork(definition)
+    return _lower_in_subprocess(definition)
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Atomically replace a file with the content, unless it has the content already."""
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except FileNotFoundError:
+        pass
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            out.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+def _signature(path: Path) -> _FileSignature:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@final
+class Watcher:
+    def __init__(
+        self,
+        source_dir: Path,
+        out_dir: Optional[Path] = None,
+        only: Optional[list[str]] = None,
+    ):
+        self._source_dir = source_dir
+        self._out_dir = out_dir or source_dir
+        self._only = set(only) if only else None
+        self._signatures: dict[Path, _FileSignature] = {}
+        self._lsdl_signatures = self._lsdl_package_signatures()
+
+    @staticmethod
+    def _lsdl_package_signatures() -> dict[Path, _FileSignature]:
+        return {p: _signature(p) for p in _LSDL_ROOT.rglob("*.py")}
+
+    def lsdl_package_changed(self) -> bool:
+        return self._lsdl_package_signatures() != self._lsdl_signatures
+
+    def out_path(self, definition: Path) -> Path:
+        return self._out_dir / definition.with_suffix(".json").name
+
+    def changed_definitions(self) -> list[Path]:
+        """The definitions which are new, or have a dependency changed since the last call."""
+        definitions = find_definitions(self._source_dir)
+        if self._only is not None:
+            definitions = {d: s for d, s in definitions.items() if d.name in self._only}
+        signatures = {p: _signature(p) for deps in definitions.values() for p in deps}
+        changed = {
+            p for p, s in signatures.items() if self._signatures.get(p, ()) != s
+        }
+        self._signatures = signatures
+        return [d for d, deps in definitions.items() if deps & changed]
+
+    def regenerate(self, definitions: list[Path]) -> bool:
+        """Lower the definitions, and return whether all of them succeeded."""
+        all_succeeded = True
+        for definition in definitions:
+            out_path = self.out_path(definition)
+            start = time.perf_counter()
+            try:
+                ir = lower(definition)
+            except LoweringError as e:
+                print(f"[lsdl.watch] {e}, keeping {out_path}", file=sys.stderr)
+                all_succeeded = False
+                continue
+            # A file which doesn't print the IR, e.g., a module imported by the definitions
+            # without being listed as an `extra-src`, isn't a definition.
+            if not ir.strip():
+                print(
+                    f"[lsdl.watch] {definition.name} printed no IR, skipped",
+                    file=sys.stderr,
+                )
+                continue
+            updated = write_if_changed(out_path, ir)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            status = "updated" if updated else "unchanged"
+            print(
+                f"[lsdl.watch] {definition.name}: {out_path} {status}",
+                f"({elapsed_ms:.0f}ms)",
+                file=sys.stderr,
+            )
+        return all_succeeded
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m lsdl.watch",
+        description="Regenerate the JSON IR of the LSDL definitions on change.",
+    )
+    parser.add_argument("dir", type=Path, help="the directory of the LSDL definitions")
+    parser.add_argument(
+        "--out-dir",
+        type=Path,
+        help="where to write the IR files, the definition directory by default",
+    )
+    parser.add_argument(
+        "--definition",
+        action="append",
+        metavar="FILE",
+        help="only watch this definition file name, can be repeated",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="seconds between checking the sources for changes",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="regenerate the IR files once and exit",
+    )
+    args = parser.parse_args(argv)
+
+    # Keep the whole package imported, so every forked run starts with it.
+    for module in ("config", "ir", "lsp_model", "measurements", "processors"):
+        importlib.import_module(f"lsdl.{module}")
+    watcher = Watcher(args.dir.resolve(), args.out_dir, args.definition)
+    if args.once:
+        return 0 if watcher.regenerate(watcher.changed_definitions()) else 1
+    print(f"[lsdl.watch] Watching {args.dir}", file=sys.stderr)
+    while True:
+        watcher.regenerate(watcher.changed_definitions())
+        time.sleep(args.interval)
+        if watcher.lsdl_package_changed():
+            print("[lsdl.watch] The lsdl package changed, restarting", file=sys.stderr)
+            restart_argv = sys.argv[1:] if argv is None else argv
+            os.execv(
+                sys.executable, [sys.executable, "-m", "lsdl.watch", *restart_argv]
+            )
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
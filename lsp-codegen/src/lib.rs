@@ -13,6 +13,54 @@ pub fn should_merge_simultaneous_moments(input: TokenStream) -> TokenStream {
     ctx.merge_simultaneous_moments().into()
 }
 
+#[proc_macro]
+pub fn checkpoint_options(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.checkpoint_options().into()
+}
+
+#[proc_macro]
+pub fn checkpoint_schedule(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.checkpoint_schedule().into()
+}
+
+#[proc_macro]
+pub fn write_final_checkpoint(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.write_final_checkpoint().into()
+}
+
+#[proc_macro]
+pub fn set_max_lookahead(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.set_max_lookahead().into()
+}
+
+#[proc_macro]
+pub fn set_internal_queue_kind(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.set_internal_queue_kind().into()
+}
+
+#[proc_macro]
+pub fn reorder_input(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.reorder_input().into()
+}
+
+#[proc_macro]
+pub fn input_decoding_options(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.input_decoding_options().into()
+}
+
+#[proc_macro]
+pub fn output_batching_options(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.output_batching_options().into()
+}
+
 #[proc_macro]
 pub fn define_input_schema(input: TokenStream) -> TokenStream {
     let ctx = syn::parse_macro_input!(input as MacroContext);
@@ -106,6 +154,18 @@ pub fn impl_should_output(input: TokenStream) -> TokenStream {
     ctx.impl_should_output().into()
 }
 
+#[proc_macro]
+pub fn define_update_group_tracker(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.define_update_group_tracker().into()
+}
+
+#[proc_macro]
+pub fn mark_updated_groups(input: TokenStream) -> TokenStream {
+    let ctx = syn::parse_macro_input!(input as MacroContext);
+    ctx.mark_updated_groups().into()
+}
+
 #[proc_macro]
 pub fn build_checkpoint(input: TokenStream) -> TokenStream {
     let ctx = syn::parse_macro_input!(input as MacroContext);
@@ -113,13 +173,6 @@ pub fn build_checkpoint(input: TokenStream) -> TokenStream {
         .into()
 }
 
-// // For debugging, output the final checkpoint after the whole iteration.
-// #[proc_macro]
-// pub fn build_debug_final_checkpoint(input: TokenStream) -> TokenStream {
-//     let ctx = parse_macro_input!(input as MacroContext);
-//     ctx.build_checkpoint(quote::quote! { ctx }).into()
-// }
-
 struct MainFnMeta {
     id: syn::Ident,
     path: syn::LitStr,
@@ -146,6 +199,10 @@ pub fn include_lsp_ir(input: TokenStream) -> TokenStream {
     if let Err(e) = MacroContext::parse_ir_file(&path) {
         return e.to_compile_error().into();
     }
+    let reader_fn_id = quote::format_ident!("{}_from_reader", id);
+    let file_fn_id = quote::format_ident!("{}_from_file", id);
+    let json_lines_fn_id = quote::format_ident!("{}_from_json_lines", id);
+    let output_fn_id = quote::format_ident!("{}_output", id);
 
     quote::quote! {
         const _ : () = { include_str!(#real_ir_path); };
@@ -164,11 +221,13 @@ pub fn include_lsp_ir(input: TokenStream) -> TokenStream {
             Inst: lsp_runtime::instrument::LspDataLogicInstrument,
         {
             use lsp_runtime::context::LspContext;
-            use lsp_runtime::checkpoint::Checkpoint;
-            let path2checkpoint = checkpoint_home.join("checkpoint.json");
-            let (context_state, input_state, entries) = std::fs::read_to_string(path2checkpoint.as_path())
-                .ok()
-                .and_then(|s| serde_json::from_str::<Checkpoint>(&s).ok())
+            use lsp_runtime::checkpoint::{Checkpoint, CheckpointStore};
+            let mut checkpoint_store = CheckpointStore::new(
+                checkpoint_home,
+                lsp_codegen::checkpoint_options!(#path),
+            );
+            let (context_state, input_state, entries) = checkpoint_store
+                .load()
                 .map_or(Default::default(), |c| {
                     let Checkpoint {
                         context_state,
@@ -191,6 +250,8 @@ pub fn include_lsp_ir(input: TokenStream) -> TokenStream {
                 .unwrap_or(Default::default());
 
             // Setup for computation context
+            let input_iter = lsp_codegen::reorder_input!(#path);
+            let reorder_stats = input_iter.stats();
             let mut ctx = LspContext::<_, InputSignalBag>::new(
                 input_iter,
                 lsp_codegen::should_merge_simultaneous_moments!(#path)
@@ -199,6 +260,13 @@ pub fn include_lsp_ir(input: TokenStream) -> TokenStream {
                 use lsp_runtime::signal_api::Patchable;
                 ctx.patch(&context_state);
             };
+            lsp_codegen::set_max_lookahead!(#path);
+            lsp_codegen::set_internal_queue_kind!(#path);
+
+            let mut checkpoint_schedule = lsp_codegen::checkpoint_schedule!(#path);
+
+            // Setup for partial updates
+            lsp_codegen::define_update_group_tracker!(#path);
 
             // Main iteration
             while let Some(moment) = ctx.next_event(&mut input_state) {
@@ -213,6 +281,7 @@ pub fn include_lsp_ir(input: TokenStream) -> TokenStream {
                 };
 
                 if moment.should_update_signals() {
+                    lsp_codegen::mark_updated_groups!(#path);
                     lsp_codegen::impl_data_logic_updates!(#path , instrument_ctx);
                     lsp_codegen::impl_signal_measurement_trigger!(#path);
                     should_measure = should_measure || __signal_trigger_fired;
@@ -234,19 +303,87 @@ pub fn include_lsp_ir(input: TokenStream) -> TokenStream {
                     instrument_ctx.data_logic_update_end();
                 }
                 // Write checkpoint
-                if update_context.offset() % 200 == 0 {
+                if checkpoint_schedule.is_due(update_context.offset(), moment.timestamp()) {
                     let checkpoint = lsp_codegen::build_checkpoint!(#path);
-                    std::fs::write(
-                        path2checkpoint.as_path(),
-                        &serde_json::to_string(&checkpoint)?,
-                    )?;
+                    checkpoint_store.save(checkpoint)?;
                 }
             }
-            // // Debug
-            // let final_checkpoint = lsp_codegen::build_debug_final_checkpoint!(#path);
-            // std::fs::write(path2checkpoint.as_path(), &serde_json::to_string(&final_checkpoint)?)?;
+            instrument_ctx.handle_lookahead_stats(ctx.lookahead_stats());
+            instrument_ctx.handle_late_input_events(reorder_stats.num_late());
+            lsp_codegen::write_final_checkpoint!(#path);
             Ok(())
         }
+
+        /// Run the data logic on the JSON lines from a reader, which are decoded as configured by
+        /// the processing policy. Malformed lines are skipped and reported to the instrument.
+        pub fn #reader_fn_id<Reader, OutputHandler, Inst>(
+            reader: Reader,
+            out_handle: OutputHandler,
+            instrument_ctx: &mut Inst,
+            checkpoint_home: &std::path::Path,
+        ) -> Result<(), anyhow::Error>
+        where
+            Reader: std::io::BufRead + Send + 'static,
+            OutputHandler: FnMut(&MetricsBag) -> Result<(), anyhow::Error>,
+            Inst: lsp_runtime::instrument::LspDataLogicInstrument,
+        {
+            let input = lsp_runtime::input::JsonLinesInput::<InputSignalBagPatch>::new(
+                reader,
+                lsp_codegen::input_decoding_options!(#path),
+            );
+            #json_lines_fn_id(input, out_handle, instrument_ctx, checkpoint_home)
+        }
+
+        /// Run the data logic on the JSON lines of a file, which is memory mapped, or read if it
+        /// isn't a regular file, and decoded as configured by the processing policy. Malformed
+        /// lines are skipped and reported to the instrument.
+        pub fn #file_fn_id<OutputHandler, Inst>(
+            path: impl AsRef<std::path::Path>,
+            out_handle: OutputHandler,
+            instrument_ctx: &mut Inst,
+            checkpoint_home: &std::path::Path,
+        ) -> Result<(), anyhow::Error>
+        where
+            OutputHandler: FnMut(&MetricsBag) -> Result<(), anyhow::Error>,
+            Inst: lsp_runtime::instrument::LspDataLogicInstrument,
+        {
+            let input = lsp_runtime::input::JsonLinesInput::<InputSignalBagPatch>::from_file(
+                path,
+                lsp_codegen::input_decoding_options!(#path),
+            )?;
+            #json_lines_fn_id(input, out_handle, instrument_ctx, checkpoint_home)
+        }
+
+        fn #json_lines_fn_id<OutputHandler, Inst>(
+            input: lsp_runtime::input::JsonLinesInput<InputSignalBagPatch>,
+            out_handle: OutputHandler,
+            instrument_ctx: &mut Inst,
+            checkpoint_home: &std::path::Path,
+        ) -> Result<(), anyhow::Error>
+        where
+            OutputHandler: FnMut(&MetricsBag) -> Result<(), anyhow::Error>,
+            Inst: lsp_runtime::instrument::LspDataLogicInstrument,
+        {
+            let input_stats = input.stats();
+            #id(input, out_handle, instrument_ctx, checkpoint_home)?;
+            instrument_ctx.handle_malformed_input_records(input_stats.num_malformed());
+            match input_stats.take_error() {
+                Some(e) => Err(e.into()),
+                None => Ok(()),
+            }
+        }
+
+        /// Create the writer of the output records as JSON lines, which batches the records as
+        /// configured by the measurement policy.
+        pub fn #output_fn_id<Writer>(writer: Writer) -> lsp_runtime::output::JsonLinesOutput<Writer>
+        where
+            Writer: std::io::Write + Send + 'static,
+        {
+            lsp_runtime::output::JsonLinesOutput::new(
+                writer,
+                lsp_codegen::output_batching_options!(#path),
+            )
+        }
     }
     .into()
 }
@@ -41,6 +41,22 @@ impl MacroContext {
         })
     }
 
+    pub(crate) fn output_batching_options(&self) -> TokenStream2 {
+        let batching = &self.get_ir_data().measurement_policy.output_batching;
+        let (buffer_bytes, writer_thread, queue_buffers) = (
+            batching.buffer_bytes,
+            batching.writer_thread,
+            batching.queue_buffers,
+        );
+        quote! {
+            lsp_runtime::output::JsonLinesOutputOptions {
+                buffer_bytes: #buffer_bytes,
+                writer_thread: #writer_thread,
+                queue_buffers: #queue_buffers,
+            }
+        }
+    }
+
     pub(crate) fn define_previous_metrics_bag(&self) -> Result<TokenStream2, syn::Error> {
         let mut definition = quote! {
             let mut _previous_metrics_bag = MetricsBag::default();
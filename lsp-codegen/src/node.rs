@@ -29,12 +29,15 @@ impl MacroContext {
         let decl_namespace: syn::Path =
             syn::parse_str(&node.namespace).map_err(self.map_lsdl_error(node))?;
         let decl_expr: syn::Expr = MacroContext::get_decl_expr(node)?;
+        // The output of a node in a non-zero update group may be kept from a previous moment, so
+        // it's an `Option` which is only `None` before the very first update.
+        let output_init = (node.update_group != 0).then(|| quote! { = None });
         let decl_code = quote! {
             let mut #node_id = {
                 use #decl_namespace;
                 #decl_expr
             };
-            let mut #output_var;
+            let mut #output_var #output_init;
         };
         Ok(decl_code)
     }
@@ -99,7 +102,14 @@ impl MacroContext {
                     }
                 }
             }
-            NodeInput::Component { id } => self.get_output_ident(*id).into_token_stream(),
+            NodeInput::Component { id } => {
+                let output_var = self.get_output_ident(*id);
+                if self.get_ir_data().nodes[*id].update_group != 0 {
+                    quote! { (*#output_var.as_ref().unwrap()) }
+                } else {
+                    output_var.into_token_stream()
+                }
+            }
             NodeInput::Tuple { values } => {
                 let mut value_code = Vec::new();
                 for value in values {
@@ -137,6 +147,12 @@ impl MacroContext {
                 )
             }
         };
+        let group_id = node.update_group;
+        let out_ref = if group_id != 0 {
+            quote! { #out_ident.as_ref().unwrap() }
+        } else {
+            quote! { &#out_ident }
+        };
         let mut before_node_update = quote!();
         let mut after_node_update = quote!();
         let node_id = node.id;
@@ -146,7 +162,7 @@ impl MacroContext {
             };
             after_node_update = quote! {
                 #inst_id . node_update_end(#node_id);
-                #inst_id . handle_node_output(&#out_ident);
+                #inst_id . handle_node_output(#out_ref);
             }
         }
         let use_stmt = if node.is_measurement {
@@ -158,6 +174,16 @@ impl MacroContext {
                 use lsp_runtime::signal_api::SignalProcessor;
             }
         };
+        if group_id != 0 {
+            return Ok(quote! {
+                if moment.should_update_group(#group_id) {
+                    #use_stmt;
+                    #before_node_update
+                    #out_ident = Some(#node_ident . update(&mut update_context, #input_expr));
+                    #after_node_update
+                }
+            });
+        }
         Ok(quote! {
             {
                 #use_stmt;
@@ -182,6 +208,60 @@ impl MacroContext {
         Ok(out)
     }
 
+    /// Declare the input clocks seen at the previous moment, which detect the changed inputs.
+    pub(crate) fn define_update_group_tracker(&self) -> TokenStream2 {
+        let input_clocks = self.update_group_input_clocks();
+        if input_clocks.is_empty() {
+            return quote! {};
+        }
+        let size = input_clocks.len();
+        // No clock can be `u64::MAX`, so all update groups are updated at the first moment.
+        quote! {
+            let mut __lsp_last_input_clocks = [u64::MAX; #size];
+        }
+    }
+
+    /// Mark the update groups depending on the inputs which are changed at this moment.
+    pub(crate) fn mark_updated_groups(&self) -> TokenStream2 {
+        let input_clocks = self.update_group_input_clocks();
+        if input_clocks.is_empty() {
+            return quote! {};
+        }
+        let clocks = input_clocks
+            .iter()
+            .map(|(clock, _)| syn::Ident::new(clock, self.span()));
+        let checks = input_clocks.iter().enumerate().map(|(idx, (_, groups))| {
+            quote! {
+                if __lsp_input_clocks[#idx] != __lsp_last_input_clocks[#idx] {
+                    updated_groups |= #groups;
+                }
+            }
+        });
+        quote! {
+            let moment = {
+                let __lsp_input_clocks = [#(input_state.#clocks),*];
+                let mut updated_groups = 0u64;
+                #(#checks)*
+                __lsp_last_input_clocks = __lsp_input_clocks;
+                moment.with_updated_groups(updated_groups)
+            };
+        }
+    }
+
+    /// The clock companions of the inputs that the update groups depend on, and for each of them,
+    /// the bit set of the groups depending on it.
+    fn update_group_input_clocks(&self) -> Vec<(String, u64)> {
+        let ir = self.get_ir_data();
+        let mut input_clocks = std::collections::BTreeMap::<String, u64>::new();
+        for group in &ir.update_groups {
+            for member in &group.input_members {
+                let clock = ir.schema.members[member].clock_companion.clone();
+                *input_clocks.entry(clock).or_default() |= 1u64 << group.id.min(u64::BITS - 1);
+            }
+        }
+        input_clocks.into_iter().collect()
+    }
+
     // The second parameter is used for debugging.
     // In generated code it can be `ctx` or `update_context`, depends on this function call site.
     pub(crate) fn build_checkpoint(&self, context: TokenStream2) -> TokenStream2 {
@@ -1,6 +1,8 @@
 use proc_macro2::TokenStream as TokenStream2;
 use quote::quote;
 
+use lsp_ir::{CheckpointCompression, CheckpointEncoding, InternalQueue};
+
 use crate::MacroContext;
 
 impl MacroContext {
@@ -11,4 +13,124 @@ impl MacroContext {
             .merge_simultaneous_moments;
         quote! { #msm }
     }
+
+    pub(crate) fn checkpoint_options(&self) -> TokenStream2 {
+        let format = &self.get_ir_data().processing_policy.checkpoint_format;
+        let encoding = match format.encoding {
+            CheckpointEncoding::Json => quote! { Json },
+            CheckpointEncoding::Compact => quote! { Compact },
+        };
+        let compression = match format.compression {
+            CheckpointCompression::None => quote! { None },
+            CheckpointCompression::Zstd => quote! { Zstd },
+        };
+        let delta = format.delta;
+        quote! {
+            lsp_runtime::checkpoint::CheckpointOptions {
+                encoding: lsp_runtime::checkpoint::CheckpointEncoding::#encoding,
+                compression: lsp_runtime::checkpoint::CheckpointCompression::#compression,
+                delta: #delta,
+            }
+        }
+    }
+
+    pub(crate) fn checkpoint_schedule(&self) -> TokenStream2 {
+        let policy = &self.get_ir_data().processing_policy.checkpoint_policy;
+        let every_events = match policy.every_events {
+            Some(n) => {
+                let n = n as usize;
+                quote! { Some(#n) }
+            }
+            None => quote! { None },
+        };
+        let every_event_time = match policy.every_event_time {
+            Some(d) => quote! { Some(#d) },
+            None => quote! { None },
+        };
+        quote! {
+            lsp_runtime::checkpoint::CheckpointSchedule::new(#every_events, #every_event_time)
+        }
+    }
+
+    pub(crate) fn write_final_checkpoint(&self) -> TokenStream2 {
+        if !self
+            .get_ir_data()
+            .processing_policy
+            .checkpoint_policy
+            .on_exit
+        {
+            return quote! {};
+        }
+        let checkpoint = self.build_checkpoint(quote! { ctx });
+        quote! {
+            let final_checkpoint = #checkpoint;
+            checkpoint_store.save(final_checkpoint)?;
+        }
+    }
+
+    pub(crate) fn set_max_lookahead(&self) -> TokenStream2 {
+        let max_lookahead = &self.get_ir_data().processing_policy.max_lookahead;
+        if max_lookahead.events.is_none() && max_lookahead.duration.is_none() {
+            return quote! {};
+        }
+        let events = match max_lookahead.events {
+            Some(n) => {
+                let n = n as usize;
+                quote! { Some(#n) }
+            }
+            None => quote! { None },
+        };
+        let duration = match max_lookahead.duration {
+            Some(d) => quote! { Some(#d) },
+            None => quote! { None },
+        };
+        quote! {
+            ctx.set_max_lookahead(#events, #duration);
+        }
+    }
+
+    pub(crate) fn set_internal_queue_kind(&self) -> TokenStream2 {
+        match self.get_ir_data().processing_policy.internal_queue {
+            InternalQueue::Heap => quote! {},
+            InternalQueue::TimerWheel { resolution, slots } => quote! {
+                ctx.set_internal_queue_kind(
+                    lsp_runtime::context::InternalQueueKind::TimerWheel {
+                        resolution: #resolution,
+                        slots: #slots,
+                    }
+                );
+            },
+        }
+    }
+
+    pub(crate) fn reorder_input(&self) -> TokenStream2 {
+        let (tolerance, max_buffered) =
+            match &self.get_ir_data().processing_policy.reorder_tolerance {
+                Some(reorder) => {
+                    let tolerance = reorder.tolerance;
+                    let max_buffered = reorder.max_buffered_events;
+                    (quote! { Some(#tolerance) }, quote! { #max_buffered })
+                }
+                None => (quote! { None }, quote! { 0 }),
+            };
+        quote! {
+            lsp_runtime::context::ReorderBuffer::new(input_iter, #tolerance, #max_buffered)
+        }
+    }
+
+    pub(crate) fn input_decoding_options(&self) -> TokenStream2 {
+        let decoding = &self.get_ir_data().processing_policy.input_decoding;
+        let (threads, batch_lines, queue_batches) = (
+            decoding.threads,
+            decoding.batch_lines,
+            decoding.queue_batches,
+        );
+        quote! {
+            lsp_runtime::input::JsonLinesOptions {
+                decoder_threads: #threads,
+                batch_lines: #batch_lines,
+                queue_batches: #queue_batches,
+            }
+        }
+    }
 }
@@ -1,25 +1,63 @@
+use std::collections::{BTreeMap, HashSet};
+
 use proc_macro2::TokenStream as TokenStream2;
-use quote::quote;
+use quote::{format_ident, quote};
 
-use lsp_ir::{EnumVariantInfo, SchemaField, SignalBehavior};
+use lsp_ir::{EnumVariantInfo, SchemaField, SessionizedField, SignalBehavior};
 
 use heck::ToUpperCamelCase;
 
 use crate::MacroContext;
 
+/// A nested object of the input events, which is decoded into a patch struct of its own, therefore
+/// the nested fields are extracted straight from the input without any flattening.
+#[derive(Default)]
+struct PatchObject<'a> {
+    fields: Vec<TokenStream2>,
+    field_keys: HashSet<&'a str>,
+    objects: BTreeMap<&'a str, (usize, PatchObject<'a>)>,
+}
+
+impl<'a> PatchObject<'a> {
+    /// Find (or create) the object at the `path`, and the ids of the objects along the path.
+    fn descend(
+        &mut self,
+        path: &[&'a str],
+        object_ids: &mut Vec<usize>,
+        next_object_id: &mut usize,
+    ) -> Result<&mut Self, String> {
+        let Some((key, rest)) = path.split_first() else {
+            return Ok(self);
+        };
+        if self.field_keys.contains(key) {
+            return Err(format!("Input key {key} can't be both a field and an object"));
+        }
+        let (id, object) = self.objects.entry(key).or_insert_with(|| {
+            *next_object_id += 1;
+            (*next_object_id, Self::default())
+        });
+        object_ids.push(*id);
+        object.descend(rest, object_ids, next_object_id)
+    }
+}
+
 impl MacroContext {
+    fn member_type(&self, id: &str, schema: &SchemaField) -> Result<syn::Type, syn::Error> {
+        if schema.enum_variants.is_empty() {
+            syn::parse_str(&schema.type_name).map_err(self.map_lsdl_error(schema))
+        } else {
+            syn::parse_str(&id.to_upper_camel_case()).map_err(self.map_lsdl_error(schema))
+        }
+    }
+
     fn expand_input_state_item(
         &self,
         id: &str,
-        schema: &SchemaField,
+        type_name: &syn::Type,
+        clock_companion: &str,
     ) -> Result<TokenStream2, syn::Error> {
         let field_id = syn::Ident::new(id, self.span());
-        let type_name: syn::Type = if schema.enum_variants.is_empty() {
-            syn::parse_str(&schema.type_name).map_err(self.map_lsdl_error(schema))?
-        } else {
-            syn::parse_str(&id.to_upper_camel_case()).map_err(self.map_lsdl_error(schema))?
-        };
-        let clock_companion = syn::Ident::new(&schema.clock_companion, self.span());
+        let clock_companion = syn::Ident::new(clock_companion, self.span());
         let item_impl = quote! {
             pub #field_id: #type_name,
             pub #clock_companion: u64,
@@ -30,15 +68,11 @@ impl MacroContext {
     fn expand_input_patch_item(
         &self,
         id: &str,
+        input_key: &str,
         schema: &SchemaField,
     ) -> Result<TokenStream2, syn::Error> {
         let field_id = syn::Ident::new(id, self.span());
-        let type_name: syn::Type = if schema.enum_variants.is_empty() {
-            syn::parse_str(&schema.type_name).map_err(self.map_lsdl_error(schema))?
-        } else {
-            syn::parse_str(&id.to_upper_camel_case()).map_err(self.map_lsdl_error(schema))?
-        };
-        let input_key = schema.input_key.as_str();
+        let type_name = self.member_type(id, schema)?;
         let item_impl = quote! {
             #[serde(rename = #input_key)]
             pub #field_id : Option<#type_name>,
@@ -46,16 +80,59 @@ impl MacroContext {
         Ok(item_impl)
     }
 
+    /// The reference to the value of a member in the patch, which doesn't take it out.
+    fn expand_input_patch_ref(&self, id: &str, object_ids: &[usize]) -> TokenStream2 {
+        let field_id = syn::Ident::new(id, self.span());
+        match object_ids.split_first() {
+            None => quote! { patch.#field_id.as_ref() },
+            Some((first, rest)) => {
+                let first = format_ident!("object_{}", first);
+                let rest = rest.iter().map(|id| format_ident!("object_{}", id));
+                quote! {
+                    patch.#first.as_ref()
+                        #(.and_then(|o| o.#rest.as_ref()))*
+                        .and_then(|o| o.#field_id.as_ref())
+                }
+            }
+        }
+    }
+
     fn expand_input_patch_code(
         &self,
         id: &str,
+        object_ids: &[usize],
         schema: &SchemaField,
+        sessionized_copies: &[(&String, &SessionizedField)],
     ) -> Result<TokenStream2, syn::Error> {
         let field_id = syn::Ident::new(id, self.span());
         let clock_companion = syn::Ident::new(&schema.clock_companion, self.span());
+        let copy_ids: Vec<_> = sessionized_copies
+            .iter()
+            .map(|(id, _)| syn::Ident::new(id, self.span()))
+            .collect();
+        let copy_clocks: Vec<_> = sessionized_copies
+            .iter()
+            .map(|(_, copy)| syn::Ident::new(&copy.clock_companion, self.span()))
+            .collect();
+        let patch_value = match object_ids.split_first() {
+            None => quote! { patch.#field_id },
+            Some((first, rest)) => {
+                let first = format_ident!("object_{}", first);
+                let rest = rest.iter().map(|id| format_ident!("object_{}", id));
+                quote! {
+                    patch.#first.as_mut()
+                        #(.and_then(|o| o.#rest.as_mut()))*
+                        .and_then(|o| o.#field_id.take())
+                }
+            }
+        };
         let if_arm = quote! {
-            if let Some(value) = patch.#field_id {
+            if let Some(value) = #patch_value {
                 self.#clock_companion += 1;
+                #(
+                    self.#copy_clocks += 1;
+                    self.#copy_ids.clone_from(&value);
+                )*
                 self.#field_id = value;
             }
         };
@@ -68,6 +145,10 @@ impl MacroContext {
                     #if_arm
                     else {
                         self.#clock_companion += 1;
+                        #(
+                            self.#copy_clocks += 1;
+                            self.#copy_ids = #default_expr;
+                        )*
                         self.#field_id = #default_expr;
                     }
                 }
@@ -76,6 +157,61 @@ impl MacroContext {
         Ok(item_impl)
     }
 
+    /// Reset all the sessionized fields when the patch brings a new value of the session key, which
+    /// is checked before any field is patched.
+    fn expand_session_reset_code(
+        &self,
+        session_key: &str,
+        session_key_ref: TokenStream2,
+        fields: &[(&String, &SessionizedField)],
+    ) -> Result<TokenStream2, syn::Error> {
+        let session_key = syn::Ident::new(session_key, self.span());
+        let mut resets = Vec::new();
+        for (id, field) in fields {
+            let field_id = syn::Ident::new(id, self.span());
+            let clock_companion = syn::Ident::new(&field.clock_companion, self.span());
+            let default_expr: syn::Expr = syn::parse_str(&field.default_expr)?;
+            resets.push(quote! {
+                self.#clock_companion += 1;
+                self.#field_id = #default_expr;
+            });
+        }
+        Ok(quote! {
+            if matches!(#session_key_ref, Some(value) if value != &self.#session_key) {
+                #(#resets)*
+            }
+        })
+    }
+
+    /// Expand the fields referring to the nested objects of `object`, and the patch struct
+    /// definitions of these objects.
+    fn expand_patch_objects(
+        &self,
+        patch_type_name: &syn::Ident,
+        object: &PatchObject,
+        struct_defs: &mut Vec<TokenStream2>,
+    ) -> Vec<TokenStream2> {
+        let mut object_fields = Vec::new();
+        for (key, (id, inner)) in &object.objects {
+            let object_type_name = format_ident!("{}Object{}", patch_type_name, id);
+            let object_field = format_ident!("object_{}", id);
+            let inner_fields = &inner.fields;
+            let inner_object_fields = self.expand_patch_objects(patch_type_name, inner, struct_defs);
+            struct_defs.push(quote! {
+                #[derive(serde::Deserialize, Clone, Debug)]
+                pub struct #object_type_name {
+                    #(#inner_fields)*
+                    #(#inner_object_fields)*
+                }
+            });
+            object_fields.push(quote! {
+                #[serde(rename = #key)]
+                #object_field: Option<#object_type_name>,
+            });
+        }
+        object_fields
+    }
+
     fn expand_enum_types(&self) -> Result<TokenStream2, syn::Error> {
         let schema = &self.get_ir_data().schema;
 
@@ -127,11 +263,55 @@ impl MacroContext {
         }
     }
 
+    /// Pick the cheapest decoder for the timestamp format declared in the input schema.
+    fn expand_timestamp_decoder(
+        &self,
+        patch_type_name: &syn::Ident,
+    ) -> Result<(String, TokenStream2), syn::Error> {
+        let schema = &self.get_ir_data().schema;
+        let decoder = match schema.patch_timestamp_format.as_deref() {
+            None => "deserialize_default",
+            Some("epoch_s") => "deserialize_epoch_s",
+            Some("epoch_ms") => "deserialize_epoch_ms",
+            Some("epoch_us") => "deserialize_epoch_us",
+            Some("epoch_ns") => "deserialize_epoch_ns",
+            Some("rfc3339") => "deserialize_rfc3339",
+            Some(format) if format.contains('%') => {
+                let decoder_impl = quote! {
+                    impl #patch_type_name {
+                        fn deserialize_timestamp<'de, D: serde::Deserializer<'de>>(
+                            deserializer: D,
+                        ) -> Result<lsp_runtime::Timestamp, D::Error> {
+                            static FORMAT: std::sync::OnceLock<lsp_runtime::input_timestamp::StrftimeFormat> =
+                                std::sync::OnceLock::new();
+                            FORMAT
+                                .get_or_init(|| lsp_runtime::input_timestamp::StrftimeFormat::new(#format))
+                                .deserialize(deserializer)
+                        }
+                    }
+                };
+                return Ok((
+                    format!("{patch_type_name}::deserialize_timestamp"),
+                    decoder_impl,
+                ));
+            }
+            Some(format) => {
+                return Err(syn::Error::new(
+                    self.span(),
+                    format!("Unsupported timestamp format: {format}"),
+                ))
+            }
+        };
+        Ok((
+            format!("lsp_runtime::input_timestamp::{decoder}"),
+            quote! {},
+        ))
+    }
+
     pub(super) fn expand_input_state_bag(&self) -> Result<TokenStream2, syn::Error> {
         let schema = &self.get_ir_data().schema;
         let span = &self.span();
         let mut item_impls = Vec::new();
-        let mut diff_item_impls = Vec::new();
         let mut patch_code_impls = Vec::new();
         let type_name = syn::Ident::new(&schema.type_name, *span);
         let patch_type_name = syn::Ident::new(&format!("{}Patch", schema.type_name), *span);
@@ -143,12 +323,100 @@ impl MacroContext {
         let input_state_bag_clock_update_item = quote! { self.#input_state_bag_clock += 1; };
         patch_code_impls.push(input_state_bag_clock_update_item);
 
+        let sessionized_fields: Vec<(&String, &SessionizedField)> = schema
+            .sessionization
+            .iter()
+            .flat_map(|s| s.fields.iter())
+            .collect();
+        for (id, field) in &sessionized_fields {
+            let source = schema.members.get(&field.source).ok_or_else(|| {
+                let msg = format!("The source of {id} isn't an input member");
+                syn::Error::new(*span, msg)
+            })?;
+            let type_name = self.member_type(&field.source, source)?;
+            item_impls.push(self.expand_input_state_item(
+                id,
+                &type_name,
+                &field.clock_companion,
+            )?);
+        }
+        let mut session_key_ref = None;
+
+        let mut patch_root = PatchObject::default();
+        let mut next_object_id = 0;
         for (id, field) in &schema.members {
-            item_impls.push(self.expand_input_state_item(id, field)?);
-            diff_item_impls.push(self.expand_input_patch_item(id, field)?);
-            patch_code_impls.push(self.expand_input_patch_code(id, field)?);
+            let type_name = self.member_type(id, field)?;
+            item_impls.push(self.expand_input_state_item(
+                id,
+                &type_name,
+                &field.clock_companion,
+            )?);
+            if field.unused {
+                // The patch type doesn't have this field, and serde skips the value of an unknown
+                // key without decoding it.
+                continue;
+            }
+            let input_path: Vec<&str> = if field.input_path.is_empty() {
+                vec![&field.input_key]
+            } else {
+                field.input_path.iter().map(String::as_str).collect()
+            };
+            let (input_key, object_path) = input_path.split_last().expect("non-empty input path");
+            let mut object_ids = Vec::new();
+            let object = patch_root
+                .descend(object_path, &mut object_ids, &mut next_object_id)
+                .map_err(|msg| syn::Error::new(*span, msg))
+                .map_err(self.map_lsdl_error(field))?;
+            if object.objects.contains_key(input_key) {
+                let msg = format!("Input key {input_key} can't be both a field and an object");
+                return Err(self.map_lsdl_error(field)(syn::Error::new(*span, msg)));
+            }
+            object.field_keys.insert(input_key);
+            object
+                .fields
+                .push(self.expand_input_patch_item(id, input_key, field)?);
+            if schema.sessionization.as_ref().map(|s| &s.session_key) == Some(id) {
+                session_key_ref = Some(self.expand_input_patch_ref(id, &object_ids));
+            }
+            let sessionized_copies: Vec<_> = sessionized_fields
+                .iter()
+                .copied()
+                .filter(|(_, f)| &f.source == id)
+                .collect();
+            patch_code_impls.push(self.expand_input_patch_code(
+                id,
+                &object_ids,
+                field,
+                &sessionized_copies,
+            )?);
+        }
+        if let Some(sessionization) = &schema.sessionization {
+            let Some(session_key_ref) = session_key_ref else {
+                let msg = format!(
+                    "The session key {} isn't an input member",
+                    sessionization.session_key
+                );
+                return Err(syn::Error::new(*span, msg));
+            };
+            // Right after the clock of the input signal bag itself, before any field is patched.
+            patch_code_impls.insert(
+                1,
+                self.expand_session_reset_code(
+                    &sessionization.session_key,
+                    session_key_ref,
+                    &sessionized_fields,
+                )?,
+            );
         }
+        let mut object_defs = Vec::new();
+        let object_fields =
+            self.expand_patch_objects(&patch_type_name, &patch_root, &mut object_defs);
+        let diff_item_impls = patch_root.fields.iter().chain(&object_fields);
+        // Nested values are taken out of the nested patch objects.
+        let patch_mutability = (!object_fields.is_empty()).then(|| quote! { mut });
         let timestamp_key = &schema.patch_timestamp_key;
+        let (timestamp_decoder, timestamp_decoder_impl) =
+            self.expand_timestamp_decoder(&patch_type_name)?;
         let measure_at_event_filter: syn::Expr = {
             let predicate = &self
                 .get_ir_data()
@@ -180,21 +448,20 @@ impl MacroContext {
             }
             #[derive(serde::Deserialize, Clone, Debug)]
             pub struct #patch_type_name {
-                #[serde(rename = #timestamp_key)]
-                timestamp: chrono::DateTime<chrono::Utc>,
+                #[serde(rename = #timestamp_key, deserialize_with = #timestamp_decoder)]
+                timestamp: lsp_runtime::Timestamp,
                 #(#diff_item_impls)*
             }
+            #(#object_defs)*
+            #timestamp_decoder_impl
             impl lsp_runtime::context::WithTimestamp for #patch_type_name {
                 fn timestamp(&self) -> lsp_runtime::Timestamp {
                     self.timestamp
-                        .timestamp_nanos_opt()
-                        .expect("value can not be represented in a timestamp with nanosecond precision.")
-                        as lsp_runtime::Timestamp
                 }
             }
             impl lsp_runtime::context::InputSignalBag for #type_name {
                 type Input = #patch_type_name;
-                fn patch(&mut self, patch: #patch_type_name) {
+                fn patch(&mut self, #patch_mutability patch: #patch_type_name) {
                     #(#patch_code_impls)*
                 }
                 fn should_measure(&mut self) -> bool {
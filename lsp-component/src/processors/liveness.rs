@@ -3,7 +3,7 @@ use std::marker::PhantomData;
 
 use serde::Serialize;
 
-use lsp_runtime::context::{UpdateContext, WithTimestamp};
+use lsp_runtime::context::{LookaheadIndex, UpdateContext, WithTimestamp};
 use lsp_runtime::signal_api::{Patchable, SignalProcessor};
 use lsp_runtime::{Duration, Timestamp};
 
@@ -13,6 +13,10 @@ use lsp_runtime::{Duration, Timestamp};
 /// The liveness defined as we can find a heartbeat event within `expiration_period` amount of time.
 /// Thus, this operator uses the look ahead mechanism of the LSP system to see if there's a future
 /// heartbeat event.
+///
+/// The upcoming heartbeat event is searched through a [LookaheadIndex], so every event is only
+/// tested once. The checkers created by [LivenessChecker::with_shared_index] with the same index id
+/// share the search, therefore they must use the same `is_liveness_event`.
 #[derive(Serialize, Patchable)]
 pub struct LivenessChecker<IsLivenessEventFunc, Clock, Event> {
     #[serde(skip)]
@@ -21,6 +25,10 @@ pub struct LivenessChecker<IsLivenessEventFunc, Clock, Event> {
     last_event_clock: Clock,
     last_event_timestamp: Timestamp,
     #[serde(skip)]
+    shared_index_id: Option<usize>,
+    #[serde(skip)]
+    index: LookaheadIndex,
+    #[serde(skip)]
     _phantom_data: PhantomData<Event>,
 }
 
@@ -34,9 +42,25 @@ impl<F, C: Default, E> LivenessChecker<F, C, E> {
             expiration_period,
             last_event_clock: Default::default(),
             last_event_timestamp: Default::default(),
+            shared_index_id: None,
+            index: Default::default(),
             _phantom_data: PhantomData,
         }
     }
+
+    pub fn with_shared_index(
+        is_liveness_event: F,
+        expiration_period: Duration,
+        index_id: usize,
+    ) -> Self
+    where
+        F: FnMut(&E) -> bool,
+    {
+        Self {
+            shared_index_id: Some(index_id),
+            ..Self::new(is_liveness_event, expiration_period)
+        }
+    }
 }
 
 impl<F, C: Debug, E: Debug> Debug for LivenessChecker<F, C, E> {
@@ -70,12 +94,17 @@ where
 
         let look_ahead_cutoff = self.last_event_timestamp + self.expiration_period;
 
-        ctx.peek_fold(false, |v, e| {
-            if *v || e.timestamp() >= look_ahead_cutoff {
-                return None;
+        let next_liveness_event = match self.shared_index_id {
+            Some(index_id) => {
+                ctx.peek_next_match_shared(index_id, look_ahead_cutoff, &mut self.is_liveness_event)
             }
-            Some((self.is_liveness_event)(e))
-        })
+            None => ctx.peek_next_match(
+                &mut self.index,
+                look_ahead_cutoff,
+                &mut self.is_liveness_event,
+            ),
+        };
+        next_liveness_event.is_some()
     }
 }
 
@@ -133,6 +162,36 @@ mod test {
             assert_eq!(value, output.next().unwrap())
         }
 
+        // The checkers sharing an index give the same answers.
+        let mut context = create_lsp_context_for_test_from_input(&input);
+        let mut checkers = [3, 6, 9].map(|expiration_period| {
+            LivenessChecker::<_, _, TestSignalInput<_>>::with_shared_index(
+                |data| data.value > 0,
+                expiration_period,
+                0,
+            )
+        });
+        let mut own_index_checkers = [3, 6, 9].map(|expiration_period| {
+            LivenessChecker::<_, _, TestSignalInput<_>>::new(
+                |data| data.value > 0,
+                expiration_period,
+            )
+        });
+        let mut input_state = TestSignalBag::default();
+        let mut latch_output = 0;
+        while let Some(m) = context.next_event(&mut input_state) {
+            if input_state.value > 0 {
+                latch_output = m.timestamp();
+            }
+            let mut ctx = context.borrow_update_context();
+            for (shared, own) in checkers.iter_mut().zip(own_index_checkers.iter_mut()) {
+                assert_eq!(
+                    shared.update(&mut ctx, &latch_output),
+                    own.update(&mut ctx, &latch_output)
+                );
+            }
+        }
+
         let state = liveness.to_state();
         let mut init_liveness =
             LivenessChecker::<_, Timestamp, TestSignalInput<i32>>::new(|data| data.value > 0, 6);
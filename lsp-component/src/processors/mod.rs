@@ -4,6 +4,7 @@ mod generator;
 mod latches;
 mod liveness;
 mod mapper;
+mod prior_value;
 mod sliding_window;
 mod state_machine;
 
@@ -13,5 +14,6 @@ pub use generator::{SignalFunc, SignalGenerator};
 pub use latches::{EdgeTriggeredLatch, LevelTriggeredLatch};
 pub use liveness::LivenessChecker;
 pub use mapper::SignalMapper;
+pub use prior_value::PriorValue;
 pub use sliding_window::{SlidingTimeWindow, SlidingWindow};
 pub use state_machine::StateMachine;
@@ -0,0 +1,81 @@
+use serde::Serialize;
+
+use lsp_runtime::context::UpdateContext;
+use lsp_runtime::signal_api::{Patchable, SignalProcessor};
+
+/// The value of a signal before the last change of the clock, within the current scope.
+///
+/// The current and the prior values are kept in place: when the clock changes, the buffers are
+/// swapped and the new value is cloned into the buffer of the oldest one, so a value, e.g., a
+/// `String`, is only cloned once when it arrives. When the scope changes, both of them are reset
+/// to the default value.
+#[derive(Default, Debug, Serialize, Patchable)]
+pub struct PriorValue<Scope, Clock, Data> {
+    last_scope: Scope,
+    last_clock: Clock,
+    current: Data,
+    prior: Data,
+}
+
+impl<'a, I, S, C, D> SignalProcessor<'a, I> for PriorValue<S, C, D>
+where
+    I: Iterator,
+    S: Clone + PartialEq,
+    C: Clone + PartialEq,
+    D: Clone + Default,
+{
+    type Input = (S, C, D);
+
+    type Output = D;
+
+    #[inline(always)]
+    fn update(
+        &mut self,
+        _: &mut UpdateContext<I>,
+        (scope, clock, data): &'a Self::Input,
+    ) -> Self::Output {
+        if &self.last_scope != scope {
+            self.last_scope = scope.clone();
+            self.current = D::default();
+            self.prior = D::default();
+        }
+        if &self.last_clock != clock {
+            self.last_clock = clock.clone();
+            std::mem::swap(&mut self.current, &mut self.prior);
+            self.current.clone_from(data);
+        }
+        self.prior.clone()
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use lsp_runtime::signal_api::{Patchable, SignalProcessor};
+
+    use crate::test::create_lsp_context_for_test;
+
+    use super::PriorValue;
+
+    #[test]
+    fn test_prior_value() {
+        let mut prior_value = PriorValue::default();
+        let mut ctx = create_lsp_context_for_test();
+        let mut uc = ctx.borrow_update_context();
+
+        let s = |v: &str| v.to_string();
+        assert_eq!("", prior_value.update(&mut uc, &(0, 0, s("a"))));
+        assert_eq!("", prior_value.update(&mut uc, &(0, 1, s("a"))));
+        assert_eq!("", prior_value.update(&mut uc, &(0, 1, s("b"))));
+        assert_eq!("a", prior_value.update(&mut uc, &(0, 2, s("b"))));
+        assert_eq!("b", prior_value.update(&mut uc, &(0, 3, s("c"))));
+        // A new scope forgets the values of the previous one.
+        assert_eq!("", prior_value.update(&mut uc, &(1, 3, s("c"))));
+        assert_eq!("", prior_value.update(&mut uc, &(1, 4, s("d"))));
+        assert_eq!("d", prior_value.update(&mut uc, &(1, 5, s("e"))));
+
+        let state = prior_value.to_state();
+        let mut init_prior_value = PriorValue::<i32, i32, String>::default();
+        init_prior_value.patch(&state);
+        assert_eq!(state, init_prior_value.to_state());
+    }
+}
@@ -35,17 +35,46 @@ pub struct SchemaField {
     pub enum_variants: Vec<EnumVariantInfo>,
     pub clock_companion: String,
     pub input_key: String,
+    /// The keys from the root of an input event to a nested field, empty for a top-level field.
+    #[serde(default)]
+    pub input_path: Vec<String>,
+    /// No node or metric uses this field, therefore its input key is skipped when decoding inputs.
+    #[serde(default)]
+    pub unused: bool,
     #[serde(default)]
     pub signal_behavior: SignalBehavior,
     #[serde(default)]
     pub debug_info: Option<DebugInfo>,
 }
 
+#[derive(Deserialize, Serialize, Clone)]
+pub struct SessionizedField {
+    /// The member whose value is copied into this field, while the session lasts.
+    pub source: String,
+    pub clock_companion: String,
+    /// The value of this field from the start of a session until the source is updated.
+    pub default_expr: String,
+}
+
+/// The sessionized fields kept by the input signal bag, which are all reset at once when a patch
+/// brings a new value of the session key.
+#[derive(Deserialize, Serialize, Clone)]
+pub struct Sessionization {
+    pub session_key: String,
+    pub fields: HashMap<String, SessionizedField>,
+}
+
 #[derive(Deserialize, Serialize, Clone)]
 pub struct Schema {
     pub type_name: String,
     pub patch_timestamp_key: String,
+    /// One of `epoch_s`, `epoch_ms`, `epoch_us`, `epoch_ns`, `rfc3339` or a `strftime` format.
+    /// Any string chrono can parse as a `DateTime<Utc>` is accepted if it's not given.
+    #[serde(default)]
+    pub patch_timestamp_format: Option<String>,
     pub members: HashMap<String, SchemaField>,
+    #[serde(default)]
+    pub sessionization: Option<Sessionization>,
 }
 
 #[derive(Deserialize, Serialize, Clone)]
@@ -68,6 +97,15 @@ pub struct Node {
     pub namespace: String,
     #[serde(default)]
     pub debug_info: Option<DebugInfo>,
+    /// The nodes out of the group 0 are only updated when some input they depend on changes.
+    #[serde(default)]
+    pub update_group: u32,
+}
+
+#[derive(Deserialize, Serialize, Clone)]
+pub struct UpdateGroup {
+    pub id: u32,
+    pub input_members: Vec<String>,
 }
 
 #[derive(Deserialize, Serialize, Clone)]
@@ -118,9 +156,181 @@ fn default_measure_left_side_limit_signal() -> NodeInput {
     }
 }
 
+#[derive(Deserialize, Serialize, Clone, Copy, Default)]
+#[serde(rename_all = "snake_case")]
+pub enum CheckpointEncoding {
+    #[default]
+    Json,
+    Compact,
+}
+
+#[derive(Deserialize, Serialize, Clone, Copy, Default)]
+#[serde(rename_all = "snake_case")]
+pub enum CheckpointCompression {
+    #[default]
+    None,
+    Zstd,
+}
+
+#[derive(Deserialize, Serialize, Clone, Default)]
+pub struct CheckpointFormat {
+    #[serde(default)]
+    pub encoding: CheckpointEncoding,
+    #[serde(default)]
+    pub compression: CheckpointCompression,
+    /// Only write the node states changed since the previous checkpoint.
+    #[serde(default)]
+    pub delta: bool,
+}
+
+fn default_checkpoint_every_events() -> Option<u64> {
+    Some(200)
+}
+
+#[derive(Deserialize, Serialize, Clone)]
+pub struct CheckpointPolicy {
+    /// Write a checkpoint every this number of input events.
+    #[serde(default = "default_checkpoint_every_events")]
+    pub every_events: Option<u64>,
+    /// Write a checkpoint every this duration of event time, in nanoseconds.
+    #[serde(default)]
+    pub every_event_time: Option<u64>,
+    /// Write a checkpoint when the input is exhausted.
+    #[serde(default)]
+    pub on_exit: bool,
+}
+
+impl Default for CheckpointPolicy {
+    fn default() -> Self {
+        Self {
+            every_events: default_checkpoint_every_events(),
+            every_event_time: None,
+            on_exit: false,
+        }
+    }
+}
+
+/// The bounds of how far the components can look ahead in the input, unbounded if not given.
+#[derive(Deserialize, Serialize, Clone, Default)]
+pub struct MaxLookahead {
+    #[serde(default)]
+    pub events: Option<u64>,
+    /// In nanoseconds.
+    #[serde(default)]
+    pub duration: Option<u64>,
+}
+
+fn default_input_batch_lines() -> usize {
+    1024
+}
+
+fn default_input_queue_batches() -> usize {
+    16
+}
+
+/// How the driver reading the input decodes the JSON lines.
+#[derive(Deserialize, Serialize, Clone)]
+pub struct InputDecoding {
+    /// The number of decoder threads, 0 decodes the input on the data logic thread.
+    #[serde(default)]
+    pub threads: usize,
+    #[serde(default = "default_input_batch_lines")]
+    pub batch_lines: usize,
+    #[serde(default = "default_input_queue_batches")]
+    pub queue_batches: usize,
+}
+
+impl Default for InputDecoding {
+    fn default() -> Self {
+        Self {
+            threads: 0,
+            batch_lines: default_input_batch_lines(),
+            queue_batches: default_input_queue_batches(),
+        }
+    }
+}
+
+fn default_timer_wheel_resolution() -> u64 {
+    1_000_000
+}
+
+fn default_timer_wheel_slots() -> usize {
+    1024
+}
+
+/// The data structure of the internal event queue.
+#[derive(Deserialize, Serialize, Clone, Default)]
+#[serde(rename_all = "snake_case", tag = "kind")]
+pub enum InternalQueue {
+    #[default]
+    Heap,
+    TimerWheel {
+        /// The time covered by a slot, in nanoseconds.
+        #[serde(default = "default_timer_wheel_resolution")]
+        resolution: u64,
+        #[serde(default = "default_timer_wheel_slots")]
+        slots: usize,
+    },
+}
+
+fn default_reorder_max_buffered_events() -> usize {
+    1_000_000
+}
+
+/// How out of order the input events can be, they are sorted in a bounded buffer.
+#[derive(Deserialize, Serialize, Clone)]
+pub struct ReorderTolerance {
+    /// In nanoseconds.
+    pub tolerance: u64,
+    #[serde(default = "default_reorder_max_buffered_events")]
+    pub max_buffered_events: usize,
+}
+
 #[derive(Deserialize, Serialize, Clone)]
 pub struct ProcessingPolicy {
     pub merge_simultaneous_moments: bool,
+    #[serde(default)]
+    pub checkpoint_format: CheckpointFormat,
+    #[serde(default)]
+    pub checkpoint_policy: CheckpointPolicy,
+    #[serde(default)]
+    pub max_lookahead: MaxLookahead,
+    #[serde(default)]
+    pub input_decoding: InputDecoding,
+    #[serde(default)]
+    pub reorder_tolerance: Option<ReorderTolerance>,
+    #[serde(default)]
+    pub internal_queue: InternalQueue,
+}
+
+fn default_output_buffer_bytes() -> usize {
+    64 * 1024
+}
+
+fn default_output_queue_buffers() -> usize {
+    4
+}
+
+/// How the output records are batched before they are written.
+#[derive(Deserialize, Serialize, Clone)]
+pub struct OutputBatching {
+    #[serde(default = "default_output_buffer_bytes")]
+    pub buffer_bytes: usize,
+    /// Write the batches on a dedicated thread.
+    #[serde(default)]
+    pub writer_thread: bool,
+    #[serde(default = "default_output_queue_buffers")]
+    pub queue_buffers: usize,
+}
+
+impl Default for OutputBatching {
+    fn default() -> Self {
+        Self {
+            buffer_bytes: default_output_buffer_bytes(),
+            writer_thread: false,
+            queue_buffers: default_output_queue_buffers(),
+        }
+    }
 }
 
 #[derive(Deserialize, Serialize, Clone)]
@@ -135,6 +345,8 @@ pub struct MeasurementPolicy {
     pub output_control_measurement_ids: Vec<usize>,
     pub output_schema: HashMap<String, MetricSpec>,
     pub complementary_output_config: Option<ComplementaryOutputConfig>,
+    #[serde(default)]
+    pub output_batching: OutputBatching,
 }
 
 #[derive(Deserialize, Serialize, Clone)]
@@ -143,6 +355,8 @@ pub struct LspIr {
     pub nodes: Vec<Node>,
     pub processing_policy: ProcessingPolicy,
     pub measurement_policy: MeasurementPolicy,
+    #[serde(default)]
+    pub update_groups: Vec<UpdateGroup>,
 }
 
 impl LspIr {
@@ -49,6 +49,14 @@ fn visualize_lsp_ir<R: Read>(reader: R) -> Result<(), Error> {
             name = tn.clock_companion
         )?;
     }
+    for (name, field) in ir.schema.sessionization.iter().flat_map(|s| &s.fields) {
+        write!(&mut schema_node, "<{name}>{name}|", name = name)?;
+        write!(
+            &mut schema_node,
+            "<{name}>&lt;clk&gt;|",
+            name = field.clock_companion
+        )?;
+    }
     schema_node.pop();
 
     println!(
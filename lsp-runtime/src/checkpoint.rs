@@ -1,5 +1,13 @@
 use serde::{Deserialize, Serialize};
-use std::collections::HashMap;
+use serde_json::value::RawValue;
+
+use crate::{Duration, Timestamp};
+use std::{
+    collections::HashMap,
+    fs::{self, File, OpenOptions},
+    io::{self, BufReader, Read, Write},
+    path::{Path, PathBuf},
+};
 
 #[derive(Default, Deserialize, Serialize)]
 pub struct Checkpoint {
@@ -7,3 +15,423 @@ pub struct Checkpoint {
     pub input_state: String,   // serialize generated `InputSignalBag`
     pub entries: HashMap<usize, String>,
 }
+
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub enum CheckpointEncoding {
+    /// A JSON document whose states are JSON strings, i.e. the original `checkpoint.json`.
+    #[default]
+    Json,
+    /// A single JSON document which embeds the states as they are, so nothing is encoded twice.
+    Compact,
+}
+
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub enum CheckpointCompression {
+    #[default]
+    None,
+    Zstd,
+}
+
+#[derive(Clone, Copy, Debug, Default)]
+pub struct CheckpointOptions {
+    pub encoding: CheckpointEncoding,
+    pub compression: CheckpointCompression,
+    /// Only write the node states changed since the previous checkpoint to an appended log.
+    /// This only applies to the compact encoding.
+    pub delta: bool,
+}
+
+/// Decides the moments at which a checkpoint is written.
+///
+/// A checkpoint is due when the input offset crosses a multiple of `every_events`, or when the
+/// event time crosses a multiple of `every_event_time`, since the last checkpoint. The moments
+/// following a checkpoint at the same offset are checkpointed as well, like the original cadence
+/// did while the offset stayed on a multiple, so the last checkpoint of a run holds its final
+/// state, and a restart doesn't replay the moments after the last input event.
+pub struct CheckpointSchedule {
+    every_events: Option<usize>,
+    every_event_time: Option<Duration>,
+    last: Option<(usize, Timestamp)>,
+    last_saved_offset: Option<usize>,
+}
+
+impl CheckpointSchedule {
+    pub fn new(every_events: Option<usize>, every_event_time: Option<Duration>) -> Self {
+        Self {
+            every_events: every_events.filter(|&n| n > 0),
+            every_event_time: every_event_time.filter(|&d| d > 0),
+            last: None,
+            last_saved_offset: None,
+        }
+    }
+
+    pub fn is_due(&mut self, offset: usize, timestamp: Timestamp) -> bool {
+        let crossed = match self.last {
+            // The original cadence, a checkpoint at every multiple of `every_events`.
+            None => self.every_events.is_some_and(|n| offset % n == 0),
+            Some((last_offset, last_timestamp)) => {
+                self.every_events
+                    .is_some_and(|n| offset / n > last_offset / n)
+                    || self
+                        .every_event_time
+                        .is_some_and(|d| timestamp / d > last_timestamp / d)
+            }
+        };
+        if crossed || self.last.is_none() {
+            self.last = Some((offset, timestamp));
+        }
+        if crossed {
+            self.last_saved_offset = Some(offset);
+        }
+        crossed || self.last_saved_offset == Some(offset)
+    }
+}
+
+/// A full checkpoint is written after this number of delta checkpoints, which truncates the log.
+const MAX_DELTAS_PER_FULL_CHECKPOINT: usize = 32;
+
+const ZSTD_LEVEL: i32 = 3;
+
+/// The compact checkpoint document, a delta checkpoint only contains the changed entries.
+#[derive(Deserialize)]
+struct CompactCheckpoint {
+    seq: u64,
+    context_state: Box<RawValue>,
+    input_state: Box<RawValue>,
+    entries: HashMap<usize, Box<RawValue>>,
+}
+
+/// Reads and writes the checkpoints of a LSP data logic under its checkpoint home.
+pub struct CheckpointStore {
+    home: PathBuf,
+    options: CheckpointOptions,
+    seq: u64,
+    num_deltas: usize,
+    // The entries of the last written checkpoint, which delta checkpoints are compared against.
+    last_entries: Option<HashMap<usize, String>>,
+}
+
+impl CheckpointStore {
+    pub fn new(home: &Path, options: CheckpointOptions) -> Self {
+        Self {
+            home: home.to_path_buf(),
+            options,
+            seq: 0,
+            num_deltas: 0,
+            last_entries: None,
+        }
+    }
+
+    fn uses_delta(&self) -> bool {
+        self.options.delta && self.options.encoding == CheckpointEncoding::Compact
+    }
+
+    fn file_path(&self, name: &str) -> PathBuf {
+        match self.options.compression {
+            CheckpointCompression::None => self.home.join(name),
+            CheckpointCompression::Zstd => self.home.join(format!("{name}.zst")),
+        }
+    }
+
+    fn base_path(&self) -> PathBuf {
+        match self.options.encoding {
+            CheckpointEncoding::Json => self.file_path("checkpoint.json"),
+            CheckpointEncoding::Compact => self.file_path("checkpoint.compact.json"),
+        }
+    }
+
+    fn delta_log_path(&self) -> PathBuf {
+        self.file_path("checkpoint.delta.jsonl")
+    }
+
+    /// Read a checkpoint file, and tell whether it's intact.
+    fn read(&self, path: &Path) -> io::Result<(Vec<u8>, bool)> {
+        let mut buf = Vec::new();
+        let file = File::open(path)?;
+        match self.options.compression {
+            CheckpointCompression::None => {
+                BufReader::new(file).read_to_end(&mut buf)?;
+                Ok((buf, true))
+            }
+            CheckpointCompression::Zstd => {
+                // A torn frame at the end of the delta log is dropped, and the complete frames
+                // before it are kept.
+                match zstd::Decoder::new(file)?.read_to_end(&mut buf) {
+                    Ok(_) => Ok((buf, true)),
+                    Err(e) if buf.is_empty() => Err(e),
+                    Err(_) => Ok((buf, false)),
+                }
+            }
+        }
+    }
+
+    fn compress(&self, data: Vec<u8>) -> io::Result<Vec<u8>> {
+        match self.options.compression {
+            CheckpointCompression::None => Ok(data),
+            CheckpointCompression::Zstd => zstd::encode_all(data.as_slice(), ZSTD_LEVEL),
+        }
+    }
+
+    /// Load the latest checkpoint, if there's any readable one.
+    pub fn load(&mut self) -> Option<Checkpoint> {
+        let (data, _) = self.read(&self.base_path()).ok()?;
+        let mut checkpoint = match self.options.encoding {
+            CheckpointEncoding::Json => serde_json::from_slice::<Checkpoint>(&data).ok()?,
+            CheckpointEncoding::Compact => {
+                let doc = serde_json::from_slice::<CompactCheckpoint>(&data).ok()?;
+                self.seq = doc.seq;
+                let mut checkpoint = Checkpoint::default();
+                apply_compact(&mut checkpoint, doc);
+                checkpoint
+            }
+        };
+        if self.uses_delta() {
+            if let Ok((log, mut intact)) = self.read(&self.delta_log_path()) {
+                for line in log.split(|&b| b == b'\n').filter(|line| !line.is_empty()) {
+                    // Stop at a torn record, or at a gap which means the log is stale.
+                    let Ok(doc) = serde_json::from_slice::<CompactCheckpoint>(line) else {
+                        intact = false;
+                        break;
+                    };
+                    if doc.seq <= self.seq {
+                        continue;
+                    }
+                    if doc.seq != self.seq + 1 {
+                        intact = false;
+                        break;
+                    }
+                    self.seq = doc.seq;
+                    self.num_deltas += 1;
+                    apply_compact(&mut checkpoint, doc);
+                }
+                if !intact {
+                    // Nothing appended after the broken part could be read, so the next
+                    // checkpoint is a full one, which starts a new log.
+                    self.num_deltas = MAX_DELTAS_PER_FULL_CHECKPOINT;
+                }
+            }
+            self.last_entries = Some(checkpoint.entries.clone());
+        }
+        Some(checkpoint)
+    }
+
+    /// Write a checkpoint, either fully or as a delta of the previous one.
+    pub fn save(&mut self, checkpoint: Checkpoint) -> io::Result<()> {
+        if self.options.encoding == CheckpointEncoding::Json {
+            return self.write_base(serde_json::to_vec(&checkpoint)?);
+        }
+        self.seq += 1;
+        let delta_base = self
+            .last_entries
+            .take()
+            .filter(|_| self.uses_delta() && self.num_deltas < MAX_DELTAS_PER_FULL_CHECKPOINT);
+        match delta_base {
+            Some(last_entries) => {
+                let mut changed: Vec<_> = checkpoint
+                    .entries
+                    .iter()
+                    .filter(|(k, v)| last_entries.get(k) != Some(*v))
+                    .collect();
+                changed.sort_unstable_by_key(|(k, _)| **k);
+                let mut data = encode_compact(self.seq, &checkpoint, changed);
+                data.push(b'\n');
+                let data = self.compress(data)?;
+                OpenOptions::new()
+                    .create(true)
+                    .append(true)
+                    .open(self.delta_log_path())?
+                    .write_all(&data)?;
+                self.num_deltas += 1;
+            }
+            None => {
+                let mut entries: Vec<_> = checkpoint.entries.iter().collect();
+                entries.sort_unstable_by_key(|(k, _)| **k);
+                self.write_base(encode_compact(self.seq, &checkpoint, entries))?;
+                if self.uses_delta() {
+                    // The log is stale now, its records are skipped by their sequence numbers
+                    // if this removal doesn't happen.
+                    match fs::remove_file(self.delta_log_path()) {
+                        Err(e) if e.kind() != io::ErrorKind::NotFound => return Err(e),
+                        _ => {}
+                    }
+                }
+                self.num_deltas = 0;
+            }
+        }
+        if self.uses_delta() {
+            self.last_entries = Some(checkpoint.entries);
+        }
+        Ok(())
+    }
+
+    /// Replace the full checkpoint, so a crash never leaves a partially written one.
+    fn write_base(&self, data: Vec<u8>) -> io::Result<()> {
+        let path = self.base_path();
+        let mut tmp_path = path.clone().into_os_string();
+        tmp_path.push(".tmp");
+        fs::write(&tmp_path, self.compress(data)?)?;
+        fs::rename(&tmp_path, &path)
+    }
+}
+
+fn apply_compact(checkpoint: &mut Checkpoint, doc: CompactCheckpoint) {
+    checkpoint.context_state = doc.context_state.get().to_string();
+    checkpoint.input_state = doc.input_state.get().to_string();
+    checkpoint.entries.extend(
+        doc.entries
+            .into_iter()
+            .map(|(k, v)| (k, v.get().to_string())),
+    );
+}
+
+fn encode_compact(seq: u64, checkpoint: &Checkpoint, entries: Vec<(&usize, &String)>) -> Vec<u8> {
+    // The states are already JSON, they are embedded verbatim.
+    let size = entries.iter().map(|(_, v)| v.len() + 24).sum::<usize>()
+        + checkpoint.context_state.len()
+        + checkpoint.input_state.len()
+        + 64;
+    let mut buf = Vec::with_capacity(size);
+    buf.extend_from_slice(format!("{{\"seq\":{seq},\"context_state\":").as_bytes());
+    buf.extend_from_slice(checkpoint.context_state.as_bytes());
+    buf.extend_from_slice(b",\"input_state\":");
+    buf.extend_from_slice(checkpoint.input_state.as_bytes());
+    buf.extend_from_slice(b",\"entries\":{");
+    for (idx, (key, state)) in entries.into_iter().enumerate() {
+        if idx > 0 {
+            buf.push(b',');
+        }
+        buf.extend_from_slice(format!("\"{key}\":").as_bytes());
+        buf.extend_from_slice(state.as_bytes());
+    }
+    buf.extend_from_slice(b"}}");
+    buf
+}
+
+#[cfg(test)]
+mod test {
+    use super::*;
+
+    fn checkpoint(step: u32, entries: &[(usize, &str)]) -> Checkpoint {
+        Checkpoint {
+            context_state: format!("{{\"step\":{step}}}"),
+            input_state: "[1,\"a\"]".to_string(),
+            entries: entries.iter().map(|(k, v)| (*k, v.to_string())).collect(),
+        }
+    }
+
+    fn roundtrip(options: CheckpointOptions) {
+        let home = std::env::temp_dir().join(format!(
+            "lsp-checkpoint-test-{}-{:?}-{:?}-{}",
+            std::process::id(),
+            options.encoding,
+            options.compression,
+            options.delta
+        ));
+        let _ = fs::remove_dir_all(&home);
+        fs::create_dir_all(&home).unwrap();
+
+        let mut store = CheckpointStore::new(&home, options);
+        assert!(store.load().is_none());
+        store.save(checkpoint(1, &[(0, "1"), (1, "{\"x\":[]}")])).unwrap();
+        store.save(checkpoint(2, &[(0, "2"), (1, "{\"x\":[]}")])).unwrap();
+        store.save(checkpoint(3, &[(0, "2"), (1, "{\"x\":[3]}")])).unwrap();
+
+        let mut store = CheckpointStore::new(&home, options);
+        let loaded = store.load().unwrap();
+        assert_eq!(loaded.context_state, "{\"step\":3}");
+        assert_eq!(loaded.input_state, "[1,\"a\"]");
+        assert_eq!(loaded.entries[&0], "2");
+        assert_eq!(loaded.entries[&1], "{\"x\":[3]}");
+
+        // Continue from the loaded checkpoint.
+        store.save(checkpoint(4, &[(0, "4"), (1, "{\"x\":[3]}")])).unwrap();
+        let loaded = CheckpointStore::new(&home, options).load().unwrap();
+        assert_eq!(loaded.context_state, "{\"step\":4}");
+        assert_eq!(loaded.entries[&0], "4");
+        assert_eq!(loaded.entries[&1], "{\"x\":[3]}");
+
+        fs::remove_dir_all(&home).unwrap();
+    }
+
+    #[test]
+    fn test_checkpoint_schedule() {
+        let mut schedule = CheckpointSchedule::new(Some(200), Some(600));
+        assert!(!schedule.is_due(1, 100));
+        assert!(!schedule.is_due(199, 599));
+        // The offset may skip a multiple when simultaneous moments are merged.
+        assert!(schedule.is_due(201, 599));
+        // The following moments at the same offset are saved too, e.g., the ones draining the
+        // peek buffer after the last input event.
+        assert!(schedule.is_due(201, 599));
+        assert!(!schedule.is_due(202, 599));
+        assert!(schedule.is_due(203, 600));
+        assert!(!schedule.is_due(399, 1100));
+        assert!(schedule.is_due(400, 1100));
+        assert!(schedule.is_due(400, 1100));
+
+        let mut schedule = CheckpointSchedule::new(Some(200), None);
+        assert!(!schedule.is_due(1, 0));
+        assert!(!schedule.is_due(1, 0));
+
+        let mut schedule = CheckpointSchedule::new(None, None);
+        assert!(!schedule.is_due(0, 0));
+        assert!(!schedule.is_due(1_000_000, u64::MAX));
+    }
+
+    #[test]
+    fn test_checkpoint_roundtrip() {
+        for encoding in [CheckpointEncoding::Json, CheckpointEncoding::Compact] {
+            for compression in [CheckpointCompression::None, CheckpointCompression::Zstd] {
+                for delta in [false, true] {
+                    roundtrip(CheckpointOptions {
+                        encoding,
+                        compression,
+                        delta,
+                    });
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn test_delta_checkpoint_skips_unchanged_entries() {
+        let home = std::env::temp_dir().join(format!("lsp-checkpoint-delta-{}", std::process::id()));
+        let _ = fs::remove_dir_all(&home);
+        fs::create_dir_all(&home).unwrap();
+        let options = CheckpointOptions {
+            encoding: CheckpointEncoding::Compact,
+            compression: CheckpointCompression::None,
+            delta: true,
+        };
+        let mut store = CheckpointStore::new(&home, options);
+        store.save(checkpoint(1, &[(0, "1"), (1, "\"large\"")])).unwrap();
+        store.save(checkpoint(2, &[(0, "2"), (1, "\"large\"")])).unwrap();
+        let log = fs::read_to_string(home.join("checkpoint.delta.jsonl")).unwrap();
+        assert_eq!(
+            log,
+            "{\"seq\":2,\"context_state\":{\"step\":2},\"input_state\":[1,\"a\"],\"entries\":{\"0\":2}}\n"
+        );
+
+        // A torn record at the end of the log is ignored.
+        let mut file = OpenOptions::new()
+            .append(true)
+            .open(home.join("checkpoint.delta.jsonl"))
+            .unwrap();
+        file.write_all(b"{\"seq\":3,\"context_st").unwrap();
+        let loaded = CheckpointStore::new(&home, options).load().unwrap();
+        assert_eq!(loaded.context_state, "{\"step\":2}");
+        assert_eq!(loaded.entries[&0], "2");
+        assert_eq!(loaded.entries[&1], "\"large\"");
+
+        // The log is restarted after the torn record, rather than appended to.
+        let mut store = CheckpointStore::new(&home, options);
+        store.load().unwrap();
+        store.save(checkpoint(3, &[(0, "3"), (1, "\"large\"")])).unwrap();
+        store.save(checkpoint(4, &[(0, "4"), (1, "\"large\"")])).unwrap();
+        let loaded = CheckpointStore::new(&home, options).load().unwrap();
+        assert_eq!(loaded.context_state, "{\"step\":4}");
+        assert_eq!(loaded.entries[&0], "4");
+
+        fs::remove_dir_all(&home).unwrap();
+    }
+}
@@ -1,9 +1,34 @@
 use std::cmp::Reverse;
 use std::collections::BinaryHeap;
 
-use serde::{Deserialize, Serialize};
+use serde::{Deserialize, Deserializer, Serialize, Serializer};
 
-use crate::{Moment, Timestamp};
+use crate::{Duration, Moment, Timestamp};
+
+use super::timer_wheel::TimerWheel;
+
+/// The data structure behind an [InternalEventQueue].
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub enum InternalQueueKind {
+    /// A binary heap, which merges the moments with the same timestamp when they are popped.
+    #[default]
+    Heap,
+    /// A timer wheel of `slots` slots, each covering `resolution` of time, which merges the
+    /// moments with the same timestamp when they are scheduled. It suits the processors which
+    /// keep scheduling wakeups in the near future, e.g., the periodic generators.
+    TimerWheel { resolution: Duration, slots: usize },
+}
+
+enum Queue {
+    Heap(BinaryHeap<Reverse<Moment>>),
+    TimerWheel(TimerWheel),
+}
+
+impl Default for Queue {
+    fn default() -> Self {
+        Self::Heap(BinaryHeap::new())
+    }
+}
 
 /// The queue sorting internal events.
 ///
@@ -14,35 +39,97 @@ use crate::{Moment, Timestamp};
 /// triggered by any external event, but scheduled whenever the signal processor needs a recompute.
 ///
 /// Also, we handle the measurement request as an internal event.
-#[derive(Default, Serialize, Deserialize)]
+#[derive(Default)]
 pub struct InternalEventQueue {
-    queue: BinaryHeap<Reverse<Moment>>,
+    queue: Queue,
+}
+
+/// Both kinds of queues are serialized as the list of their moments, so a checkpoint can be
+/// restored into either of them.
+#[derive(Serialize, Deserialize)]
+struct InternalEventQueueState {
+    queue: Vec<Moment>,
+}
+
+impl Serialize for InternalEventQueue {
+    fn serialize<S: Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        let queue = match &self.queue {
+            Queue::Heap(heap) => heap.iter().map(|Reverse(m)| *m).collect(),
+            Queue::TimerWheel(wheel) => wheel.moments().copied().collect(),
+        };
+        InternalEventQueueState { queue }.serialize(serializer)
+    }
+}
+
+impl<'de> Deserialize<'de> for InternalEventQueue {
+    fn deserialize<D: Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
+        let state = InternalEventQueueState::deserialize(deserializer)?;
+        let heap = state.queue.into_iter().map(Reverse).collect();
+        Ok(Self {
+            queue: Queue::Heap(heap),
+        })
+    }
 }
 
 impl InternalEventQueue {
+    pub fn new(kind: InternalQueueKind) -> Self {
+        let mut ret = Self::default();
+        ret.set_kind(kind);
+        ret
+    }
+
+    /// Switch the data structure of the queue, the scheduled moments are kept.
+    pub fn set_kind(&mut self, kind: InternalQueueKind) {
+        let moments: Vec<_> = match std::mem::take(&mut self.queue) {
+            Queue::Heap(heap) => heap.into_iter().map(|Reverse(m)| m).collect(),
+            Queue::TimerWheel(wheel) => wheel.moments().copied().collect(),
+        };
+        self.queue = match kind {
+            InternalQueueKind::Heap => Queue::Heap(BinaryHeap::new()),
+            InternalQueueKind::TimerWheel { resolution, slots } => {
+                Queue::TimerWheel(TimerWheel::new(resolution, slots))
+            }
+        };
+        moments.into_iter().for_each(|m| self.schedule(m));
+    }
+
+    fn schedule(&mut self, moment: Moment) {
+        match &mut self.queue {
+            Queue::Heap(heap) => heap.push(Reverse(moment)),
+            Queue::TimerWheel(wheel) => wheel.insert(moment),
+        }
+    }
+
     pub fn schedule_signal_update(&mut self, timestamp: Timestamp) {
-        self.queue.push(Reverse(Moment::signal_update(timestamp)));
+        self.schedule(Moment::signal_update(timestamp));
     }
 
     pub fn schedule_measurement(&mut self, timestamp: Timestamp) {
-        self.queue.push(Reverse(Moment::measurement(timestamp)))
+        self.schedule(Moment::measurement(timestamp))
     }
 
     pub fn earliest_scheduled_time(&self) -> Timestamp {
-        self.queue
-            .peek()
-            .map_or(Timestamp::MAX, |Reverse(e)| e.timestamp())
+        match &self.queue {
+            Queue::Heap(heap) => heap
+                .peek()
+                .map_or(Timestamp::MAX, |Reverse(e)| e.timestamp()),
+            Queue::TimerWheel(wheel) => wheel.earliest_scheduled_time(),
+        }
     }
 
     pub fn pop(&mut self) -> Option<Moment> {
-        let Reverse(mut ret) = self.queue.pop()?;
-        while let Some(Reverse(event)) = self.queue.peek() {
+        let heap = match &mut self.queue {
+            Queue::Heap(heap) => heap,
+            Queue::TimerWheel(wheel) => return wheel.pop(),
+        };
+        let Reverse(mut ret) = heap.pop()?;
+        while let Some(Reverse(event)) = heap.peek() {
             if let Some(merged) = ret.merge(event) {
                 ret = merged;
             } else {
                 break;
             }
-            self.queue.pop();
+            heap.pop();
         }
         Some(ret)
     }
@@ -52,9 +139,25 @@ impl InternalEventQueue {
 mod test {
     use super::*;
 
+    const QUEUE_KINDS: [InternalQueueKind; 3] = [
+        InternalQueueKind::Heap,
+        InternalQueueKind::TimerWheel {
+            resolution: 1,
+            slots: 4,
+        },
+        InternalQueueKind::TimerWheel {
+            resolution: 3,
+            slots: 2,
+        },
+    ];
+
     #[test]
     fn test_internal_event_queue() {
-        let mut queue = InternalEventQueue::default();
+        QUEUE_KINDS.into_iter().for_each(check_internal_event_queue);
+    }
+
+    fn check_internal_event_queue(kind: InternalQueueKind) {
+        let mut queue = InternalEventQueue::new(kind);
         queue.schedule_signal_update(2);
         queue.schedule_measurement(2);
         queue.schedule_signal_update(1);
@@ -72,4 +175,44 @@ mod test {
         assert_eq!(queue.pop().unwrap(), Moment::measurement(10));
         assert!(queue.pop().is_none());
     }
+
+    #[test]
+    fn test_queue_kinds_agree() {
+        let mut queues = QUEUE_KINDS.map(InternalEventQueue::new);
+        let mut popped = vec![Vec::new(); queues.len()];
+        let mut now = 0;
+        for step in 0u64..500 {
+            for (queue, popped) in queues.iter_mut().zip(popped.iter_mut()) {
+                // Periodic wakeups with plenty of duplicates, near and far in the future.
+                queue.schedule_signal_update(now + step % 7);
+                queue.schedule_measurement(now + step % 5);
+                queue.schedule_signal_update(now + 100 + step % 3);
+                if step % 2 == 0 {
+                    popped.push(queue.pop());
+                }
+            }
+            now = queues[0].earliest_scheduled_time();
+            assert!(queues.iter().all(|q| q.earliest_scheduled_time() == now));
+        }
+        for (queue, popped) in queues.iter_mut().zip(popped.iter_mut()) {
+            popped.extend(std::iter::from_fn(|| queue.pop()).map(Some));
+        }
+        assert!(popped.iter().all(|p| *p == popped[0]));
+    }
+
+    #[test]
+    fn test_restore_into_other_kind() {
+        let mut queue = InternalEventQueue::new(QUEUE_KINDS[1]);
+        queue.schedule_signal_update(3);
+        queue.schedule_measurement(3);
+        queue.schedule_measurement(100);
+        let state = serde_json::to_string(&queue).unwrap();
+        let mut restored: InternalEventQueue = serde_json::from_str(&state).unwrap();
+        restored.set_kind(QUEUE_KINDS[2]);
+        let moment = restored.pop().unwrap();
+        assert_eq!(moment.timestamp(), 3);
+        assert!(moment.should_take_measurements() && moment.should_update_signals());
+        assert_eq!(restored.pop(), Some(Moment::measurement(100)));
+        assert_eq!(restored.pop(), None);
+    }
 }
@@ -0,0 +1,37 @@
+use crate::Timestamp;
+
+/// The progress of searching the upcoming input events for the next one matching a predicate.
+///
+/// The positions are counted from the beginning of the input, so the index stays valid while
+/// the events are consumed, and every event is tested against the predicate at most once.
+#[derive(Clone, Copy, Debug, Default)]
+pub struct LookaheadIndex {
+    /// The position of the first event which is not tested yet.
+    scanned_until: usize,
+    /// The position and the timestamp of the first matching event found.
+    next_match: Option<(usize, Timestamp)>,
+}
+
+impl LookaheadIndex {
+    /// Forget the events before `position`, which are consumed, and return the next match if it's
+    /// already known.
+    pub(crate) fn advance_to(&mut self, position: usize) -> Option<Timestamp> {
+        if self.next_match.is_some_and(|(p, _)| p < position) {
+            self.next_match = None;
+        }
+        self.scanned_until = self.scanned_until.max(position);
+        self.next_match.map(|(_, timestamp)| timestamp)
+    }
+
+    pub(crate) fn scanned_until(&self) -> usize {
+        self.scanned_until
+    }
+
+    pub(crate) fn record_mismatch(&mut self) {
+        self.scanned_until += 1;
+    }
+
+    pub(crate) fn record_match(&mut self, timestamp: Timestamp) {
+        self.next_match = Some((self.scanned_until, timestamp));
+    }
+}
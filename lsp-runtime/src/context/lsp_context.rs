@@ -6,7 +6,10 @@ use crate::signal_api::Patchable;
 use crate::{Duration, Moment, Timestamp};
 
 use super::multipeek::MultiPeekState;
-use super::{InputSignalBag, InternalEventQueue, MultiPeek, WithTimestamp};
+use super::{
+    InputSignalBag, InternalEventQueue, InternalQueueKind, LookaheadIndex, LookaheadStats,
+    MultiPeek, WithTimestamp,
+};
 
 /// The global context of an LSP system. This type is responsible for the following things:
 /// 1. Take the ownership of an event queue which contains all the pending internal events
@@ -21,6 +24,11 @@ pub struct LspContext<InputIter: Iterator, InputSignalBagType> {
     queue: InternalEventQueue,
     merge_simultaneous_moments: bool,
     #[serde(skip)]
+    max_lookahead_duration: Option<Duration>,
+    // The indices are rebuilt from the input after restoring a checkpoint.
+    #[serde(skip)]
+    lookahead_indices: Vec<LookaheadIndex>,
+    #[serde(skip)]
     _phantom_data: PhantomData<InputSignalBagType>,
 }
 
@@ -53,6 +61,10 @@ pub struct UpdateContext<'a, InputIter: Iterator> {
     iter: &'a mut MultiPeek<InputIter>,
     frontier: Timestamp,
     merge_simultaneous_moments: bool,
+    #[serde(skip)]
+    max_lookahead_duration: Option<Duration>,
+    #[serde(skip)]
+    lookahead_indices: &'a mut Vec<LookaheadIndex>,
 }
 
 impl<InputIter: Iterator> UpdateContext<'_, InputIter> {
@@ -61,7 +73,8 @@ impl<InputIter: Iterator> UpdateContext<'_, InputIter> {
     }
 
     pub fn set_current_update_group(&mut self, _group_id: u32) {
-        // Dummy implementation reserved for partial update
+        // Only the nodes in the update group 0 can schedule internal events, and the group 0 is
+        // updated at every moment, therefore the internal events don't need to track their groups.
     }
 
     pub fn schedule_measurement(&mut self, time_diff: Duration) {
@@ -74,11 +87,89 @@ impl<InputIter: Iterator> UpdateContext<'_, InputIter> {
         self.queue.schedule_signal_update(scheduled_time);
     }
 
-    pub fn peek_fold<U, F>(&mut self, init: U, func: F) -> U
+    /// Fold the upcoming input events, until `func` returns `None` or a lookahead limit is hit.
+    pub fn peek_fold<U, F>(&mut self, init: U, mut func: F) -> U
     where
         F: FnMut(&U, &InputIter::Item) -> Option<U>,
+        InputIter::Item: WithTimestamp,
     {
-        self.iter.peek_fold(init, func)
+        let Some(duration) = self.max_lookahead_duration else {
+            return self.iter.peek_fold(init, func);
+        };
+        let horizon = self.frontier.saturating_add(duration);
+        let mut truncated = false;
+        let ret = self.iter.peek_fold(init, |acc, event| {
+            if event.timestamp() > horizon {
+                truncated = true;
+                return None;
+            }
+            func(acc, event)
+        });
+        if truncated {
+            self.iter.count_truncated_lookahead();
+        }
+        ret
+    }
+
+    /// The timestamp of the first upcoming input event matching `predicate`, if it's earlier than
+    /// `cutoff` and within the lookahead limits.
+    ///
+    /// The search resumes from where the previous one using the same `index` stopped, so each
+    /// event is tested once, no matter how many times the same predicate is queried.
+    pub fn peek_next_match<F>(
+        &mut self,
+        index: &mut LookaheadIndex,
+        cutoff: Timestamp,
+        mut predicate: F,
+    ) -> Option<Timestamp>
+    where
+        F: FnMut(&InputIter::Item) -> bool,
+        InputIter::Item: WithTimestamp,
+    {
+        if let Some(timestamp) = index.advance_to(self.iter.next_position()) {
+            return (timestamp < cutoff).then_some(timestamp);
+        }
+        let horizon = self
+            .max_lookahead_duration
+            .map(|duration| self.frontier.saturating_add(duration));
+        loop {
+            let event = self.iter.peek_at(index.scanned_until())?;
+            let timestamp = event.timestamp();
+            if timestamp >= cutoff {
+                return None;
+            }
+            if horizon.is_some_and(|horizon| timestamp > horizon) {
+                self.iter.count_truncated_lookahead();
+                return None;
+            }
+            if predicate(event) {
+                index.record_match(timestamp);
+                return Some(timestamp);
+            }
+            index.record_mismatch();
+        }
+    }
+
+    /// Same as [UpdateContext::peek_next_match], with an index shared by all the callers using
+    /// the same `index_id`, which must always be queried with the same predicate.
+    pub fn peek_next_match_shared<F>(
+        &mut self,
+        index_id: usize,
+        cutoff: Timestamp,
+        predicate: F,
+    ) -> Option<Timestamp>
+    where
+        F: FnMut(&InputIter::Item) -> bool,
+        InputIter::Item: WithTimestamp,
+    {
+        if self.lookahead_indices.len() <= index_id {
+            self.lookahead_indices
+                .resize(index_id + 1, LookaheadIndex::default());
+        }
+        let mut index = self.lookahead_indices[index_id];
+        let ret = self.peek_next_match(&mut index, cutoff, predicate);
+        self.lookahead_indices[index_id] = index;
+        ret
     }
 
     pub fn frontier(&self) -> Timestamp {
@@ -110,10 +201,29 @@ where
             queue,
             frontier: 0,
             merge_simultaneous_moments,
+            max_lookahead_duration: None,
+            lookahead_indices: Vec::new(),
             _phantom_data: PhantomData,
         }
     }
 
+    /// Bound how far the components can look ahead, by the number of events and by event time.
+    pub fn set_max_lookahead(&mut self, events: Option<usize>, duration: Option<Duration>) {
+        if let Some(events) = events {
+            self.iter.set_max_lookahead(events);
+        }
+        self.max_lookahead_duration = duration;
+    }
+
+    pub fn lookahead_stats(&self) -> LookaheadStats {
+        self.iter.lookahead_stats()
+    }
+
+    /// Switch the data structure of the internal event queue, the scheduled events are kept.
+    pub fn set_internal_queue_kind(&mut self, kind: InternalQueueKind) {
+        self.queue.set_kind(kind);
+    }
+
     pub fn into_queue(self) -> InternalEventQueue {
         self.queue
     }
@@ -125,6 +235,8 @@ where
             frontier: self.frontier,
             iter: &mut self.iter,
             merge_simultaneous_moments: self.merge_simultaneous_moments,
+            max_lookahead_duration: self.max_lookahead_duration,
+            lookahead_indices: &mut self.lookahead_indices,
         }
     }
 
@@ -282,4 +394,45 @@ mod test {
         assert_eq!(state.value, 4);
         assert_eq!(context.next_event(&mut state), None);
     }
+
+    #[test]
+    fn test_peek_next_match() {
+        let mut context = create_test_context(true);
+        let mut state = TestSignalBag { value: 0 };
+        context.next_event(&mut state);
+
+        let mut uc = context.borrow_update_context();
+        let mut num_tested = 0;
+        let mut is_four = |e: &TestInput| {
+            num_tested += 1;
+            e.value == 4
+        };
+        assert_eq!(uc.peek_next_match_shared(0, 20, &mut is_four), None);
+        assert_eq!(uc.peek_next_match_shared(0, 21, &mut is_four), Some(20));
+        assert_eq!(uc.peek_next_match_shared(0, 100, &mut is_four), Some(20));
+        assert_eq!(num_tested, 2);
+        assert_eq!(uc.peek_next_match_shared(1, 100, |e| e.value == 5), None);
+    }
+
+    #[test]
+    fn test_max_lookahead_duration() {
+        let mut context = create_test_context(true);
+        context.set_max_lookahead(None, Some(5));
+
+        let mut state = TestSignalBag { value: 0 };
+        context.next_event(&mut state);
+
+        let mut uc = context.borrow_update_context();
+        let peeked = uc.peek_fold(Vec::new(), |values, e| {
+            Some([values.as_slice(), &[e.value]].concat())
+        });
+        assert_eq!(peeked, vec![3]);
+        assert_eq!(
+            context.lookahead_stats(),
+            LookaheadStats {
+                peak_depth: 2,
+                num_truncated: 1
+            }
+        );
+    }
 }
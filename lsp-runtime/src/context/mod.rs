@@ -1,9 +1,14 @@
 mod input_signal_bag;
 mod internal_queue;
+mod lookahead_index;
 mod lsp_context;
 mod multipeek;
+mod reorder;
+mod timer_wheel;
 
 pub use input_signal_bag::{InputSignalBag, WithTimestamp};
-pub use internal_queue::InternalEventQueue;
+pub use internal_queue::{InternalEventQueue, InternalQueueKind};
+pub use lookahead_index::LookaheadIndex;
 pub use lsp_context::{LspContext, LspContextState, UpdateContext};
-pub use multipeek::MultiPeek;
+pub use multipeek::{LookaheadStats, MultiPeek};
+pub use reorder::{ReorderBuffer, ReorderStats};
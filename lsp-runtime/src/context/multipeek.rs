@@ -11,6 +11,15 @@ where
     s.serialize_u64(vec.len() as u64)
 }
 
+/// The statistics of the lookahead, which tell how much memory the peek buffer takes.
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub struct LookaheadStats {
+    /// The largest number of events buffered for peeking.
+    pub peak_depth: usize,
+    /// The number of lookaheads stopped by the lookahead limits rather than by the input end.
+    pub num_truncated: usize,
+}
+
 #[derive(Serialize)]
 #[serde(bound = "")]
 pub struct MultiPeek<I: Iterator> {
@@ -19,6 +28,10 @@ pub struct MultiPeek<I: Iterator> {
     offset: usize,
     #[serde(rename = "peek_buffer_size", serialize_with = "serialize_vecdeque_len")]
     peek_buffer: VecDeque<I::Item>,
+    #[serde(skip)]
+    max_lookahead: usize,
+    #[serde(skip)]
+    stats: LookaheadStats,
 }
 
 impl<I: Iterator> Iterator for MultiPeek<I> {
@@ -41,6 +54,8 @@ impl<I: Iterator> From<I> for MultiPeek<I> {
             inner,
             offset: 0usize,
             peek_buffer: VecDeque::new(),
+            max_lookahead: usize::MAX,
+            stats: LookaheadStats::default(),
         }
     }
 }
@@ -73,6 +88,20 @@ impl<I: Iterator> MultiPeek<I> {
         self.offset
     }
 
+    /// Limit the number of events `peek_fold` can look ahead, which bounds the peek buffer.
+    /// The next event can always be peeked.
+    pub fn set_max_lookahead(&mut self, max_lookahead: usize) {
+        self.max_lookahead = max_lookahead.max(1);
+    }
+
+    pub fn lookahead_stats(&self) -> LookaheadStats {
+        self.stats
+    }
+
+    pub(crate) fn count_truncated_lookahead(&mut self) {
+        self.stats.num_truncated += 1;
+    }
+
     #[inline(always)]
     pub fn peek_n(&mut self, n: usize) -> Option<&I::Item> {
         while self.peek_buffer.len() < n {
@@ -84,6 +113,7 @@ impl<I: Iterator> MultiPeek<I> {
                 return None;
             }
         }
+        self.stats.peak_depth = self.stats.peak_depth.max(self.peek_buffer.len());
         if n > 0 {
             self.peek_buffer.get(n - 1)
         } else {
@@ -96,12 +126,33 @@ impl<I: Iterator> MultiPeek<I> {
         self.peek_n(1)
     }
 
+    /// The position of the next item, counted from the beginning of the input.
+    #[inline(always)]
+    pub fn next_position(&self) -> usize {
+        self.offset - self.peek_buffer.len()
+    }
+
+    /// Peek the item at an absolute position, which is at or after [MultiPeek::next_position]. A
+    /// position beyond the lookahead limit can't be peeked, and the lookahead is truncated.
+    pub fn peek_at(&mut self, position: usize) -> Option<&I::Item> {
+        let depth = position.checked_sub(self.next_position())? + 1;
+        if depth > self.max_lookahead {
+            self.count_truncated_lookahead();
+            return None;
+        }
+        self.peek_n(depth)
+    }
+
     pub fn peek_fold<U, F>(&mut self, init: U, mut func: F) -> U
     where
         F: FnMut(&U, &I::Item) -> Option<U>,
     {
         let mut ret = init;
         for i in 1.. {
+            if i > self.max_lookahead {
+                self.count_truncated_lookahead();
+                break;
+            }
             if let Some(item) = self.peek_n(i) {
                 if let Some(new_value) = func(&ret, item) {
                     ret = new_value;
@@ -158,6 +209,36 @@ mod test {
         assert_eq!(mp_iter.next(), Some(0));
     }
 
+    #[test]
+    fn test_peek_fold_max_lookahead() {
+        let inner: Vec<_> = (0..1000).collect();
+        let mut mp_iter = MultiPeek::from(inner.clone().into_iter());
+        mp_iter.set_max_lookahead(10);
+        assert_eq!(
+            mp_iter.peek_fold(0, |a, b| Some(a + b)),
+            (0..10).sum::<i32>()
+        );
+        assert_eq!(mp_iter.lookahead_stats().peak_depth, 10);
+        assert_eq!(mp_iter.lookahead_stats().num_truncated, 1);
+        assert_eq!(mp_iter.next(), Some(0));
+        assert_eq!(mp_iter.count(), 999);
+    }
+
+    #[test]
+    fn test_peek_at_position() {
+        let inner: Vec<_> = (0..1000).collect();
+        let mut mp_iter = MultiPeek::from(inner.clone().into_iter());
+        mp_iter.set_max_lookahead(10);
+        assert_eq!(mp_iter.peek_at(5), Some(&5));
+        assert_eq!(mp_iter.next(), Some(0));
+        assert_eq!(mp_iter.next(), Some(1));
+        assert_eq!(mp_iter.next_position(), 2);
+        assert_eq!(mp_iter.peek_at(1), None);
+        assert_eq!(mp_iter.peek_at(11), Some(&11));
+        assert_eq!(mp_iter.peek_at(12), None);
+        assert_eq!(mp_iter.lookahead_stats().num_truncated, 1);
+    }
+
     #[test]
     fn test_peek_fold_early_terminate() {
         let inner: Vec<_> = (0..1000).collect();
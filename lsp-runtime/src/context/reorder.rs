@@ -0,0 +1,210 @@
+use std::cmp::{Ordering, Reverse};
+use std::collections::BinaryHeap;
+use std::sync::atomic::{AtomicUsize, Ordering as AtomicOrdering};
+use std::sync::Arc;
+
+use crate::{Duration, Timestamp};
+
+use super::WithTimestamp;
+
+struct Pending<T> {
+    timestamp: Timestamp,
+    // The events with the same timestamp are released in the input order.
+    seq: u64,
+    event: T,
+}
+
+impl<T> PartialEq for Pending<T> {
+    fn eq(&self, other: &Self) -> bool {
+        self.cmp(other) == Ordering::Equal
+    }
+}
+
+impl<T> Eq for Pending<T> {}
+
+impl<T> PartialOrd for Pending<T> {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+impl<T> Ord for Pending<T> {
+    fn cmp(&self, other: &Self) -> Ordering {
+        (self.timestamp, self.seq).cmp(&(other.timestamp, other.seq))
+    }
+}
+
+#[derive(Default)]
+struct Counters {
+    num_late: AtomicUsize,
+    peak_buffered: AtomicUsize,
+}
+
+/// A handle to the statistics of a [ReorderBuffer], which is still valid after the buffer is
+/// consumed.
+#[derive(Clone, Default)]
+pub struct ReorderStats(Arc<Counters>);
+
+impl ReorderStats {
+    /// The number of events dropped because an event with a later timestamp was already released.
+    pub fn num_late(&self) -> usize {
+        self.0.num_late.load(AtomicOrdering::Relaxed)
+    }
+
+    /// The maximum number of events held in the buffer at the same time.
+    pub fn peak_buffered(&self) -> usize {
+        self.0.peak_buffered.load(AtomicOrdering::Relaxed)
+    }
+}
+
+/// Sorts the events of a roughly ordered input by timestamp, in bounded memory.
+///
+/// The events are held in a min-heap until the watermark, which is the latest timestamp seen minus
+/// the tolerance, passes them. An event arriving after a later event is released is late, and it
+/// is dropped. Once `max_buffered` events are held, the earliest one is released regardless of
+/// the watermark.
+pub struct ReorderBuffer<I: Iterator> {
+    inner: I,
+    tolerance: Option<Duration>,
+    max_buffered: usize,
+    heap: BinaryHeap<Reverse<Pending<I::Item>>>,
+    next_seq: u64,
+    latest_seen: Timestamp,
+    last_released: Option<Timestamp>,
+    exhausted: bool,
+    stats: ReorderStats,
+}
+
+impl<I> ReorderBuffer<I>
+where
+    I: Iterator,
+    I::Item: WithTimestamp,
+{
+    /// Without a tolerance, the input is passed through as it is.
+    pub fn new(inner: I, tolerance: Option<Duration>, max_buffered: usize) -> Self {
+        Self {
+            inner,
+            tolerance,
+            max_buffered: max_buffered.max(1),
+            heap: BinaryHeap::new(),
+            next_seq: 0,
+            latest_seen: 0,
+            last_released: None,
+            exhausted: false,
+            stats: ReorderStats::default(),
+        }
+    }
+
+    pub fn stats(&self) -> ReorderStats {
+        self.stats.clone()
+    }
+
+    fn can_release(&self, tolerance: Duration) -> bool {
+        match self.heap.peek() {
+            Some(Reverse(earliest)) => {
+                self.exhausted
+                    || self.heap.len() >= self.max_buffered
+                    || earliest.timestamp.saturating_add(tolerance) <= self.latest_seen
+            }
+            None => false,
+        }
+    }
+}
+
+impl<I> Iterator for ReorderBuffer<I>
+where
+    I: Iterator,
+    I::Item: WithTimestamp,
+{
+    type Item = I::Item;
+
+    fn next(&mut self) -> Option<I::Item> {
+        let Some(tolerance) = self.tolerance else {
+            return self.inner.next();
+        };
+        loop {
+            if self.can_release(tolerance) {
+                let Reverse(earliest) = self.heap.pop()?;
+                self.last_released = Some(earliest.timestamp);
+                return Some(earliest.event);
+            }
+            let Some(event) = self.inner.next() else {
+                self.exhausted = true;
+                if self.heap.is_empty() {
+                    return None;
+                }
+                continue;
+            };
+            let timestamp = event.timestamp();
+            if self
+                .last_released
+                .is_some_and(|released| timestamp < released)
+            {
+                self.stats.0.num_late.fetch_add(1, AtomicOrdering::Relaxed);
+                continue;
+            }
+            self.latest_seen = self.latest_seen.max(timestamp);
+            self.heap.push(Reverse(Pending {
+                timestamp,
+                seq: self.next_seq,
+                event,
+            }));
+            self.next_seq += 1;
+            self.stats
+                .0
+                .peak_buffered
+                .fetch_max(self.heap.len(), AtomicOrdering::Relaxed);
+        }
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use super::*;
+
+    impl WithTimestamp for (Timestamp, u32) {
+        fn timestamp(&self) -> Timestamp {
+            self.0
+        }
+    }
+
+    #[test]
+    fn test_reorder_within_tolerance() {
+        let input = vec![
+            (3, 0),
+            (1, 1),
+            (2, 2),
+            (6, 3),
+            (4, 4),
+            (9, 5),
+            (1, 6),
+            (8, 7),
+        ];
+        let reordered = ReorderBuffer::new(input.into_iter(), Some(3), 100);
+        let stats = reordered.stats();
+        let output: Vec<_> = reordered.collect();
+        assert_eq!(
+            output,
+            vec![(1, 1), (2, 2), (3, 0), (4, 4), (6, 3), (8, 7), (9, 5)]
+        );
+        assert_eq!(stats.num_late(), 1);
+        assert_eq!(stats.peak_buffered(), 4);
+    }
+
+    #[test]
+    fn test_reorder_bounded_buffer() {
+        let input = vec![(5, 0), (4, 1), (3, 2), (2, 3), (1, 4)];
+        let reordered = ReorderBuffer::new(input.into_iter(), Some(100), 2);
+        let stats = reordered.stats();
+        let output: Vec<_> = reordered.collect();
+        assert_eq!(output, vec![(4, 1), (5, 0)]);
+        assert_eq!(stats.num_late(), 3);
+    }
+
+    #[test]
+    fn test_pass_through() {
+        let input = vec![(3, 0), (1, 1), (2, 2)];
+        let output: Vec<_> = ReorderBuffer::new(input.clone().into_iter(), None, 1).collect();
+        assert_eq!(output, input);
+    }
+}
@@ -0,0 +1,131 @@
+use std::collections::BTreeMap;
+
+use crate::{Duration, Moment, Timestamp};
+
+/// A queue of moments which merges the moments with the same timestamp on insert.
+///
+/// The moments in the near future are bucketed in a ring of slots, each covering `resolution` of
+/// time, so scheduling a moment doesn't need any comparison with the other slots. The moments
+/// beyond the ring, or before the current slot, are kept in a sorted overflow map, and they are
+/// moved into the ring once it turns to them.
+pub(super) struct TimerWheel {
+    resolution: Duration,
+    slots: Vec<Vec<Moment>>,
+    /// The tick of the current slot, a tick is a timestamp divided by the resolution.
+    base_tick: u64,
+    num_in_slots: usize,
+    overflow: BTreeMap<Timestamp, Moment>,
+    earliest: Timestamp,
+}
+
+impl TimerWheel {
+    pub(super) fn new(resolution: Duration, num_slots: usize) -> Self {
+        Self {
+            resolution: resolution.max(1),
+            slots: vec![Vec::new(); num_slots.max(1)],
+            base_tick: 0,
+            num_in_slots: 0,
+            overflow: BTreeMap::new(),
+            earliest: Timestamp::MAX,
+        }
+    }
+
+    fn tick_of(&self, timestamp: Timestamp) -> u64 {
+        timestamp / self.resolution
+    }
+
+    fn is_in_ring(&self, tick: u64) -> bool {
+        tick >= self.base_tick && tick - self.base_tick < self.slots.len() as u64
+    }
+
+    fn slot_of(&self, tick: u64) -> usize {
+        (tick % self.slots.len() as u64) as usize
+    }
+
+    pub(super) fn insert(&mut self, moment: Moment) {
+        let timestamp = moment.timestamp();
+        self.earliest = self.earliest.min(timestamp);
+        let tick = self.tick_of(timestamp);
+        if !self.is_in_ring(tick) {
+            self.overflow
+                .entry(timestamp)
+                .and_modify(|m| *m = m.merge(&moment).unwrap())
+                .or_insert(moment);
+            return;
+        }
+        let slot_idx = self.slot_of(tick);
+        let slot = &mut self.slots[slot_idx];
+        // A slot only holds a few distinct timestamps, so a linear search is the cheapest.
+        if let Some(m) = slot.iter_mut().find(|m| m.timestamp() == timestamp) {
+            *m = m.merge(&moment).unwrap();
+        } else {
+            slot.push(moment);
+            self.num_in_slots += 1;
+        }
+    }
+
+    pub(super) fn earliest_scheduled_time(&self) -> Timestamp {
+        self.earliest
+    }
+
+    pub(super) fn pop(&mut self) -> Option<Moment> {
+        if self.num_in_slots == 0 && self.overflow.is_empty() {
+            return None;
+        }
+        let timestamp = self.earliest;
+        let mut ret = self.overflow.remove(&timestamp);
+        let tick = self.tick_of(timestamp);
+        if self.is_in_ring(tick) {
+            let slot_idx = self.slot_of(tick);
+            let slot = &mut self.slots[slot_idx];
+            if let Some(idx) = slot.iter().position(|m| m.timestamp() == timestamp) {
+                let moment = slot.swap_remove(idx);
+                self.num_in_slots -= 1;
+                ret = Some(match ret {
+                    Some(m) => m.merge(&moment).unwrap(),
+                    None => moment,
+                });
+            }
+        }
+        self.update_earliest();
+        ret
+    }
+
+    fn update_earliest(&mut self) {
+        if self.num_in_slots == 0 {
+            // Nothing to scan in the ring, jump to the first moment in the future.
+            if let Some(&timestamp) = self.overflow.keys().next() {
+                self.base_tick = self.base_tick.max(self.tick_of(timestamp));
+            }
+        } else {
+            while self.slots[self.slot_of(self.base_tick)].is_empty() {
+                self.base_tick += 1;
+            }
+        }
+        self.fill_ring();
+        let in_ring = self.slots[self.slot_of(self.base_tick)]
+            .iter()
+            .map(Moment::timestamp)
+            .min();
+        let in_overflow = self.overflow.keys().next().copied();
+        self.earliest = in_ring
+            .into_iter()
+            .chain(in_overflow)
+            .min()
+            .unwrap_or(Timestamp::MAX);
+    }
+
+    /// Move the moments from the overflow map into the ring, once the ring covers them.
+    fn fill_ring(&mut self) {
+        let ring_start = self.base_tick.saturating_mul(self.resolution);
+        let ring_end = (self.base_tick + self.slots.len() as u64).saturating_mul(self.resolution);
+        while let Some((&timestamp, _)) = self.overflow.range(ring_start..ring_end).next() {
+            let moment = self.overflow.remove(&timestamp).unwrap();
+            self.insert(moment);
+        }
+    }
+
+    pub(super) fn moments(&self) -> impl Iterator<Item = &Moment> {
+        self.slots.iter().flatten().chain(self.overflow.values())
+    }
+}
@@ -0,0 +1,394 @@
+//! Decoding the input events from JSON lines.
+//!
+//! The lines can be decoded on the data logic thread, or in a pipeline: the input is split into
+//! batches of lines, a pool of decoder threads parses the batches, and the iterator yields the
+//! decoded events in the original order.
+
+use std::collections::BTreeMap;
+use std::fs::File;
+use std::io::{self, BufRead, BufReader};
+use std::ops::Range;
+use std::path::Path;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::mpsc::{self, Receiver, SyncSender};
+use std::sync::{Arc, Mutex};
+use std::thread;
+
+use serde::de::DeserializeOwned;
+
+mod mapped_file;
+
+pub use mapped_file::MappedFile;
+
+#[derive(Clone, Copy, Debug)]
+pub struct JsonLinesOptions {
+    /// The number of decoder threads, 0 decodes the lines on the thread consuming the events.
+    pub decoder_threads: usize,
+    /// The number of lines in a batch handed to a decoder thread.
+    pub batch_lines: usize,
+    /// The number of batches which can be queued between the pipeline stages.
+    pub queue_batches: usize,
+}
+
+impl Default for JsonLinesOptions {
+    fn default() -> Self {
+        Self {
+            decoder_threads: 0,
+            batch_lines: 1024,
+            queue_batches: 16,
+        }
+    }
+}
+
+#[derive(Default)]
+struct Counters {
+    num_malformed: AtomicUsize,
+    error: Mutex<Option<io::Error>>,
+}
+
+/// A handle to the statistics of a [JsonLinesInput], which is still valid after the input is
+/// consumed.
+#[derive(Clone)]
+pub struct JsonLinesInputStats(Arc<Counters>);
+
+impl JsonLinesInputStats {
+    /// The number of lines which can't be decoded, they are skipped.
+    pub fn num_malformed(&self) -> usize {
+        self.0.num_malformed.load(Ordering::Relaxed)
+    }
+
+    /// The I/O error which stopped reading the input early, if there's any.
+    pub fn take_error(&self) -> Option<io::Error> {
+        self.0.error.lock().unwrap().take()
+    }
+
+    fn record_error(&self, e: io::Error) {
+        *self.0.error.lock().unwrap() = Some(e);
+    }
+
+    fn count_malformed(&self) {
+        self.0.num_malformed.fetch_add(1, Ordering::Relaxed);
+    }
+}
+
+/// Complete lines of the input, which are either read into a buffer or a range of a mapped file.
+struct LineBatch {
+    seq: u64,
+    data: Arc<dyn AsRef<[u8]> + Send + Sync>,
+    range: Range<usize>,
+}
+
+enum Source<T> {
+    Reader {
+        reader: Box<dyn BufRead>,
+        line: Vec<u8>,
+    },
+    Mapped {
+        file: MappedFile,
+        pos: usize,
+    },
+    Pipelined {
+        batches: Receiver<(u64, Vec<T>)>,
+        pending: BTreeMap<u64, Vec<T>>,
+        next_seq: u64,
+        current: std::vec::IntoIter<T>,
+    },
+}
+
+/// An iterator of the events decoded from JSON lines, and the malformed lines are counted.
+pub struct JsonLinesInput<T> {
+    source: Source<T>,
+    stats: JsonLinesInputStats,
+}
+
+fn is_blank(line: &[u8]) -> bool {
+    line.iter().all(u8::is_ascii_whitespace)
+}
+
+/// The end of the line starting at `pos`, including the line break.
+fn line_end(data: &[u8], pos: usize) -> usize {
+    memchr::memchr(b'\n', &data[pos..]).map_or(data.len(), |idx| pos + idx + 1)
+}
+
+fn decode_line<T: DeserializeOwned>(line: &[u8], stats: &JsonLinesInputStats) -> Option<T> {
+    if is_blank(line) {
+        return None;
+    }
+    // The string values are decoded straight from the line, and only those stored in the events
+    // are copied.
+    serde_json::from_slice(line)
+        .map_err(|_| stats.count_malformed())
+        .ok()
+}
+
+impl<T: DeserializeOwned + Send + 'static> JsonLinesInput<T> {
+    pub fn new<R: BufRead + Send + 'static>(reader: R, options: JsonLinesOptions) -> Self {
+        let stats = JsonLinesInputStats(Arc::default());
+        let source = if options.decoder_threads == 0 {
+            Source::Reader {
+                reader: Box::new(reader),
+                line: Vec::new(),
+            }
+        } else {
+            let (sender, receiver) = mpsc::sync_channel(options.queue_batches);
+            Self::spawn_reader(reader, options.batch_lines.max(1), sender, stats.clone());
+            Self::pipelined(receiver, options, &stats)
+        };
+        Self { source, stats }
+    }
+
+    /// Decode the lines of a memory mapped file, so the input isn't copied through a read buffer.
+    ///
+    /// The input which isn't a regular file, e.g., a FIFO, `/dev/stdin` or a process
+    /// substitution, can't be mapped, and it's read through a buffered reader instead.
+    pub fn from_file<P: AsRef<Path>>(path: P, options: JsonLinesOptions) -> io::Result<Self> {
+        let file = File::open(path.as_ref())?;
+        if !file.metadata()?.is_file() {
+            return Ok(Self::new(BufReader::new(file), options));
+        }
+        let stats = JsonLinesInputStats(Arc::default());
+        let file = MappedFile::from_file(&file)?;
+        let source = if options.decoder_threads == 0 {
+            Source::Mapped { file, pos: 0 }
+        } else {
+            let (sender, receiver) = mpsc::sync_channel(options.queue_batches);
+            Self::spawn_splitter(Arc::new(file), options.batch_lines.max(1), sender);
+            Self::pipelined(receiver, options, &stats)
+        };
+        Ok(Self { source, stats })
+    }
+
+    pub fn stats(&self) -> JsonLinesInputStats {
+        self.stats.clone()
+    }
+
+    fn spawn_reader<R: BufRead + Send + 'static>(
+        mut reader: R,
+        batch_lines: usize,
+        sender: SyncSender<LineBatch>,
+        stats: JsonLinesInputStats,
+    ) {
+        thread::spawn(move || {
+            for seq in 0.. {
+                let mut data = Vec::new();
+                let mut num_lines = 0;
+                while num_lines < batch_lines {
+                    match reader.read_until(b'\n', &mut data) {
+                        Ok(0) => break,
+                        Ok(_) => num_lines += 1,
+                        Err(e) => {
+                            stats.record_error(e);
+                            break;
+                        }
+                    }
+                }
+                if num_lines == 0 {
+                    break;
+                }
+                let range = 0..data.len();
+                let batch = LineBatch {
+                    seq,
+                    data: Arc::new(data),
+                    range,
+                };
+                if sender.send(batch).is_err() || num_lines < batch_lines {
+                    break;
+                }
+            }
+        });
+    }
+
+    fn spawn_splitter(file: Arc<MappedFile>, batch_lines: usize, sender: SyncSender<LineBatch>) {
+        thread::spawn(move || {
+            let data: &[u8] = file.as_ref().as_ref();
+            let mut pos = 0;
+            for seq in 0.. {
+                if pos >= data.len() {
+                    break;
+                }
+                let start = pos;
+                for _ in 0..batch_lines {
+                    if pos >= data.len() {
+                        break;
+                    }
+                    pos = line_end(data, pos);
+                }
+                let batch = LineBatch {
+                    seq,
+                    data: file.clone(),
+                    range: start..pos,
+                };
+                if sender.send(batch).is_err() {
+                    break;
+                }
+            }
+        });
+    }
+
+    fn pipelined(
+        line_batches: Receiver<LineBatch>,
+        options: JsonLinesOptions,
+        stats: &JsonLinesInputStats,
+    ) -> Source<T> {
+        let (event_sender, event_receiver) = mpsc::sync_channel(options.queue_batches);
+        let line_batches = Arc::new(Mutex::new(line_batches));
+        for _ in 0..options.decoder_threads {
+            let line_batches = line_batches.clone();
+            let event_sender: SyncSender<(u64, Vec<T>)> = event_sender.clone();
+            let stats = stats.clone();
+            thread::spawn(move || loop {
+                let batch = line_batches.lock().unwrap().recv();
+                let Ok(LineBatch { seq, data, range }) = batch else {
+                    break;
+                };
+                let events = (*data).as_ref()[range]
+                    .split(|&b| b == b'\n')
+                    .filter_map(|line| decode_line(line, &stats))
+                    .collect();
+                if event_sender.send((seq, events)).is_err() {
+                    break;
+                }
+            });
+        }
+        Source::Pipelined {
+            batches: event_receiver,
+            pending: BTreeMap::new(),
+            next_seq: 0,
+            current: Vec::new().into_iter(),
+        }
+    }
+}
+
+impl<T: DeserializeOwned> Iterator for JsonLinesInput<T> {
+    type Item = T;
+
+    fn next(&mut self) -> Option<T> {
+        match &mut self.source {
+            Source::Reader { reader, line } => loop {
+                line.clear();
+                match reader.read_until(b'\n', line) {
+                    Ok(0) => return None,
+                    Ok(_) => {
+                        if let Some(event) = decode_line(line, &self.stats) {
+                            return Some(event);
+                        }
+                    }
+                    Err(e) => {
+                        self.stats.record_error(e);
+                        return None;
+                    }
+                }
+            },
+            Source::Mapped { file, pos } => {
+                let data: &[u8] = file.as_ref();
+                while *pos < data.len() {
+                    let start = *pos;
+                    *pos = line_end(data, start);
+                    if let Some(event) = decode_line(&data[start..*pos], &self.stats) {
+                        return Some(event);
+                    }
+                }
+                None
+            }
+            Source::Pipelined {
+                batches,
+                pending,
+                next_seq,
+                current,
+            } => loop {
+                if let Some(event) = current.next() {
+                    return Some(event);
+                }
+                // The decoders may finish the batches out of order.
+                let batch = match pending.remove(next_seq) {
+                    Some(batch) => batch,
+                    None => loop {
+                        let (seq, batch) = batches.recv().ok()?;
+                        if seq == *next_seq {
+                            break batch;
+                        }
+                        pending.insert(seq, batch);
+                    },
+                };
+                *next_seq += 1;
+                *current = batch.into_iter();
+            },
+        }
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use serde::Deserialize;
+
+    use super::*;
+
+    #[derive(Debug, Deserialize, PartialEq)]
+    struct Event {
+        value: u32,
+    }
+
+    fn input_text() -> String {
+        let mut text = String::new();
+        for value in 0..1000 {
+            if value % 100 == 7 {
+                text.push_str("{\"value\": \n");
+            } else if value % 100 == 8 {
+                text.push('\n');
+            }
+            text.push_str(&format!("{{\"value\": {value}}}\n"));
+        }
+        // The last line doesn't have a line break.
+        text.pop();
+        text
+    }
+
+    fn check_input(input: JsonLinesInput<Event>) {
+        let stats = input.stats();
+        let values: Vec<_> = input.map(|e| e.value).collect();
+        assert_eq!(values, (0..1000).collect::<Vec<_>>());
+        assert_eq!(stats.num_malformed(), 10);
+        assert!(stats.take_error().is_none());
+    }
+
+    #[test]
+    fn test_decode_json_lines() {
+        let path =
+            std::env::temp_dir().join(format!("lsp-input-test-{}.jsonl", std::process::id()));
+        std::fs::write(&path, input_text()).unwrap();
+        for decoder_threads in [0, 1, 4] {
+            let options = JsonLinesOptions {
+                decoder_threads,
+                batch_lines: 16,
+                queue_batches: 2,
+            };
+            check_input(JsonLinesInput::new(io::Cursor::new(input_text()), options));
+            check_input(JsonLinesInput::from_file(&path, options).unwrap());
+        }
+        std::fs::remove_file(&path).unwrap();
+    }
+
+    #[cfg(unix)]
+    #[test]
+    fn test_decode_json_lines_from_fifo() {
+        let path =
+            std::env::temp_dir().join(format!("lsp-input-test-{}.fifo", std::process::id()));
+        let status = std::process::Command::new("mkfifo").arg(&path).status().unwrap();
+        assert!(status.success());
+        for decoder_threads in [0, 4] {
+            let options = JsonLinesOptions {
+                decoder_threads,
+                batch_lines: 16,
+                queue_batches: 2,
+            };
+            let writer = {
+                let path = path.clone();
+                std::thread::spawn(move || std::fs::write(path, input_text()).unwrap())
+            };
+            // A FIFO has no length to map, so it's read instead.
+            check_input(JsonLinesInput::from_file(&path, options).unwrap());
+            writer.join().unwrap();
+        }
+        std::fs::remove_file(&path).unwrap();
+    }
+}
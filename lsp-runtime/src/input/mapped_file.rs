@@ -0,0 +1,53 @@
+use std::fs::File;
+use std::io;
+use std::ops::Deref;
+use std::path::Path;
+
+use memmap2::Mmap;
+
+/// A read-only regular file mapped into memory, so the input can be decoded without being copied
+/// through a read buffer.
+///
+/// Only a regular file can be mapped: a pipe, a FIFO or a terminal has no length to map, and its
+/// content has to be read instead.
+pub struct MappedFile {
+    map: Mmap,
+}
+
+impl MappedFile {
+    pub fn open<P: AsRef<Path>>(path: P) -> io::Result<Self> {
+        let file = File::open(path)?;
+        Self::from_file(&file)
+    }
+
+    pub fn from_file(file: &File) -> io::Result<Self> {
+        if !file.metadata()?.is_file() {
+            return Err(io::Error::new(
+                io::ErrorKind::InvalidInput,
+                "only a regular file can be mapped",
+            ));
+        }
+        // SAFETY: the mapping is private and read-only. Truncating the file while it's mapped
+        // still makes the access to the lost pages fail, as with any mapped file, so the input
+        // file must not be modified while it's processed.
+        let map = unsafe { Mmap::map(file)? };
+        // The file is scanned from the beginning to the end, and the advice is only a hint.
+        #[cfg(unix)]
+        let _ = map.advise(memmap2::Advice::Sequential);
+        Ok(Self { map })
+    }
+}
+
+impl Deref for MappedFile {
+    type Target = [u8];
+
+    fn deref(&self) -> &[u8] {
+        &self.map
+    }
+}
+
+impl AsRef<[u8]> for MappedFile {
+    fn as_ref(&self) -> &[u8] {
+        self
+    }
+}
@@ -0,0 +1,174 @@
+//! Decoders of the input event timestamps.
+//!
+//! The generated input patch type picks one of these as the `deserialize_with` function of its
+//! timestamp field, based on the `_timestamp_format` of the LSDL input schema, therefore each input
+//! event is decoded straight into a [Timestamp] in nanoseconds.
+use std::fmt;
+
+use chrono::format::{parse, Item, Parsed, StrftimeItems};
+use chrono::{DateTime, FixedOffset, Utc};
+use serde::de::{Deserialize, Deserializer, Error, Visitor};
+
+use crate::Timestamp;
+
+fn nanos_of<Tz: chrono::TimeZone, E: Error>(datetime: DateTime<Tz>) -> Result<Timestamp, E> {
+    datetime
+        .timestamp_nanos_opt()
+        .and_then(|ns| Timestamp::try_from(ns).ok())
+        .ok_or_else(|| E::custom("value can not be represented in a timestamp with nanosecond precision"))
+}
+
+fn deserialize_epoch<'de, D: Deserializer<'de>>(
+    deserializer: D,
+    nanos_per_unit: u64,
+) -> Result<Timestamp, D::Error> {
+    u64::deserialize(deserializer)?
+        .checked_mul(nanos_per_unit)
+        .ok_or_else(|| D::Error::custom("epoch timestamp overflows"))
+}
+
+/// Any string [chrono] can parse as a `DateTime<Utc>`, e.g., `2024-05-01 12:00:00.123 UTC`.
+pub fn deserialize_default<'de, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Timestamp, D::Error> {
+    nanos_of(DateTime::<Utc>::deserialize(deserializer)?)
+}
+
+/// An integer number of seconds since the Unix epoch.
+pub fn deserialize_epoch_s<'de, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Timestamp, D::Error> {
+    deserialize_epoch(deserializer, 1_000_000_000)
+}
+
+/// An integer number of milliseconds since the Unix epoch.
+pub fn deserialize_epoch_ms<'de, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Timestamp, D::Error> {
+    deserialize_epoch(deserializer, 1_000_000)
+}
+
+/// An integer number of microseconds since the Unix epoch.
+pub fn deserialize_epoch_us<'de, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Timestamp, D::Error> {
+    deserialize_epoch(deserializer, 1_000)
+}
+
+/// An integer number of nanoseconds since the Unix epoch.
+pub fn deserialize_epoch_ns<'de, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Timestamp, D::Error> {
+    deserialize_epoch(deserializer, 1)
+}
+
+struct StrVisitor<F>(&'static str, F);
+
+impl<F> Visitor<'_> for StrVisitor<F>
+where
+    F: FnOnce(&str) -> Result<DateTime<FixedOffset>, chrono::ParseError>,
+{
+    type Value = Timestamp;
+
+    fn expecting(&self, formatter: &mut fmt::Formatter) -> fmt::Result {
+        formatter.write_str(self.0)
+    }
+
+    // The input is parsed in place, no owned `String` is allocated for it.
+    fn visit_str<E: Error>(self, v: &str) -> Result<Self::Value, E> {
+        let datetime = (self.1)(v).map_err(|e| E::custom(format!("{e}: {v:?}")))?;
+        nanos_of(datetime)
+    }
+}
+
+/// An RFC 3339 string, e.g., `2024-05-01T12:00:00.123Z`.
+pub fn deserialize_rfc3339<'de, D: Deserializer<'de>>(
+    deserializer: D,
+) -> Result<Timestamp, D::Error> {
+    deserializer.deserialize_str(StrVisitor(
+        "an RFC 3339 timestamp",
+        DateTime::parse_from_rfc3339,
+    ))
+}
+
+/// A string in a custom `strftime` format.
+///
+/// The format is only parsed once, and a timestamp without any offset information is in UTC.
+pub struct StrftimeFormat(Vec<Item<'static>>);
+
+impl StrftimeFormat {
+    pub fn new(format: &'static str) -> Self {
+        Self(StrftimeItems::new(format).collect())
+    }
+
+    fn parse(&self, s: &str) -> Result<DateTime<FixedOffset>, chrono::ParseError> {
+        let mut parsed = Parsed::new();
+        parse(&mut parsed, s, self.0.iter())?;
+        parsed.to_datetime().or_else(|e| {
+            parsed
+                .to_naive_datetime_with_offset(0)
+                .map(|datetime| datetime.and_utc().fixed_offset())
+                .map_err(|_| e)
+        })
+    }
+
+    pub fn deserialize<'de, D: Deserializer<'de>>(
+        &self,
+        deserializer: D,
+    ) -> Result<Timestamp, D::Error> {
+        deserializer.deserialize_str(StrVisitor("a timestamp string", |s: &str| self.parse(s)))
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use serde::Deserialize;
+
+    use super::*;
+
+    #[derive(Deserialize)]
+    struct Patch {
+        #[serde(deserialize_with = "deserialize_default")]
+        default: Timestamp,
+        #[serde(deserialize_with = "deserialize_epoch_ms")]
+        epoch_ms: Timestamp,
+        #[serde(deserialize_with = "deserialize_epoch_ns")]
+        epoch_ns: Timestamp,
+        #[serde(deserialize_with = "deserialize_rfc3339")]
+        rfc3339: Timestamp,
+    }
+
+    #[test]
+    fn test_input_timestamp_formats() {
+        let patch: Patch = serde_json::from_str(
+            r#"{
+                "default": "2024-05-01 12:00:00.123 UTC",
+                "epoch_ms": 1714564800123,
+                "epoch_ns": 1714564800123000000,
+                "rfc3339": "2024-05-01T14:00:00.123+02:00"
+            }"#,
+        )
+        .unwrap();
+        let expected = 1_714_564_800_123_000_000;
+        assert_eq!(patch.default, expected);
+        assert_eq!(patch.epoch_ms, expected);
+        assert_eq!(patch.epoch_ns, expected);
+        assert_eq!(patch.rfc3339, expected);
+        assert!(serde_json::from_str::<Patch>(r#"{"epoch_ms": "1714564800123"}"#).is_err());
+    }
+
+    #[test]
+    fn test_strftime_format() {
+        let expected = 1_714_564_800_123_000_000;
+        let naive = StrftimeFormat::new("%d/%m/%Y %H:%M:%S%.3f");
+        let mut de = serde_json::Deserializer::from_str(r#""01/05/2024 12:00:00.123""#);
+        assert_eq!(naive.deserialize(&mut de).unwrap(), expected);
+
+        let with_offset = StrftimeFormat::new("%Y%m%d %H%M%S%.f %z");
+        let mut de = serde_json::Deserializer::from_str(r#""20240501 070000.123 -0500""#);
+        assert_eq!(with_offset.deserialize(&mut de).unwrap(), expected);
+
+        let mut de = serde_json::Deserializer::from_str(r#""2024-05-01""#);
+        assert!(naive.deserialize(&mut de).is_err());
+    }
+}
@@ -1,6 +1,13 @@
+use std::collections::hash_map::DefaultHasher;
 use std::fmt::Display;
+use std::hash::Hasher;
+use std::io;
 use std::time::Instant;
 
+use serde::Serialize;
+
+use crate::context::LookaheadStats;
+
 pub trait NodeOutputHandler<'a, T> {
     fn new(value: &'a T) -> Self;
 
@@ -25,8 +32,22 @@ pub trait LspDataLogicInstrument: Display {
     #[inline(always)]
     fn node_update_end(&mut self, _node_id: usize) {}
 
+    /// Called once the input is exhausted.
     #[inline(always)]
-    fn handle_node_output<'a, T>(&mut self, node_output: &'a T) {
+    fn handle_lookahead_stats(&mut self, _stats: LookaheadStats) {}
+
+    /// Called once the input is exhausted, with the number of input records which are skipped
+    /// because they can't be decoded.
+    #[inline(always)]
+    fn handle_malformed_input_records(&mut self, _count: usize) {}
+
+    /// Called once the input is exhausted, with the number of input events which are dropped
+    /// because they arrive later than the reorder tolerance allows.
+    #[inline(always)]
+    fn handle_late_input_events(&mut self, _count: usize) {}
+
+    #[inline(always)]
+    fn handle_node_output<'a, T: Serialize>(&mut self, node_output: &'a T) {
         let wrapped =
             <Self::NodeOutputHandler<'a, T> as NodeOutputHandler<'a, T>>::new(node_output);
         wrapped.handle_node_output(self);
@@ -90,3 +111,163 @@ impl LspDataLogicInstrument for InstrumentDataLogicRunningTime {
         }
     }
 }
+
+#[derive(Default)]
+pub struct InstrumentLookahead {
+    pub stats: LookaheadStats,
+}
+
+impl Display for InstrumentLookahead {
+    fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
+        write!(
+            f,
+            "PeakLookaheadDepth = {}, TruncatedLookaheads = {}",
+            self.stats.peak_depth, self.stats.num_truncated
+        )
+    }
+}
+
+impl LspDataLogicInstrument for InstrumentLookahead {
+    type NodeOutputHandler<'a, T> = DropNodeOutput;
+
+    #[inline(always)]
+    fn handle_lookahead_stats(&mut self, stats: LookaheadStats) {
+        self.stats = stats;
+    }
+}
+
+/// The statistics of a single node collected by [InstrumentNodeChanges].
+#[derive(Clone, Copy, Debug, Default, Serialize)]
+pub struct NodeChangeStats {
+    pub id: usize,
+    /// The number of times the node is updated.
+    pub evaluations: u64,
+    /// The number of updates producing an output different from the previous one.
+    pub changes: u64,
+    /// The total size of the outputs serialized as JSON, in bytes.
+    pub output_bytes: u64,
+    #[serde(skip)]
+    last_output: Option<(u64, u64)>,
+}
+
+impl NodeChangeStats {
+    pub fn avg_output_bytes(&self) -> f64 {
+        if self.evaluations == 0 {
+            return 0.0;
+        }
+        self.output_bytes as f64 / self.evaluations as f64
+    }
+}
+
+/// Feeds the serialized output into a hasher, so the output is compared without being stored.
+struct OutputDigest {
+    hasher: DefaultHasher,
+    len: u64,
+}
+
+impl io::Write for OutputDigest {
+    fn write(&mut self, buf: &[u8]) -> io::Result<usize> {
+        self.hasher.write(buf);
+        self.len += buf.len() as u64;
+        Ok(buf.len())
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        Ok(())
+    }
+}
+
+/// Counts how often each node is evaluated and how often its output actually changes.
+///
+/// The statistics are serialized as JSON for `python -m lsdl.node_stats`, which joins them with
+/// the IR and lists the nodes doing the most work per output change.
+#[derive(Default, Serialize)]
+pub struct InstrumentNodeChanges {
+    /// The number of moments, a node evaluated fewer times is skipped by its update group.
+    pub moments: u64,
+    pub nodes: Vec<NodeChangeStats>,
+    #[serde(skip)]
+    current_node: Option<usize>,
+}
+
+impl Display for InstrumentNodeChanges {
+    fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
+        let evaluations: u64 = self.nodes.iter().map(|n| n.evaluations).sum();
+        let changes: u64 = self.nodes.iter().map(|n| n.changes).sum();
+        write!(
+            f,
+            "Moments = {}, NodeEvaluations = {}, NodeOutputChanges = {}",
+            self.moments, evaluations, changes
+        )
+    }
+}
+
+impl LspDataLogicInstrument for InstrumentNodeChanges {
+    type NodeOutputHandler<'a, T> = DropNodeOutput;
+
+    #[inline(always)]
+    fn data_logic_update_begin(&mut self) {
+        self.moments += 1;
+    }
+
+    #[inline(always)]
+    fn node_update_end(&mut self, node_id: usize) {
+        if self.nodes.len() <= node_id {
+            let first_new_id = self.nodes.len();
+            self.nodes
+                .extend((first_new_id..=node_id).map(|id| NodeChangeStats {
+                    id,
+                    ..Default::default()
+                }));
+        }
+        self.current_node = Some(node_id);
+    }
+
+    fn handle_node_output<'a, T: Serialize>(&mut self, node_output: &'a T) {
+        let Some(node_id) = self.current_node.take() else {
+            return;
+        };
+        let mut digest = OutputDigest {
+            hasher: DefaultHasher::new(),
+            len: 0,
+        };
+        if serde_json::to_writer(&mut digest, node_output).is_err() {
+            return;
+        }
+        let output = (digest.hasher.finish(), digest.len);
+        let stats = &mut self.nodes[node_id];
+        stats.evaluations += 1;
+        stats.output_bytes += digest.len;
+        if stats.last_output != Some(output) {
+            stats.changes += 1;
+            stats.last_output = Some(output);
+        }
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use super::*;
+
+    #[test]
+    fn test_node_changes() {
+        let mut instr = InstrumentNodeChanges::default();
+        for value in [1, 1, 2, 2, 2, 3] {
+            instr.data_logic_update_begin();
+            instr.node_update_end(1);
+            instr.handle_node_output(&value);
+            if value != 2 {
+                instr.node_update_end(0);
+                instr.handle_node_output(&"constant");
+            }
+            instr.data_logic_update_end();
+        }
+        assert_eq!(instr.moments, 6);
+        assert_eq!(instr.nodes[0].evaluations, 3);
+        assert_eq!(instr.nodes[0].changes, 1);
+        assert_eq!(instr.nodes[0].avg_output_bytes(), 10.0);
+        assert_eq!(instr.nodes[1].evaluations, 6);
+        assert_eq!(instr.nodes[1].changes, 3);
+        assert_eq!(instr.nodes[1].output_bytes, 6);
+    }
+}
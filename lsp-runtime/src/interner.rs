@@ -0,0 +1,165 @@
+use std::collections::HashMap;
+use std::fmt::{Debug, Display};
+use std::ops::Deref;
+use std::sync::{OnceLock, RwLock};
+
+use serde::{Deserialize, Serialize};
+
+/// The open-ended dictionary behind [Symbol].
+///
+/// Every distinct string is stored once and never freed, so it's only meant for low-cardinality
+/// inputs, e.g. event names, platform names, etc.
+struct Interner {
+    ids: HashMap<&'static str, u32>,
+    strings: Vec<&'static str>,
+}
+
+impl Interner {
+    fn new() -> Self {
+        let mut ret = Self {
+            ids: HashMap::new(),
+            strings: Vec::new(),
+        };
+        // The empty string is always the id 0, which makes it the default value of [Symbol].
+        ret.insert("");
+        ret
+    }
+
+    fn insert(&mut self, s: &str) -> u32 {
+        if let Some(id) = self.ids.get(s) {
+            return *id;
+        }
+        let id = self.strings.len() as u32;
+        let s: &'static str = Box::leak(s.to_owned().into_boxed_str());
+        self.strings.push(s);
+        self.ids.insert(s, id);
+        id
+    }
+}
+
+fn global_interner() -> &'static RwLock<Interner> {
+    static INTERNER: OnceLock<RwLock<Interner>> = OnceLock::new();
+    INTERNER.get_or_init(|| RwLock::new(Interner::new()))
+}
+
+/// A dictionary encoded string.
+///
+/// A symbol is a small integer id of an interned string, thus comparing, cloning and hashing a
+/// symbol is as cheap as doing that on a `u32`. The string is only looked up when it's displayed or
+/// serialized, for example, when a symbol is measured as a metric.
+///
+/// Note: The ids are assigned in the order strings are first seen, therefore they are only
+/// meaningful within one process, and a symbol is always serialized as its string.
+#[derive(Clone, Copy, Default, PartialEq, Eq, Hash)]
+pub struct Symbol(u32);
+
+impl Symbol {
+    pub fn intern(s: &str) -> Self {
+        if let Some(id) = global_interner().read().unwrap().ids.get(s) {
+            return Symbol(*id);
+        }
+        Symbol(global_interner().write().unwrap().insert(s))
+    }
+
+    pub fn as_str(&self) -> &'static str {
+        global_interner().read().unwrap().strings[self.0 as usize]
+    }
+
+    pub fn id(&self) -> u32 {
+        self.0
+    }
+}
+
+/// Interns a string literal once, and reuses the symbol on later evaluations.
+#[macro_export]
+macro_rules! symbol {
+    ($s:expr) => {{
+        static SYMBOL: std::sync::OnceLock<$crate::Symbol> = std::sync::OnceLock::new();
+        *SYMBOL.get_or_init(|| $crate::Symbol::intern($s))
+    }};
+}
+
+impl From<&str> for Symbol {
+    fn from(value: &str) -> Self {
+        Self::intern(value)
+    }
+}
+
+impl Deref for Symbol {
+    type Target = str;
+
+    fn deref(&self) -> &Self::Target {
+        self.as_str()
+    }
+}
+
+impl PartialEq<str> for Symbol {
+    fn eq(&self, other: &str) -> bool {
+        self.as_str() == other
+    }
+}
+
+impl Display for Symbol {
+    fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
+        f.write_str(self.as_str())
+    }
+}
+
+impl Debug for Symbol {
+    fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
+        write!(f, "Symbol({}: {:?})", self.0, self.as_str())
+    }
+}
+
+impl Serialize for Symbol {
+    fn serialize<S: serde::Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        serializer.serialize_str(self.as_str())
+    }
+}
+
+impl<'de> Deserialize<'de> for Symbol {
+    fn deserialize<D: serde::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
+        struct SymbolVisitor;
+
+        impl serde::de::Visitor<'_> for SymbolVisitor {
+            type Value = Symbol;
+
+            fn expecting(&self, formatter: &mut std::fmt::Formatter) -> std::fmt::Result {
+                formatter.write_str("a string")
+            }
+
+            // Known strings are looked up without allocating an owned `String`.
+            fn visit_str<E: serde::de::Error>(self, v: &str) -> Result<Self::Value, E> {
+                Ok(Symbol::intern(v))
+            }
+        }
+
+        deserializer.deserialize_str(SymbolVisitor)
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use super::Symbol;
+
+    #[test]
+    fn test_intern() {
+        let a = Symbol::intern("conviva_screen_view");
+        let b = Symbol::intern("conviva_network_request");
+        assert_ne!(a, b);
+        assert_eq!(a, Symbol::intern("conviva_screen_view"));
+        assert_eq!(a, crate::symbol!("conviva_screen_view"));
+        assert_eq!(a.as_str(), "conviva_screen_view");
+        assert_eq!(Symbol::default().as_str(), "");
+        assert_eq!(Symbol::default(), Symbol::intern(""));
+    }
+
+    #[test]
+    fn test_serde() {
+        let a = Symbol::intern("seek start");
+        let json = serde_json::to_string(&a).unwrap();
+        assert_eq!(json, "\"seek start\"");
+        assert_eq!(serde_json::from_str::<Symbol>(&json).unwrap(), a);
+        assert!(serde_json::from_str::<Symbol>("1").is_err());
+    }
+}
@@ -3,9 +3,14 @@ pub type Duration = u64;
 
 pub mod checkpoint;
 pub mod context;
+pub mod input;
+pub mod input_timestamp;
 pub mod instrument;
+pub mod interner;
+pub mod output;
 pub mod signal_api;
 
 mod moment;
 
+pub use interner::Symbol;
 pub use moment::Moment;
@@ -9,16 +9,38 @@ use crate::Timestamp;
 pub struct Moment {
     timestamp: Timestamp,
     update_flags: u32,
+    #[serde(skip)]
+    updated_groups: u64,
 }
 
 impl Moment {
     const UPDATE_FLAGS_SIGNAL: u32 = 0x1;
     const UPDATE_FLAGS_MEASUREMENT: u32 = 0x2;
 
+    /// The update groups with an id larger than this share the same bit in the update group set.
+    pub const MAX_UPDATE_GROUP_ID: u32 = u64::BITS - 1;
+
+    #[inline(always)]
+    pub fn update_group_bit(group_id: u32) -> u64 {
+        1 << group_id.min(Self::MAX_UPDATE_GROUP_ID)
+    }
+
+    /// Mark the update groups (as a bit set built with [Self::update_group_bit]) whose inputs are
+    /// changed at this moment.
+    #[inline(always)]
+    pub fn with_updated_groups(self, updated_groups: u64) -> Self {
+        Self {
+            updated_groups: self.updated_groups | updated_groups,
+            ..self
+        }
+    }
+
+    /// The group 0 contains all the nodes depending on time or on internal events, which are
+    /// updated at every moment. The nodes in any other group only depend on some input signals,
+    /// and they can be skipped when none of these inputs changes.
     #[inline(always)]
-    pub fn should_update_group(&self, _group_id: u32) -> bool {
-        // Dummy implementation, will be used when the partial update is enabled
-        true
+    pub fn should_update_group(&self, group_id: u32) -> bool {
+        group_id == 0 || (self.updated_groups & Self::update_group_bit(group_id)) > 0
     }
 
     #[inline(always)]
@@ -26,6 +48,7 @@ impl Moment {
         Moment {
             timestamp,
             update_flags: Self::UPDATE_FLAGS_MEASUREMENT,
+            updated_groups: 0,
         }
     }
 
@@ -34,6 +57,7 @@ impl Moment {
         Moment {
             timestamp,
             update_flags: Self::UPDATE_FLAGS_SIGNAL,
+            updated_groups: 0,
         }
     }
 
@@ -59,6 +83,7 @@ impl Moment {
         Some(Self {
             timestamp: self.timestamp,
             update_flags: self.update_flags | other.update_flags,
+            updated_groups: self.updated_groups | other.updated_groups,
         })
     }
 }
@@ -102,4 +127,22 @@ mod test {
         let ab = a.merge(&b);
         assert!(ab.is_none());
     }
+
+    #[test]
+    fn test_update_groups() {
+        let a = Moment::signal_update(0);
+        assert!(a.should_update_group(0));
+        assert!(!a.should_update_group(1));
+
+        let a = a.with_updated_groups(Moment::update_group_bit(1) | Moment::update_group_bit(3));
+        assert!(a.should_update_group(1));
+        assert!(!a.should_update_group(2));
+        assert!(a.should_update_group(3));
+
+        let b = Moment::measurement(0).with_updated_groups(Moment::update_group_bit(100));
+        let ab = a.merge(&b).unwrap();
+        assert!(ab.should_update_group(1));
+        assert!(ab.should_update_group(Moment::MAX_UPDATE_GROUP_ID));
+        assert!(ab.should_update_group(200));
+    }
 }
@@ -0,0 +1,190 @@
+//! Writing the output records as JSON lines.
+//!
+//! The records are serialized into a reusable buffer, and a full buffer is either written on the
+//! data logic thread, or handed off to a writer thread, so the output I/O overlaps with the
+//! processing.
+
+use std::io::{self, Write};
+use std::mem;
+use std::sync::mpsc::{self, Receiver, SyncSender};
+use std::thread::{self, JoinHandle};
+
+use serde::Serialize;
+
+#[derive(Clone, Copy, Debug)]
+pub struct JsonLinesOutputOptions {
+    /// A buffer is written once it reaches this size, in bytes.
+    pub buffer_bytes: usize,
+    /// Write the buffers on a dedicated thread.
+    pub writer_thread: bool,
+    /// The number of full buffers which can wait for the writer thread.
+    pub queue_buffers: usize,
+}
+
+impl Default for JsonLinesOutputOptions {
+    fn default() -> Self {
+        Self {
+            buffer_bytes: 64 * 1024,
+            writer_thread: false,
+            queue_buffers: 4,
+        }
+    }
+}
+
+enum Sink<W> {
+    Direct(W),
+    Threaded {
+        buffers: SyncSender<Vec<u8>>,
+        // The writer thread returns the written buffers, so they are reused.
+        recycled: Receiver<Vec<u8>>,
+        // Taken once the writer thread is joined.
+        writer: Option<JoinHandle<io::Result<W>>>,
+    },
+}
+
+/// A writer of the output records as JSON lines.
+///
+/// The buffered records are only written completely by [JsonLinesOutput::finish], which also
+/// reports the error happening on the writer thread.
+pub struct JsonLinesOutput<W> {
+    buffer: Vec<u8>,
+    buffer_bytes: usize,
+    sink: Sink<W>,
+}
+
+impl<W: Write + Send + 'static> JsonLinesOutput<W> {
+    pub fn new(writer: W, options: JsonLinesOutputOptions) -> Self {
+        let buffer_bytes = options.buffer_bytes.max(1);
+        let sink = if options.writer_thread {
+            let (buffers, full_buffers) = mpsc::sync_channel::<Vec<u8>>(options.queue_buffers);
+            let (recycle, recycled) = mpsc::sync_channel(options.queue_buffers + 1);
+            let writer = thread::spawn(move || {
+                let mut writer = writer;
+                for mut buffer in full_buffers {
+                    writer.write_all(&buffer)?;
+                    buffer.clear();
+                    // The buffer is dropped if the data logic thread doesn't need it.
+                    let _ = recycle.try_send(buffer);
+                }
+                writer.flush()?;
+                Ok(writer)
+            });
+            Sink::Threaded {
+                buffers,
+                recycled,
+                writer: Some(writer),
+            }
+        } else {
+            Sink::Direct(writer)
+        };
+        Self {
+            buffer: Vec::with_capacity(buffer_bytes),
+            buffer_bytes,
+            sink,
+        }
+    }
+
+    pub fn write_record<T: Serialize>(&mut self, record: &T) -> io::Result<()> {
+        serde_json::to_writer(&mut self.buffer, record)?;
+        self.buffer.push(b'\n');
+        if self.buffer.len() >= self.buffer_bytes {
+            self.write_buffer()?;
+        }
+        Ok(())
+    }
+
+    /// Write all the buffered records and flush the writer, which is then returned.
+    pub fn finish(mut self) -> io::Result<W> {
+        match self.sink {
+            Sink::Direct(mut writer) => {
+                writer.write_all(&self.buffer)?;
+                writer.flush()?;
+                Ok(writer)
+            }
+            Sink::Threaded {
+                buffers, writer, ..
+            } => {
+                let buffer = mem::take(&mut self.buffer);
+                // If the writer thread already stopped, its error is reported by the join below.
+                let _ = buffers.send(buffer);
+                drop(buffers);
+                match writer {
+                    Some(writer) => join_writer(writer),
+                    None => Err(writer_stopped()),
+                }
+            }
+        }
+    }
+
+    fn write_buffer(&mut self) -> io::Result<()> {
+        match &mut self.sink {
+            Sink::Direct(writer) => {
+                writer.write_all(&self.buffer)?;
+                self.buffer.clear();
+            }
+            Sink::Threaded {
+                buffers,
+                recycled,
+                writer,
+            } => {
+                let next_buffer = recycled
+                    .try_recv()
+                    .unwrap_or_else(|_| Vec::with_capacity(self.buffer_bytes));
+                let buffer = mem::replace(&mut self.buffer, next_buffer);
+                if buffers.send(buffer).is_err() {
+                    // The writer thread only stops early on an error.
+                    return match writer.take().map(join_writer) {
+                        Some(Err(e)) => Err(e),
+                        _ => Err(writer_stopped()),
+                    };
+                }
+            }
+        }
+        Ok(())
+    }
+}
+
+fn join_writer<W>(writer: JoinHandle<io::Result<W>>) -> io::Result<W> {
+    writer
+        .join()
+        .unwrap_or_else(|_| Err(io::Error::other("The output writer thread panicked")))
+}
+
+fn writer_stopped() -> io::Error {
+    io::Error::new(
+        io::ErrorKind::BrokenPipe,
+        "The output writer thread stopped",
+    )
+}
+
+#[cfg(test)]
+mod test {
+    use serde::Serialize;
+
+    use super::*;
+
+    #[derive(Serialize)]
+    struct Record {
+        value: u32,
+    }
+
+    #[test]
+    fn test_write_json_lines() {
+        let expected: String = (0..1000).map(|v| format!("{{\"value\":{v}}}\n")).collect();
+        for writer_thread in [false, true] {
+            let mut output = JsonLinesOutput::new(
+                Vec::new(),
+                JsonLinesOutputOptions {
+                    buffer_bytes: 100,
+                    writer_thread,
+                    queue_buffers: 2,
+                },
+            );
+            for value in 0..1000 {
+                output.write_record(&Record { value }).unwrap();
+            }
+            let written = output.finish().unwrap();
+            assert_eq!(String::from_utf8(written).unwrap(), expected);
+        }
+    }
+}